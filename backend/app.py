@@ -1,53 +1,656 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, make_response, g
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import sqlite3
 import os
 import json
-import uuid
+import time
+import hmac
+import hashlib
+import logging
+import tempfile
+import mimetypes
 from datetime import datetime, timedelta
+from functools import wraps
+from cache import create_cache, LRUCache
+import compression
+import metrics
+import search
+from fieldsets import FieldsetError, PROJECT_FIELDS, BLOG_FIELDS, ALUMNI_FIELDS, USER_FIELDS
+from facets import (FacetError, FacetIndex, ALUMNI_FACETS, PROJECT_FACETS, create_facet_indexes,
+                    parse_duration_weeks)
+from serialization import FastJSONProvider, dumps, encode_array
+from structured_logging import setup_logging, should_sample, redact_headers, loggable_body
+from querystats import QueryStats, InstrumentedConnection, current_stats
+from profiling import StackSampler
+from hashing import PasswordHasher, HasherBusy
+from ratelimit import create_limiter, ConcurrencyLimiter
+from typeahead import TypeaheadIndex, KINDS as TYPEAHEAD_KINDS
+from geo import gazetteer, parse_point, box_condition, nearest, create_geo_index
+from jobs import JobQueue, create_jobs_table
+from images import sniff_image_type, srcsets, DerivativeRenderer, create_image_tables
+from blobs import BlobStore, create_blob_table
+from resumable import UploadSessions, UploadError, create_upload_sessions_table
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['JWT_SECRET_KEY'] = 'your-secret-key-change-in-production'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
+# Response cache: 'lru' (per worker, invalidations broadcast), 'sqlite' or 'redis'
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'lru')
+app.config['CACHE_URL'] = os.environ.get('CACHE_URL')
+app.config['CACHE_BUS_PATH'] = os.environ.get('CACHE_BUS_PATH', 'cache.db')
+app.config['CACHE_DEFAULT_TTL'] = int(os.environ.get('CACHE_DEFAULT_TTL', 60))
+# Compress responses at least this large; levels per encoding (gzip/br/zstd)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVELS'] = dict(compression.DEFAULT_LEVELS)
+# Rows fetched per batch by streamed (NDJSON / ?stream=1) list responses
+app.config['STREAM_BATCH_SIZE'] = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+# Uploaded files get unique names, so browsers may keep them for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = timedelta(days=365)
+# Cache-Control per endpoint for conditional GETs; overrides the decorator default
+app.config['CACHE_CONTROL_POLICIES'] = {
+    'get_projects': 'private, no-cache',
+    'get_project_detail': 'public, max-age=30, must-revalidate',
+    'get_blog_posts': 'public, max-age=30, must-revalidate',
+    'get_blog_post': 'public, max-age=60, must-revalidate',
+    'get_alumni': 'public, max-age=60, must-revalidate',
+    'get_available_users': 'private, no-cache',
+}
+
+# Production is Render (or APP_ENV=production); debug output is off there
+app.config['IS_PRODUCTION'] = os.environ.get('APP_ENV', 'production' if os.environ.get('RENDER') == 'true' else 'development') == 'production'
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO' if app.config['IS_PRODUCTION'] else 'DEBUG')
+# Fraction of requests logged per endpoint; unlisted endpoints use the default
+app.config['LOG_DEFAULT_SAMPLE_RATE'] = float(os.environ.get('LOG_DEFAULT_SAMPLE_RATE', 1.0))
+app.config['LOG_SAMPLE_RATES'] = {
+    'get_projects': 0.1,
+    'get_blog_posts': 0.1,
+    'get_alumni': 0.1,
+    'get_available_users': 0.1,
+    'get_messages': 0.1,
+    'get_conversations': 0.1,
+}
+# Request bodies are logged at DEBUG only, for small JSON/form/text payloads
+app.config['LOG_BODY_MAX_BYTES'] = int(os.environ.get('LOG_BODY_MAX_BYTES', 2048))
+# Requests over either threshold are logged with their most expensive statements
+app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 500))
+app.config['SLOW_REQUEST_QUERIES'] = int(os.environ.get('SLOW_REQUEST_QUERIES', 50))
+# Server-Timing headers expose internals, so they are only sent outside production
+app.config['SERVER_TIMING'] = not app.config['IS_PRODUCTION']
+# Each gunicorn worker writes its metrics here; /metrics merges all of them
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', metrics.DEFAULT_DIRECTORY)
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+# /metrics needs "Authorization: Bearer <METRICS_TOKEN>"; without a token it
+# only answers requests from the same machine
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Request profiling: requests carrying X-Profile-Token=PROFILE_TOKEN are always
+# profiled; PROFILE_SAMPLE_RATES ("endpoint=rate,...") profiles a share of a route
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'alumconnect-profiles'))
+app.config['PROFILE_INTERVAL'] = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+# Password hashing runs on a per-worker process pool (0 = in the request thread);
+# beyond HASH_MAX_PENDING queued hashes, login/register answer 503 + Retry-After.
+# HASH_METHOD (e.g. 'scrypt') is unset by default, i.e. werkzeug's default
+# method; when set, hashes made with another method are upgraded on the next
+# successful login.
+app.config['HASH_METHOD'] = os.environ.get('HASH_METHOD') or None
+app.config['HASH_WORKERS'] = int(os.environ.get('HASH_WORKERS', 1))
+app.config['HASH_MAX_PENDING'] = int(os.environ.get('HASH_MAX_PENDING', 8))
+app.config['HASH_TIMEOUT'] = float(os.environ.get('HASH_TIMEOUT', 10))
+app.config['HASH_RETRY_AFTER'] = int(os.environ.get('HASH_RETRY_AFTER', 2))
+# Token buckets per endpoint: "<limit>/<period>; burst=N; key=user|ip". key=user
+# falls back to the client IP for anonymous requests. With the 'memory' storage
+# every gunicorn worker counts on its own; 'sqlite' shares buckets between them.
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') not in ('0', 'false')
+app.config['RATE_LIMIT_STORAGE'] = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+app.config['RATE_LIMIT_PATH'] = os.environ.get('RATE_LIMIT_PATH', 'ratelimit.db')
+app.config['RATE_LIMITS'] = {
+    'login': '10/minute; key=ip',
+    'register': '20/hour; burst=5; key=ip',
+    'get_recommended_projects': '30/minute; burst=10',
+    'send_message': '60/minute; burst=20',
+    'upload_profile_picture': '20/hour; burst=5',
+    'upload_cv': '20/hour; burst=5',
+    'upload_blog_image': '60/hour; burst=10',
+    'upload_blog_pdf': '20/hour; burst=5',
+    'upload_project_image': '60/hour; burst=10',
+    'upload_project_highlight_image': '60/hour; burst=10',
+    'upload_project_jd': '20/hour; burst=5',
+    # Chunked PDF uploads: as many files as the multipart endpoints, each in
+    # up to UPLOAD_MAX_PDF_SIZE / UPLOAD_CHUNK_SIZE chunks plus retries
+    'create_upload': '20/hour; burst=5',
+    'upload_chunk': '240/hour; burst=30',
+}
+# Requests in flight per worker on CPU-heavy endpoints; the rest get 503. Each
+# worker runs GUNICORN_THREADS threads (gunicorn.conf.py), so keep caps below it
+app.config['CONCURRENCY_LIMITS'] = {
+    'get_recommended_projects': 2,
+}
+# Proxies in front of the app that append to X-Forwarded-For (Render adds one)
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', 1 if app.config['IS_PRODUCTION'] else 0))
+# Time allowed for collecting /api/typeahead suggestions before answering
+# with what has been found so far
+app.config['TYPEAHEAD_BUDGET_MS'] = float(os.environ.get('TYPEAHEAD_BUDGET_MS', 1.0))
+# Role/name/email per user id, kept per process for this many seconds. Cleared
+# whenever the 'users' cache namespace is invalidated, in every worker.
+app.config['PRINCIPAL_CACHE_TTL'] = float(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+app.config['PRINCIPAL_CACHE_MAX_ENTRIES'] = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', 10000))
+# Background jobs (worker.py): a leased job not finished within the lease is
+# handed to another worker; failures are retried after JOBS_RETRY_BACKOFF *
+# 2^(attempt-1) seconds, up to JOBS_MAX_BACKOFF
+app.config['JOBS_LEASE_SECONDS'] = int(os.environ.get('JOBS_LEASE_SECONDS', 300))
+app.config['JOBS_RETRY_BACKOFF'] = float(os.environ.get('JOBS_RETRY_BACKOFF', 5))
+app.config['JOBS_MAX_BACKOFF'] = float(os.environ.get('JOBS_MAX_BACKOFF', 3600))
+app.config['JOBS_POLL_INTERVAL'] = float(os.environ.get('JOBS_POLL_INTERVAL', 1.0))
+# Resized WebP/AVIF copies of uploaded images are made by the job worker on a
+# pool of IMAGE_WORKERS processes (0 = in the worker itself); needs Pillow
+app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+app.config['IMAGE_TIMEOUT'] = float(os.environ.get('IMAGE_TIMEOUT', 120))
+# Uploads are stored once per content under BLOB_FOLDER (see blobs.py). The
+# 'blobs.gc' job runs every BLOB_GC_INTERVAL seconds and deletes blobs that
+# nothing has referenced for BLOB_GC_GRACE seconds (a day, so a highlight image
+# uploaded while editing a project survives until the project is saved)
+app.config['BLOB_FOLDER'] = os.environ.get('BLOB_FOLDER', os.path.join(app.config['UPLOAD_FOLDER'], 'blobs'))
+app.config['BLOB_GC_INTERVAL'] = int(os.environ.get('BLOB_GC_INTERVAL', 3600))
+app.config['BLOB_GC_GRACE'] = int(os.environ.get('BLOB_GC_GRACE', 86400))
+# Chunked uploads (/api/uploads, see resumable.py): PDFs up to
+# UPLOAD_MAX_PDF_SIZE, sent in chunks of UPLOAD_CHUNK_SIZE (each request
+# stays under MAX_CONTENT_LENGTH); sessions idle for UPLOAD_SESSION_TTL
+# seconds are deleted. Each user may have UPLOAD_MAX_SESSIONS unfinished
+# sessions declaring at most UPLOAD_MAX_RESERVED bytes in total.
+app.config['UPLOAD_MAX_PDF_SIZE'] = int(os.environ.get('UPLOAD_MAX_PDF_SIZE', 64 * 1024 * 1024))
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+app.config['UPLOAD_SESSION_TTL'] = int(os.environ.get('UPLOAD_SESSION_TTL', 86400))
+app.config['UPLOAD_MAX_SESSIONS'] = int(os.environ.get('UPLOAD_MAX_SESSIONS', 3))
+app.config['UPLOAD_MAX_RESERVED'] = int(os.environ.get('UPLOAD_MAX_RESERVED', 128 * 1024 * 1024))
+app.config['PROFILE_SAMPLE_RATES'] = {
+    endpoint.strip(): float(rate)
+    for endpoint, _, rate in (item.partition('=') for item in os.environ.get('PROFILE_SAMPLE_RATES', '').split(',') if item.strip())
+}
+
+logger = setup_logging('alumconnect', app.config['LOG_LEVEL'])
 jwt = JWTManager(app)
 CORS(app)
+cache = create_cache(app.config)
+principal_cache = LRUCache(app.config['PRINCIPAL_CACHE_MAX_ENTRIES'], app.config['PRINCIPAL_CACHE_TTL'])
+
+def clear_principals(namespace):
+    if namespace == 'users':
+        principal_cache.clear()
+
+cache.on_invalidate(clear_principals)
+
+hasher = PasswordHasher(app.config['HASH_METHOD'], app.config['HASH_WORKERS'], app.config['HASH_MAX_PENDING'],
+                        app.config['HASH_TIMEOUT'], app.config['HASH_RETRY_AFTER'])
+limiter = create_limiter(app.config)
+concurrency = ConcurrencyLimiter(app.config['CONCURRENCY_LIMITS'])
+sampler = StackSampler(app.config['PROFILE_DIR'], app.config['PROFILE_INTERVAL'])
+registry = metrics.Registry(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+REQUESTS = registry.counter('http_requests_total', 'HTTP requests by endpoint, method and status.')
+REQUEST_SECONDS = registry.histogram('http_request_duration_seconds', 'Request latency by endpoint.')
+DB_QUERIES = registry.counter('sqlite_queries_total', 'SQLite statements executed, by endpoint.')
+DB_SECONDS = registry.histogram('sqlite_request_query_seconds', 'Time spent in SQLite per request, by endpoint.')
+DB_QUERIES_PER_REQUEST = registry.histogram('sqlite_queries_per_request', 'SQLite statements per request, by endpoint.',
+                                            buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+CACHE_LOOKUPS = registry.counter('response_cache_lookups_total', 'Response cache lookups by namespace and result.')
+RATE_LIMITED = registry.counter('rate_limited_requests_total', 'Requests refused by endpoint and reason (rate, concurrency).')
+PRINCIPAL_LOOKUPS = registry.counter('principal_lookups_total', 'User role lookups by where they were answered (request, process, db).')
+UPLOAD_BYTES = registry.counter('upload_bytes_total', 'Bytes received in multipart uploads, by endpoint.')
+ACTIVE_STREAMS = registry.gauge('http_active_streams', 'Streamed responses currently being sent.')
+WORKER_INFO = registry.gauge('gunicorn_worker_info', 'One series per live worker process.', mode='liveall')
+WORKER_INFO.set(1)
+
+def compression_metrics():
+    samples = {field: {} for field in ('responses', 'cache_hits', 'bytes_in', 'bytes_out', 'bytes_saved', 'cpu_seconds')}
+    levels = {}
+    for encoding, stats in compression.stats.snapshot().items():
+        for field, values in samples.items():
+            values[metrics.label_key({'encoding': encoding})] = stats[field]
+        levels[metrics.label_key({'encoding': encoding})] = stats['level']
+    collected = {
+        f'compression_{field}_total': {'type': 'counter', 'help': f'Compressed responses: {field.replace("_", " ")}.',
+                                       'mode': None, 'samples': values}
+        for field, values in samples.items()
+    }
+    collected['compression_level'] = {'type': 'gauge', 'help': 'Compression level used per encoding.',
+                                      'mode': 'livemax', 'samples': levels}
+    return collected
+
+def cache_hit_ratio(merged):
+    totals = {}
+    for key, value in merged.get('response_cache_lookups_total', {}).get('samples', {}).items():
+        labels = dict(json.loads(key))
+        hits, lookups = totals.get(labels['namespace'], (0, 0))
+        totals[labels['namespace']] = (hits + (value if labels['result'] == 'hit' else 0), lookups + value)
+    return {metrics.label_key({'namespace': namespace}): hits / lookups
+            for namespace, (hits, lookups) in totals.items() if lookups}
+
+registry.register_collector(compression_metrics)
+registry.derive('response_cache_hit_ratio', 'Response cache hit ratio by namespace.', cache_hit_ratio)
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Add general request debugging
+def get_db():
+    """Open the app database; statements are counted and timed per request."""
+    return sqlite3.connect('launchpad.db', factory=InstrumentedConnection)
+
+# Follow-up work enqueued by handlers in their own transaction; run by worker.py
+jobs = JobQueue(get_db, lease_seconds=app.config['JOBS_LEASE_SECONDS'],
+                backoff=app.config['JOBS_RETRY_BACKOFF'], max_backoff=app.config['JOBS_MAX_BACKOFF'])
+
+# Image derivatives, rendered by the 'image.derivatives' job
+image_renderer = DerivativeRenderer(app.config['IMAGE_WORKERS'], app.config['IMAGE_TIMEOUT'])
+
+# Content-addressed upload storage
+blob_store = BlobStore(app.config['BLOB_FOLDER'], app.config['BLOB_GC_GRACE'])
+# Columns holding blob names, on their own or inside URLs / JSON; a blob none
+# of them mentions is garbage
+BLOB_REFERENCES = [
+    ('users', ['avatar', 'cv_pdf']),
+    ('projects', ['images', 'highlights', 'jd_pdf']),
+    ('blog_posts', ['images', 'pdfs']),
+]
+upload_sessions = UploadSessions(os.path.join(app.config['UPLOAD_FOLDER'], 'partial'),
+                                 max_size=app.config['UPLOAD_MAX_PDF_SIZE'],
+                                 chunk_size=app.config['UPLOAD_CHUNK_SIZE'],
+                                 ttl=app.config['UPLOAD_SESSION_TTL'],
+                                 max_sessions=app.config['UPLOAD_MAX_SESSIONS'],
+                                 max_reserved=app.config['UPLOAD_MAX_RESERVED'])
+
+# Built in the background when a worker boots (gunicorn.conf.py) or on the
+# first /api/typeahead request. Writers publish 'typeahead:<kind>:<id>' so
+# every worker reloads just that document.
+typeahead_index = TypeaheadIndex(get_db, app.config['TYPEAHEAD_BUDGET_MS'])
+cache.on_invalidate(typeahead_index.on_invalidate)
+# Bitmap index behind /api/projects/facets, rebuilt after a write that changes
+# a facet or listing column of some project
+project_facet_index = FacetIndex(PROJECT_FACETS, get_db, 'projects p', ['project_facets'])
+
+# Per-request wall time and SQL statement stats
+@app.before_request
+def start_request_timing():
+    g.request_started = time.perf_counter()
+    g.query_stats = QueryStats()
+    g.query_stats_token = current_stats.set(g.query_stats)
+
+@app.after_request
+def finish_request_timing(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - g.request_started) * 1000
+    db_ms = stats.seconds * 1000
+    if total_ms >= app.config['SLOW_REQUEST_MS'] or stats.count >= app.config['SLOW_REQUEST_QUERIES']:
+        logger.warning('slow request', extra={
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 2),
+            'queries': stats.count,
+            'db_ms': round(db_ms, 2),
+            'statements': stats.top(),
+        })
+    if app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.2f}')
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.2f};desc="{stats.count} queries"')
+
+    endpoint = request.endpoint or 'unknown'
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    REQUEST_SECONDS.observe(total_ms / 1000, endpoint=endpoint)
+    DB_QUERIES.inc(stats.count, endpoint=endpoint)
+    DB_SECONDS.observe(stats.seconds, endpoint=endpoint)
+    DB_QUERIES_PER_REQUEST.observe(stats.count, endpoint=endpoint)
+    if request.mimetype == 'multipart/form-data' and request.content_length:
+        UPLOAD_BYTES.inc(request.content_length, endpoint=endpoint)
+    registry.maybe_flush()
+    return response
+
+@app.teardown_request
+def reset_query_stats(exc):
+    token = g.pop('query_stats_token', None)
+    if token is not None:
+        current_stats.reset(token)
+
+# Client address for rate limiting; with TRUSTED_PROXIES=n the n-th address
+# from the right of X-Forwarded-For (the one our own proxy appended) is used
+def client_ip():
+    hops = app.config['TRUSTED_PROXIES']
+    route = request.access_route
+    if hops and 'X-Forwarded-For' in request.headers and len(route) >= hops:
+        return route[-hops]
+    return request.remote_addr
+
+# Per-endpoint token buckets and concurrency caps (see ratelimit.py)
+@app.before_request
+def enforce_rate_limits():
+    endpoint = request.endpoint
+    if not app.config['RATE_LIMIT_ENABLED'] or request.method == 'OPTIONS':
+        return None
+    policy = limiter.policy_for(endpoint)
+    if policy is not None:
+        user_id = get_optional_user_id() if policy.key == 'user' else None
+        client = f'user:{user_id}' if user_id is not None else f'ip:{client_ip()}'
+        result = g.rate_limit = limiter.hit(endpoint, client)
+        if result is not None and not result.allowed:
+            RATE_LIMITED.inc(endpoint=endpoint, reason='rate')
+            return jsonify({'error': 'Too many requests, please slow down'}), 429
+    if concurrency.is_limited(endpoint):
+        if not concurrency.acquire(endpoint):
+            RATE_LIMITED.inc(endpoint=endpoint, reason='concurrency')
+            return jsonify({'error': 'Server busy, retry shortly'}), 503, {'Retry-After': '1'}
+        g.concurrency_slot = endpoint
+
+@app.after_request
+def add_rate_limit_headers(response):
+    result = g.get('rate_limit')
+    if result is not None:
+        response.headers.extend(result.headers())
+    return response
+
+@app.teardown_request
+def release_concurrency_slot(exc):
+    endpoint = g.pop('concurrency_slot', None)
+    if endpoint is not None:
+        concurrency.release(endpoint)
+
+# Opt-in profiling of single requests (see profiling.py)
+@app.before_request
+def start_profiling():
+    token = app.config['PROFILE_TOKEN']
+    requested = request.headers.get('X-Profile-Token')
+    if token and requested and hmac.compare_digest(requested, token):
+        g.profile = sampler.start(request.endpoint)
+    elif should_sample(request.endpoint, app.config['PROFILE_SAMPLE_RATES'], 0.0):
+        g.profile = sampler.start(request.endpoint)
+
+@app.teardown_request
+def stop_profiling(exc):
+    session = g.pop('profile', None)
+    if session is not None:
+        path = sampler.stop(session)
+        if path:
+            logger.info('request profiled', extra={'endpoint': session.endpoint, 'profile': path})
+
+# Structured request logging, sampled per endpoint
 @app.before_request
 def log_request_info():
-    print(f"DEBUG: Incoming request: {request.method} {request.path}")
-    print(f"DEBUG: Headers: {dict(request.headers)}")
-    if request.method == 'POST':
-        print(f"DEBUG: Body: {request.get_data(as_text=True)}")
+    g.log_sampled = should_sample(request.endpoint, app.config['LOG_SAMPLE_RATES'], app.config['LOG_DEFAULT_SAMPLE_RATE'])
+    if g.log_sampled and logger.isEnabledFor(logging.DEBUG):
+        logger.debug('request received', extra={
+            'method': request.method,
+            'path': request.path,
+            'headers': redact_headers(request.headers),
+            'body': loggable_body(request, app.config['LOG_BODY_MAX_BYTES']),
+        })
+
+@app.after_request
+def log_response_info(response):
+    if g.get('log_sampled'):
+        logger.info('request', extra={
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 2),
+            'queries': g.query_stats.count,
+            'db_ms': round(g.query_stats.seconds * 1000, 2),
+            'bytes': response.content_length,
+        })
+    return response
+
+# Compress large responses; bodies from the response cache keep their
+# compressed variants next to them so hot responses aren't recompressed
+@app.after_request
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not compression.is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    encoding = compression.negotiate(request.headers.get('Accept-Encoding', ''))
+    if not encoding:
+        return response
+
+    level = app.config['COMPRESS_LEVELS'].get(encoding)
+    cached_entry = g.get('response_cache')
+    data = None
+    cpu_seconds = 0.0
+    if cached_entry:
+        namespace, key, ttl = cached_entry
+        data = cache.get(namespace, f"{key}|{encoding}")
+    precompressed = data is not None
+    if not precompressed:
+        data, cpu_seconds = compression.timed_compress(body, encoding, level)
+        if cached_entry:
+            cache.set(namespace, f"{key}|{encoding}", data, ttl)
+    compression.stats.record(encoding, level, len(body), len(data), cpu_seconds, cached=precompressed)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
 
 # Helper function to get user ID from JWT identity
 def get_user_id_from_jwt():
     identity = get_jwt_identity()
     return int(identity.replace('user_', ''))
 
+# id/role/name/email of a user, or None if there is no such user. Memoised for
+# the request in g and for PRINCIPAL_CACHE_TTL in the process, so role checks on
+# protected routes normally cost no query.
+def get_principal(user_id, cursor):
+    principals = g.setdefault('principals', {})
+    if user_id in principals:
+        PRINCIPAL_LOOKUPS.inc(source='request')
+        return principals[user_id]
+    cache.poll()
+    principal = principal_cache.get(f'principal:{user_id}')
+    if principal is not None:
+        PRINCIPAL_LOOKUPS.inc(source='process')
+    else:
+        PRINCIPAL_LOOKUPS.inc(source='db')
+        cursor.execute('SELECT id, role, name, email FROM users WHERE id = ?', (user_id,))
+        row = cursor.fetchone()
+        if row:
+            principal = {'id': row[0], 'role': row[1], 'name': row[2], 'email': row[3]}
+            principal_cache.set(f'principal:{user_id}', principal)
+    principals[user_id] = principal
+    return principal
+
+def get_user_role(user_id, cursor):
+    principal = get_principal(user_id, cursor)
+    return principal['role'] if principal else None
+
+# Wrap already-encoded JSON bytes in a response
+def json_response(body, status=200):
+    return app.response_class(body, status=status, mimetype='application/json')
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Streamed list responses: NDJSON when the client prefers it (Accept), or a
+# chunked JSON array with ?stream=1
+def stream_format():
+    if request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return 'ndjson'
+    if request.args.get('stream') in ('1', 'true'):
+        return 'json'
+    return None
+
+# Stream rows from the cursor in fetchmany batches so memory stays bounded
+# and the first byte goes out after one batch regardless of table size.
+# encode(row) returns an object for dumps (see Fieldset.row_encoder), or None
+# to skip the row.
+def stream_rows(query, params, encode):
+    ndjson = stream_format() == 'ndjson'
+    batch_size = app.config['STREAM_BATCH_SIZE']
+
+    def generate():
+        ACTIVE_STREAMS.inc()
+        registry.maybe_flush()
+        conn = get_db()
+        try:
+            cursor = conn.execute(query, params)
+            separator = b'' if ndjson else b'['
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                chunk = []
+                for row in rows:
+                    item = encode(row)
+                    if item is None:
+                        continue
+                    if ndjson:
+                        chunk.append(dumps(item))
+                        chunk.append(b'\n')
+                    else:
+                        chunk.append(separator)
+                        chunk.append(dumps(item))
+                        separator = b','
+                if chunk:
+                    yield b''.join(chunk)
+            if not ndjson:
+                yield b']' if separator == b',' else b'[]'
+        finally:
+            conn.close()
+            ACTIVE_STREAMS.dec()
+            registry.maybe_flush()
+
+    return app.response_class(generate(), mimetype=NDJSON_MIMETYPE if ndjson else 'application/json')
+
+# Helper function to get user ID on endpoints where login is optional
+def get_optional_user_id():
+    from flask_jwt_extended import verify_jwt_in_request
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        if identity:
+            return int(identity.replace('user_', ''))
+    except:
+        pass
+    return None
+
+# Tables whose writes bump a counter in table_versions (maintained by triggers)
+VERSIONED_TABLES = ['users', 'projects', 'project_positions', 'project_applications', 'blog_posts', 'blog_likes']
+
+def get_table_versions(tables):
+    conn = get_db()
+    try:
+        placeholders = ', '.join('?' for _ in tables)
+        rows = conn.execute(f'SELECT name, version FROM table_versions WHERE name IN ({placeholders})', tables).fetchall()
+        versions = dict(rows)
+        return [versions.get(table, 0) for table in tables]
+    finally:
+        conn.close()
+
+# Strong ETags from table version counters: a matching If-None-Match gets a
+# 304 before the view (and its SELECTs) runs
+def conditional_get(*tables, per_user=False, cache_control='no-cache'):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = '.'.join(str(v) for v in get_table_versions(list(tables)))
+            # cached_response keys its entries by these versions
+            g.table_versions = versions
+            variant = f"{request.full_path}|{stream_format()}"
+            if per_user:
+                variant = f"{variant}|user={get_optional_user_id()}"
+            digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+            etag = f"{request.endpoint}-{versions}-{digest}"
+            policy = app.config['CACHE_CONTROL_POLICIES'].get(request.endpoint, cache_control)
+
+            # Compressed representations carry the encoding as a tag suffix
+            candidates = [etag] + [f"{etag}-{encoding}" for encoding in compression.SUPPORTED_ENCODINGS]
+            matched = next((tag for tag in candidates if request.if_none_match.contains(tag)), None)
+            if matched:
+                response = app.response_class(status=304)
+                etag = matched
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = policy
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
+
+# Cache successful JSON GET responses; writes call cache.invalidate(namespace)
+def cached_response(namespace, per_user=False, ttl=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Streamed responses are never cached
+            if stream_format():
+                return view(*args, **kwargs)
+            key = request.full_path
+            if per_user:
+                key = f"{key}|user={get_optional_user_id()}"
+            # Under conditional_get the key includes the table versions of the
+            # ETag, so a body cached before a write (and not yet invalidated in
+            # this worker) is never served under the ETag of the newer data
+            versions = g.get('table_versions')
+            if versions:
+                key = f"{key}|v={versions}"
+            body = cache.get(namespace, key)
+            CACHE_LOOKUPS.inc(namespace=namespace, result='miss' if body is None else 'hit')
+            if body is not None:
+                g.response_cache = (namespace, key, ttl)
+                return app.response_class(body, status=200, mimetype='application/json')
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                cache.set(namespace, key, response.get_data(), ttl)
+                g.response_cache = (namespace, key, ttl)
+            return response
+        return wrapper
+    return decorator
+
+# Prometheus scrape endpoint, aggregated across all gunicorn workers
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    token = app.config['METRICS_TOKEN']
+    if token:
+        scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+        allowed = scheme.lower() == 'bearer' and hmac.compare_digest(given.encode(), token.encode())
+    else:
+        allowed = request.remote_addr in ('127.0.0.1', '::1')
+    if not allowed:
+        return jsonify({'error': 'Forbidden'}), 403
+    return app.response_class(registry.render(), content_type=metrics.CONTENT_TYPE,
+                              headers={'Cache-Control': 'no-store'})
+
+def hashing_busy_response(e):
+    response = jsonify({'error': str(e)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
 # Add JWT error handler
 @jwt.invalid_token_loader
 def invalid_token_callback(error_string):
-    print(f"DEBUG: Invalid token error: {error_string}")
+    logger.debug('Invalid token: %s', error_string)
     return jsonify({'error': f'Invalid token: {error_string}'}), 422
 
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
-    print(f"DEBUG: Expired token")
+    logger.debug('Expired token')
     return jsonify({'error': 'Token has expired'}), 422
 
 @jwt.unauthorized_loader
 def missing_token_callback(error_string):
-    print(f"DEBUG: Missing token error: {error_string}")
+    logger.debug('Missing token: %s', error_string)
     return jsonify({'error': f'Missing token: {error_string}'}), 422
 
 # Database initialization
@@ -59,8 +662,15 @@ def init_db():
         db_path = "launchpad.db"
 
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
+    try:
+        create_schema(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+# Tables, column migrations, indexes and triggers; safe to run on every start.
+# Columns are added after their CREATE TABLE so a fresh database gets them too.
+def create_schema(cursor):
     # Users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -176,21 +786,37 @@ def init_db():
         cursor.execute('ALTER TABLE users ADD COLUMN is_available BOOLEAN DEFAULT 1')
     except:
         pass
-    
-    # Add new columns to project_positions table if they don't exist
+    # Coordinates of location, geocoded on write (see geo.py)
     try:
-        cursor.execute('ALTER TABLE project_positions ADD COLUMN stipend INTEGER')
+        cursor.execute('ALTER TABLE users ADD COLUMN latitude REAL')
     except:
         pass
     try:
-        cursor.execute('ALTER TABLE project_positions ADD COLUMN duration TEXT')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE project_positions ADD COLUMN location TEXT')
+        cursor.execute('ALTER TABLE users ADD COLUMN longitude REAL')
     except:
         pass
     
+    # Projects table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('active', 'completed', 'paused')),
+            team_members TEXT,
+            tags TEXT,
+            stipend INTEGER,
+            duration TEXT,
+            skills_required TEXT,
+            location TEXT,
+            work_type TEXT CHECK (work_type IN ('remote', 'onsite', 'hybrid')),
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''')
+    
     # Add new columns to projects table if they don't exist
     try:
         cursor.execute('ALTER TABLE projects ADD COLUMN stipend INTEGER')
@@ -248,27 +874,39 @@ def init_db():
         cursor.execute('ALTER TABLE projects ADD COLUMN highlights TEXT')
     except:
         pass
-    
-    # Projects table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS projects (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT NOT NULL,
-            category TEXT NOT NULL,
-            status TEXT NOT NULL CHECK (status IN ('active', 'completed', 'paused')),
-            team_members TEXT,
-            tags TEXT,
-            stipend INTEGER,
-            duration TEXT,
-            skills_required TEXT,
-            location TEXT,
-            work_type TEXT CHECK (work_type IN ('remote', 'onsite', 'hybrid')),
-            created_by INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (created_by) REFERENCES users (id)
-        )
-    ''')
+    # Typed, indexed columns behind /api/projects filters (see facets.py)
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN duration_weeks INTEGER')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN listing_stipend INTEGER')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN listing_duration_weeks INTEGER')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN listing_location TEXT')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN latitude REAL')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN longitude REAL')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN listing_latitude REAL')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE projects ADD COLUMN listing_longitude REAL')
+    except:
+        pass
     
     # Blog posts table
     cursor.execute('''
@@ -363,6 +1001,32 @@ def init_db():
         )
     ''')
     
+    # Add new columns to project_positions table if they don't exist
+    try:
+        cursor.execute('ALTER TABLE project_positions ADD COLUMN stipend INTEGER')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE project_positions ADD COLUMN duration TEXT')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE project_positions ADD COLUMN location TEXT')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE project_positions ADD COLUMN duration_weeks INTEGER')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE project_positions ADD COLUMN latitude REAL')
+    except:
+        pass
+    try:
+        cursor.execute('ALTER TABLE project_positions ADD COLUMN longitude REAL')
+    except:
+        pass
+    
     # Project applications table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS project_applications (
@@ -443,8 +1107,47 @@ def init_db():
         )
     ''')
     
-    conn.commit()
-    conn.close()
+    # Indexes matching the ORDER BY of the list endpoints, so streamed
+    # responses can start returning rows without sorting the whole table
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_role_name ON users (role, name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects (created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_blog_posts_created_at ON blog_posts (created_at)')
+    
+    # Version counters used for ETags; bumped by triggers on every write
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Counters start at the creation time so a recreated database never
+    # reuses ETags handed out for the old one
+    epoch = int(datetime.now().timestamp())
+    for table in VERSIONED_TABLES:
+        cursor.execute('INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, ?)', (table, epoch))
+        for event in ['INSERT', 'UPDATE', 'DELETE']:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END
+            ''')
+    
+    # Full-text indexes for /api/search, kept in sync by triggers
+    search.create_search_index(cursor)
+    
+    # Indexes, lookup table and listing columns behind the alumni and project filters
+    create_facet_indexes(cursor)
+    
+    # R*Tree indexes behind the /nearby endpoints
+    create_geo_index(cursor)
+    create_jobs_table(cursor)
+    create_image_tables(cursor)
+    create_blob_table(cursor)
+    create_upload_sessions_table(cursor)
+    jobs.enqueue_once(cursor, 'blobs.gc', delay=app.config['BLOB_GC_INTERVAL'])
 
 # Auth routes
 @app.route('/api/auth/register', methods=['POST'])
@@ -466,7 +1169,7 @@ def register():
         if not data.get('graduation_year') or not data.get('department'):
             return jsonify({'error': 'Graduation year and department are required for alumni'}), 400
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -476,7 +1179,7 @@ def register():
             return jsonify({'error': 'User already exists'}), 400
         
         # Hash password
-        password_hash = generate_password_hash(data['password'])
+        password_hash = hasher.hash(data['password'])
         
         # Insert user
         cursor.execute('''
@@ -510,11 +1213,14 @@ def register():
         }
         
         conn.commit()
+        cache.invalidate('users', f'typeahead:user:{user_id}')
         return jsonify({
             'token': access_token,
             'user': user
         }), 201
         
+    except HasherBusy as e:
+        return hashing_busy_response(e)
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
@@ -524,13 +1230,12 @@ def register():
 @app.route('/api/users/<int:student_id>/applied-projects', methods=['GET'])
 @jwt_required()
 def get_user_applied_projects(student_id: int):
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT role FROM users WHERE id = ?', (student_id,))
-        role_row = cursor.fetchone()
-        if not role_row or role_row[0] != 'student':
+        role = get_user_role(student_id, cursor)
+        if role != 'student':
             return jsonify({'error': 'Target user is not a student'}), 400
 
         cursor.execute('''
@@ -572,13 +1277,12 @@ def get_user_applied_projects(student_id: int):
 @app.route('/api/users/<int:student_id>/completed-projects', methods=['GET'])
 @jwt_required()
 def get_user_completed_projects(student_id: int):
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT role FROM users WHERE id = ?', (student_id,))
-        role_row = cursor.fetchone()
-        if not role_row or role_row[0] != 'student':
+        role = get_user_role(student_id, cursor)
+        if role != 'student':
             return jsonify({'error': 'Target user is not a student'}), 400
 
         cursor.execute('''
@@ -621,7 +1325,7 @@ def login():
     if not data.get('email') or not data.get('password'):
         return jsonify({'error': 'Email and password are required'}), 400
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -629,9 +1333,18 @@ def login():
         cursor.execute('SELECT id, name, email, password_hash, role, graduation_year, department FROM users WHERE email = ?', (data['email'],))
         user_data = cursor.fetchone()
         
-        if not user_data or not check_password_hash(user_data[3], data['password']):
+        if not user_data or not hasher.verify(user_data[3], data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with old parameters while we have the password
+        if hasher.needs_rehash(user_data[3]):
+            try:
+                cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                               (hasher.hash(data['password']), user_data[0]))
+                conn.commit()
+            except HasherBusy:
+                pass
+        
         # Create access token
         access_token = create_access_token(identity=f"user_{user_data[0]}")
         
@@ -649,6 +1362,8 @@ def login():
             'user': user
         }), 200
         
+    except HasherBusy as e:
+        return hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -656,81 +1371,175 @@ def login():
 
 # Protected routes
 @app.route('/api/projects', methods=['GET'])
+@conditional_get('projects', 'users', 'project_applications', per_user=True)
+@cached_response('projects', per_user=True)
 def get_projects():
-    from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-    
-    conn = sqlite3.connect('launchpad.db')
+    try:
+        fields = PROJECT_FIELDS.resolve(request.args)
+        filters = PROJECT_FACETS.parse(request.args)
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = request.args.get('per_page')
+        per_page = min(100, max(1, int(per_page))) if per_page else None
+    except (FieldsetError, FacetError) as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+
+    conn = get_db()
     cursor = conn.cursor()
     
     # Get user_id if authenticated (optional for this endpoint)
-    user_id = None
-    try:
-        verify_jwt_in_request(optional=True)
-        identity = get_jwt_identity()
-        if identity:
-            user_id = int(identity.replace('user_', ''))
-    except:
-        pass
+    user_id = get_optional_user_id()
     
     try:
         # Get filter parameters
         availability_filter = request.args.get('availability', 'all')  # 'all', 'available', 'not_available'
         
-        cursor.execute('''
-            SELECT p.id, p.title, p.description, p.category, p.status, p.team_members, p.tags, p.skills_required, 
-                   p.stipend, p.duration, p.location, p.work_type, p.created_at, u.name as created_by_name, p.is_recruiting,
-                   p.images, p.project_links, p.jd_pdf, p.created_by, p.contact_details, p.team_roles, p.partners, p.funding, p.highlights
+        # Projects this user has applied to, fetched once instead of per row
+        applied_ids = set()
+        if user_id:
+            cursor.execute('SELECT DISTINCT project_id FROM project_applications WHERE student_id = ?', (user_id,))
+            applied_ids = {row[0] for row in cursor.fetchall()}
+        
+        # Facet filters (category, status, work_type, location, recruiting,
+        # stipend_min/max, duration_weeks_min/max) and availability run in SQL
+        conditions, params = PROJECT_FACETS.where(filters)
+        applied = 'p.id IN (SELECT project_id FROM project_applications WHERE student_id = ?)'
+        if availability_filter == 'available':
+            conditions.append(f'NOT {applied}')
+            params.append(user_id)
+        elif availability_filter == 'not_available':
+            conditions.append(applied)
+            params.append(user_id)
+        
+        # resolve() always puts id first, so row[0] is the project id
+        selected, select, joins = PROJECT_FIELDS.columns(fields)
+        query = f'''
+            SELECT {select}
             FROM projects p
-            LEFT JOIN users u ON p.created_by = u.id
+            {joins}
+            {('WHERE ' + ' AND '.join(conditions)) if conditions else ''}
             ORDER BY p.created_at DESC
-        ''')
+        '''
+        if per_page:
+            query += ' LIMIT ? OFFSET ?'
+            params += [per_page, (page - 1) * per_page]
+        encode = PROJECT_FIELDS.row_encoder(selected)
+        include_has_applied = 'has_applied' in fields
+        
+        def encode_project(row):
+            return encode(row, {'has_applied': row[0] in applied_ids} if include_has_applied else None)
+        
+        if stream_format():
+            return stream_rows(query, params, encode_project)
+        
+        cursor.execute(query, params)
+        projects = [encode_project(row) for row in cursor.fetchall()]
+        
+        return json_response(encode_array(projects))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Value counts for every project facet under the same filters as
+# /api/projects; stipend and duration are counted in ranges. Counted from an
+# in-memory bitmap index (see facets.FacetIndex) rather than a table scan
+@app.route('/api/projects/facets', methods=['GET'])
+@conditional_get('projects', 'project_positions')
+@cached_response('projects')
+def get_project_facets():
+    try:
+        filters = PROJECT_FACETS.parse(request.args)
+        facet_limit = request.args.get('facet_limit', type=int)
+    except FacetError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        total, facets = project_facet_index.count(filters, facet_limit)
+        return jsonify({'total': total, 'facets': facets}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Centre, radius and limit of a /nearby query: `near` is a place name or
+# "lat,lon", defaulting to the signed-in user's own location
+def nearby_params(cursor, user_id):
+    near = request.args.get('near', '').strip()
+    if near:
+        point = parse_point(near)
+        if point is None:
+            raise ValueError(f'Unknown place: {near}')
+    elif user_id:
+        cursor.execute('SELECT latitude, longitude FROM users WHERE id = ?', (user_id,))
+        row = cursor.fetchone()
+        if not row or row[0] is None:
+            raise ValueError('near is required: your profile has no known location')
+        point = (row[0], row[1])
+    else:
+        raise ValueError('near is required')
+    try:
+        radius_km = min(500.0, max(1.0, float(request.args.get('radius_km', 25))))
+        limit = min(200, max(1, int(request.args.get('limit', 50))))
+    except ValueError:
+        raise ValueError('radius_km and limit must be numbers')
+    return point, radius_km, limit
+
+# Projects within radius_km of a place, nearest first, e.g. onsite/hybrid
+# openings: ?near=Pune&radius_km=30&work_type=onsite&work_type=hybrid
+@app.route('/api/projects/nearby', methods=['GET'])
+@conditional_get('projects', 'project_positions', 'project_applications', 'users', per_user=True)
+def get_nearby_projects():
+    try:
+        fields = PROJECT_FIELDS.resolve(request.args)
+        filters = PROJECT_FACETS.parse(request.args)
+    except (FieldsetError, FacetError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+    user_id = get_optional_user_id()
+    
+    try:
+        try:
+            point, radius_km, limit = nearby_params(cursor, user_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        box, params = box_condition('project_geo', 'p.id', point, radius_km)
+        conditions, facet_params = PROJECT_FACETS.where(filters)
+        cursor.execute(f'''
+            SELECT p.id, p.listing_latitude, p.listing_longitude
+            FROM projects p
+            WHERE {' AND '.join([box] + conditions)}
+        ''', params + facet_params)
+        hits = nearest(cursor.fetchall(), point, radius_km, limit)
+        
+        selected, select, joins = PROJECT_FIELDS.columns(fields)
+        rows = {}
+        if hits:
+            cursor.execute(f'''
+                SELECT {select}
+                FROM projects p
+                {joins}
+                WHERE p.id IN ({','.join('?' * len(hits))})
+            ''', [project_id for project_id, _ in hits])
+            rows = {row[0]: row for row in cursor.fetchall()}
         
+        applied_ids = set()
+        if user_id and 'has_applied' in fields:
+            cursor.execute('SELECT DISTINCT project_id FROM project_applications WHERE student_id = ?', (user_id,))
+            applied_ids = {row[0] for row in cursor.fetchall()}
+        
+        encode = PROJECT_FIELDS.row_encoder(selected)
         projects = []
-        for row in cursor.fetchall():
-            project_id = row[0]
-            
-            # Check if user has applied to this project (only if user is authenticated)
-            has_applied = False
-            if user_id:
-                cursor.execute('SELECT id FROM project_applications WHERE student_id = ? AND project_id = ?', 
-                              (user_id, project_id))
-                has_applied = cursor.fetchone() is not None
-            
-            # Apply availability filter
-            if availability_filter == 'available' and has_applied:
-                continue
-            elif availability_filter == 'not_available' and not has_applied:
-                continue
-            
-            projects.append({
-                'id': project_id,
-                'title': row[1],
-                'description': row[2],
-                'category': row[3],
-                'status': row[4],
-                'team_members': json.loads(row[5]) if row[5] else [],
-                'tags': json.loads(row[6]) if row[6] else [],
-                'skills_required': json.loads(row[7]) if row[7] else [],
-                'stipend': row[8],
-                'duration': row[9],
-                'location': row[10],
-                'work_type': row[11],
-                'created_at': row[12],
-                'created_by_name': row[13],
-                'is_recruiting': bool(row[14]) if row[14] is not None else True,
-                'images': json.loads(row[15]) if row[15] else [],
-                'project_links': json.loads(row[16]) if row[16] else [],
-                'jd_pdf': row[17],
-                'created_by_id': row[18],
-                'contact_details': json.loads(row[19]) if row[19] else {},
-                'team_roles': json.loads(row[20]) if row[20] else [],
-                'partners': json.loads(row[21]) if row[21] else [],
-                'funding': row[22],
-                'highlights': json.loads(row[23]) if row[23] else [],
-                'has_applied': has_applied
-            })
+        for project_id, distance in hits:
+            extra = {'distance_km': distance}
+            if 'has_applied' in fields:
+                extra['has_applied'] = project_id in applied_ids
+            projects.append(encode(rows[project_id], extra))
         
-        return jsonify(projects), 200
+        return json_response(encode_array(projects))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -743,7 +1552,7 @@ def get_projects():
 def get_recommended_projects():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -926,23 +1735,18 @@ def get_recommended_projects():
 def create_project():
     try:
         user_id = get_user_id_from_jwt()
-        print(f"DEBUG: User ID from JWT: {user_id}")
     except Exception as e:
-        print(f"DEBUG: JWT Error: {e}")
+        logger.debug('JWT error: %s', e)
         return jsonify({'error': f'JWT Error: {str(e)}'}), 422
     
     data = request.get_json()
-    print(f"DEBUG: Request data: {data}")
-    print(f"DEBUG: Authorization header: {request.headers.get('Authorization')}")
-    print(f"DEBUG: All headers: {dict(request.headers)}")
 
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        role_row = cursor.fetchone()
-        if not role_row or role_row[0] != 'alumni':
+        role = get_user_role(user_id, cursor)
+        if role != 'alumni':
             return jsonify({'error': 'Only alumni can create projects'}), 403
 
         required = ['title', 'description', 'category']
@@ -980,8 +1784,8 @@ def create_project():
         if positions:
             for position in positions:
                 cursor.execute('''
-                    INSERT INTO project_positions (project_id, title, description, required_skills, count, filled_count, is_active, stipend, duration, location)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO project_positions (project_id, title, description, required_skills, count, filled_count, is_active, stipend, duration, duration_weeks, location)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     project_id,
                     position.get('title'),
@@ -992,10 +1796,13 @@ def create_project():
                     True,
                     position.get('stipend'),
                     position.get('duration'),
+                    parse_duration_weeks(position.get('duration')),
                     position.get('location')
                 ))
+            jobs.enqueue(cursor, 'project.geocode', {'project_id': project_id})
         
         conn.commit()
+        cache.invalidate('projects', f'typeahead:project:{project_id}')
         return jsonify({'id': project_id, 'message': 'Project created'}), 201
     except Exception as e:
         conn.rollback()
@@ -1013,7 +1820,7 @@ def update_project(project_id):
         return jsonify({'error': f'JWT Error: {str(e)}'}), 422
     
     data = request.get_json()
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
@@ -1140,6 +1947,8 @@ def update_project(project_id):
                         if position.get('duration') is not None:
                             pos_fields.append('duration = ?')
                             pos_values.append(position.get('duration'))
+                            pos_fields.append('duration_weeks = ?')
+                            pos_values.append(parse_duration_weeks(position.get('duration')))
                         if position.get('location') is not None:
                             pos_fields.append('location = ?')
                             pos_values.append(position.get('location'))
@@ -1151,8 +1960,8 @@ def update_project(project_id):
                 else:
                     # Insert new position
                     cursor.execute('''
-                        INSERT INTO project_positions (project_id, title, description, required_skills, count, filled_count, is_active, stipend, duration, location)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        INSERT INTO project_positions (project_id, title, description, required_skills, count, filled_count, is_active, stipend, duration, duration_weeks, location)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (
                         project_id,
                         title,
@@ -1163,10 +1972,13 @@ def update_project(project_id):
                         is_active,
                         position.get('stipend'),
                         position.get('duration'),
+                        parse_duration_weeks(position.get('duration')),
                         position.get('location')
                     ))
+            jobs.enqueue(cursor, 'project.geocode', {'project_id': project_id})
 
         conn.commit()
+        cache.invalidate('projects', f'typeahead:project:{project_id}')
         return jsonify({'message': 'Project updated successfully'}), 200
     except Exception as e:
         conn.rollback()
@@ -1174,44 +1986,55 @@ def update_project(project_id):
     finally:
         conn.close()
 
+# Job: coordinates for a project's positions (and its own location) after a
+# write; their listing point and the "near me" index follow through triggers
+@jobs.task('project.geocode', max_attempts=3)
+def geocode_project(payload):
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        changed = 0
+        for table, key in (('project_positions', 'project_id'), ('projects', 'id')):
+            cursor.execute(f'SELECT id, location, latitude, longitude FROM {table} WHERE {key} = ?', (payload['project_id'],))
+            updates = []
+            for row_id, location, latitude, longitude in cursor.fetchall():
+                point = gazetteer.geocode(location) or (None, None)
+                if point != (latitude, longitude):
+                    updates.append((*point, row_id))
+            cursor.executemany(f'UPDATE {table} SET latitude = ?, longitude = ? WHERE id = ?', updates)
+            changed += len(updates)
+        conn.commit()
+        if changed:
+            cache.invalidate('projects')
+    finally:
+        conn.close()
+
 @app.route('/api/blog', methods=['GET'])
+@conditional_get('blog_posts', 'blog_likes', 'users')
+@cached_response('blog')
 def get_blog_posts():
-    conn = sqlite3.connect('launchpad.db')
+    try:
+        fields = BLOG_FIELDS.resolve(request.args)
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
-        cursor.execute('''
-            SELECT b.id, b.title, b.content, b.category, b.created_at, b.updated_at,
-                   b.images, b.pdfs, u.name as author_name, b.author_id
+        selected, select, joins = BLOG_FIELDS.columns(fields)
+        cursor.execute(f'''
+            SELECT {select}
             FROM blog_posts b
-            LEFT JOIN users u ON b.author_id = u.id
+            {joins}
             ORDER BY b.created_at DESC
         ''')
+        encode = BLOG_FIELDS.row_encoder(selected)
+        # is_liked will be updated if user is logged in
+        extra = {'is_liked': False} if 'is_liked' in fields else None
+        posts = [encode(row, extra) for row in cursor.fetchall()]
         
-        posts = []
-        for row in cursor.fetchall():
-            post_id = row[0]
-            
-            # Get likes count for this post
-            cursor.execute('SELECT COUNT(*) FROM blog_likes WHERE blog_post_id = ?', (post_id,))
-            likes_count = cursor.fetchone()[0]
-            
-            posts.append({
-                'id': post_id,
-                'title': row[1],
-                'content': row[2],
-                'category': row[3],
-                'created_at': row[4],
-                'updated_at': row[5],
-                'images': json.loads(row[6]) if row[6] else [],
-                'pdfs': json.loads(row[7]) if row[7] else [],
-                'author_name': row[8],
-                'author_id': row[9],
-                'likes_count': likes_count,
-                'is_liked': False  # Will be updated if user is logged in
-            })
-        
-        return jsonify(posts), 200
+        return json_response(encode_array(posts))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1223,23 +2046,18 @@ def get_blog_posts():
 def create_blog_post():
     try:
         user_id = get_user_id_from_jwt()
-        print(f"DEBUG: User ID from JWT: {user_id}")
     except Exception as e:
-        print(f"DEBUG: JWT Error: {e}")
+        logger.debug('JWT error: %s', e)
         return jsonify({'error': f'JWT Error: {str(e)}'}), 422
     
     data = request.get_json()
-    print(f"DEBUG: Request data: {data}")
-    print(f"DEBUG: Authorization header: {request.headers.get('Authorization')}")
-    print(f"DEBUG: All headers: {dict(request.headers)}")
 
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        role_row = cursor.fetchone()
-        if not role_row or role_row[0] != 'alumni':
+        role = get_user_role(user_id, cursor)
+        if role != 'alumni':
             return jsonify({'error': 'Only alumni can create blog posts'}), 403
 
         required = ['title', 'content']
@@ -1256,6 +2074,7 @@ def create_blog_post():
         ''', (data['title'], data['content'], data.get('category'), user_id, images_json, pdfs_json))
 
         conn.commit()
+        cache.invalidate('blog')
         post_id = cursor.lastrowid
         return jsonify({'id': post_id, 'message': 'Blog post created'}), 201
     except Exception as e:
@@ -1265,8 +2084,10 @@ def create_blog_post():
         conn.close()
 
 @app.route('/api/blog/<int:post_id>', methods=['GET'])
+@conditional_get('blog_posts', 'blog_likes', 'users')
+@cached_response('blog')
 def get_blog_post(post_id):
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -1322,7 +2143,7 @@ def update_blog_post(post_id):
     except Exception as e:
         return jsonify({'error': f'JWT Error: {str(e)}'}), 422
     data = request.get_json()
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     try:
         cursor.execute('SELECT author_id FROM blog_posts WHERE id = ?', (post_id,))
@@ -1350,6 +2171,7 @@ def update_blog_post(post_id):
         values.append(post_id)
         cursor.execute(query, values)
         conn.commit()
+        cache.invalidate('blog')
         return jsonify({'message': 'Blog post updated successfully'}), 200
     except Exception as e:
         conn.rollback()
@@ -1365,7 +2187,7 @@ def delete_blog_post(post_id):
         user_id = get_user_id_from_jwt()
     except Exception as e:
         return jsonify({'error': f'JWT Error: {str(e)}'}), 422
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     try:
         cursor.execute('SELECT author_id FROM blog_posts WHERE id = ?', (post_id,))
@@ -1378,6 +2200,7 @@ def delete_blog_post(post_id):
         # Clean up likes for this post
         cursor.execute('DELETE FROM blog_likes WHERE blog_post_id = ?', (post_id,))
         conn.commit()
+        cache.invalidate('blog')
         return jsonify({'message': 'Blog post deleted successfully'}), 200
     except Exception as e:
         conn.rollback()
@@ -1390,7 +2213,7 @@ def delete_blog_post(post_id):
 def get_profile():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -1461,7 +2284,7 @@ def get_profile():
 @app.route('/api/users/<int:user_id>/profile', methods=['GET'])
 @jwt_required()
 def get_user_profile_by_id(user_id):
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -1534,7 +2357,7 @@ def update_profile():
     user_id = get_user_id_from_jwt()
     data = request.get_json()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -1574,6 +2397,9 @@ def update_profile():
             1 if data.get('is_available') else 0 if data.get('is_available') is not None else None,
             user_id
         ))
+        if data.get('location') is not None:
+            cursor.execute('UPDATE users SET latitude = ?, longitude = ? WHERE id = ?',
+                           (*(gazetteer.geocode(data['location']) or (None, None)), user_id))
         
         # Update skills if provided
         if 'skills' in data:
@@ -1610,6 +2436,7 @@ def update_profile():
                 ''', (user_id, language.get('name'), language.get('proficiency', 'intermediate')))
         
         conn.commit()
+        cache.invalidate('users', 'projects', 'blog', f'typeahead:user:{user_id}')
         return jsonify({'message': 'Profile updated successfully'}), 200
         
     except Exception as e:
@@ -1618,6 +2445,72 @@ def update_profile():
     finally:
         conn.close()
 
+# Prefix suggestions for pickers and search boxes (see typeahead.py); people
+# are only suggested to signed-in users
+@app.route('/api/typeahead', methods=['GET'])
+def typeahead_suggestions():
+    query = request.args.get('q', '')
+    kinds = [kind.strip() for kind in request.args.get('type', '').split(',') if kind.strip()] or list(TYPEAHEAD_KINDS)
+    unknown = [kind for kind in kinds if kind not in TYPEAHEAD_KINDS]
+    if unknown:
+        return jsonify({'error': f"Unknown type: {', '.join(unknown)}"}), 400
+    try:
+        limit = min(25, max(1, int(request.args.get('limit', 10))))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    user_id = get_optional_user_id()
+    if user_id is None:
+        kinds = [kind for kind in kinds if kind != 'user']
+
+    try:
+        cache.poll()
+        started = time.perf_counter()
+        results, complete = typeahead_index.query(query, kinds, limit, exclude={('user', user_id)})
+        return jsonify({
+            'query': query,
+            'results': results,
+            'complete': complete,
+            'took_ms': round((time.perf_counter() - started) * 1000, 3),
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Full-text search across projects, blog posts and alumni (see search.py)
+@app.route('/api/search', methods=['GET'])
+@conditional_get('projects', 'blog_posts', 'users')
+def search_content():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    types = [kind.strip() for kind in request.args.get('type', '').split(',') if kind.strip()]
+    unknown = [kind for kind in types if kind not in search.SEARCH_TYPES]
+    if unknown:
+        return jsonify({'error': f"Unknown type: {', '.join(unknown)}"}), 400
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(50, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        hits, counts = search.search(cursor, query, types or None, per_page, (page - 1) * per_page)
+        return jsonify({
+            'query': query,
+            'results': hits,
+            'counts': counts,
+            'total': sum(counts.values()),
+            'page': page,
+            'per_page': per_page,
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
 # Project application endpoints
 @app.route('/api/projects/<int:project_id>/apply', methods=['POST'])
 @jwt_required()
@@ -1625,15 +2518,14 @@ def apply_to_project(project_id):
     user_id = get_user_id_from_jwt()
     data = request.get_json()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is a student
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'student':
+        if user_role != 'student':
             return jsonify({'error': 'Only students can apply to projects'}), 403
         
         # Check if project exists
@@ -1653,6 +2545,7 @@ def apply_to_project(project_id):
         ''', (user_id, project_id, data.get('message', '')))
         
         conn.commit()
+        cache.invalidate('projects')
         return jsonify({'message': 'Application submitted successfully'}), 201
         
     except Exception as e:
@@ -1667,13 +2560,12 @@ def apply_to_project(project_id):
 def get_student_applied_projects():
     user_id = get_user_id_from_jwt()
 
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        role_row = cursor.fetchone()
-        if not role_row or role_row[0] != 'student':
+        role = get_user_role(user_id, cursor)
+        if role != 'student':
             return jsonify({'error': 'Only students can view applied projects'}), 403
 
         cursor.execute('''
@@ -1713,8 +2605,10 @@ def get_student_applied_projects():
         conn.close()
 
 @app.route('/api/projects/<int:project_id>', methods=['GET'])
+@conditional_get('projects', 'project_positions', 'project_applications', 'users')
+@cached_response('projects')
 def get_project_detail(project_id):
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -1816,15 +2710,14 @@ def request_mentorship():
     user_id = get_user_id_from_jwt()
     data = request.get_json()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is a student
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'student':
+        if user_role != 'student':
             return jsonify({'error': 'Only students can request mentorship'}), 403
         
         alumni_id = data.get('alumni_id')
@@ -1832,10 +2725,9 @@ def request_mentorship():
             return jsonify({'error': 'Alumni ID is required'}), 400
         
         # Check if alumni exists and is actually an alumni
-        cursor.execute('SELECT role FROM users WHERE id = ?', (alumni_id,))
-        alumni_role = cursor.fetchone()
+        alumni_role = get_user_role(alumni_id, cursor)
         
-        if not alumni_role or alumni_role[0] != 'alumni':
+        if alumni_role != 'alumni':
             return jsonify({'error': 'Invalid alumni ID'}), 400
         
         # Check if already requested
@@ -1871,25 +2763,23 @@ def create_mentorship_request():
     if not alumni_id:
         return jsonify({'error': 'Alumni ID is required'}), 400
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is a student
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'student':
+        if user_role != 'student':
             return jsonify({'error': 'Only students can send mentorship requests'}), 403
         
         # Check if alumni exists
-        cursor.execute('SELECT role FROM users WHERE id = ?', (alumni_id,))
-        alumni = cursor.fetchone()
+        alumni_role = get_user_role(alumni_id, cursor)
         
-        if not alumni:
+        if not alumni_role:
             return jsonify({'error': 'Alumni not found'}), 404
         
-        if alumni[0] != 'alumni':
+        if alumni_role != 'alumni':
             return jsonify({'error': 'User is not an alumni'}), 400
         
         # Check if request already exists
@@ -1922,18 +2812,17 @@ def create_mentorship_request():
 def get_mentorship_requests():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Get user role
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
         if not user_role:
             return jsonify({'error': 'User not found'}), 404
         
-        if user_role[0] == 'student':
+        if user_role == 'student':
             # Get requests sent by student
             cursor.execute('''
                 SELECT mr.id, mr.message, mr.status, mr.created_at,
@@ -1974,56 +2863,114 @@ def get_mentorship_requests():
 
 # Get alumni list for mentorship
 @app.route('/api/alumni', methods=['GET'])
+@conditional_get('users')
+@cached_response('users')
 def get_alumni():
-    conn = sqlite3.connect('launchpad.db')
+    try:
+        fields = ALUMNI_FIELDS.resolve(request.args)
+        filters = ALUMNI_FACETS.parse(request.args)
+    except (FieldsetError, FacetError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db()
     cursor = conn.cursor()
     
-    # Get availability filter from query params
-    availability_filter = request.args.get('availability', 'all')
-    
     try:
-        query = '''
-            SELECT id, name, email, graduation_year, department, hall, branch, bio,
-                   current_company, current_position, location, work_preference,
-                   linkedin, github, years_of_experience, domain, tech_skills, is_available
+        selected, select, _ = ALUMNI_FIELDS.columns(fields)
+        # Facet filters (department, graduation_year_min/max, skills, availability, ...)
+        conditions, params = ALUMNI_FACETS.where(filters)
+        query = f'''
+            SELECT {select}
             FROM users
             WHERE role = 'alumni'
         '''
-        
-        # Add availability filter
-        if availability_filter == 'available':
-            query += ' AND is_available = 1'
-        elif availability_filter == 'unavailable':
-            query += ' AND is_available = 0'
+        for condition in conditions:
+            query += f' AND {condition}'
         
         query += ' ORDER BY name'
         
-        cursor.execute(query)
+        encode = ALUMNI_FIELDS.row_encoder(selected)
+        if stream_format():
+            return stream_rows(query, params, encode)
         
-        alumni = []
-        for row in cursor.fetchall():
-            alumni.append({
-                'id': row[0],
-                'name': row[1],
-                'email': row[2],
-                'graduation_year': row[3],
-                'department': row[4],
-                'hall': row[5],
-                'branch': row[6],
-                'bio': row[7],
-                'current_company': row[8],
-                'current_position': row[9],
-                'location': row[10],
-                'work_preference': row[11],
-                'linkedin': row[12],
-                'github': row[13],
-                'years_of_experience': row[14],
-                'domain': row[15],
-                'tech_skills': json.loads(row[16]) if row[16] else [],
-                'is_available': bool(row[17]) if row[17] is not None else True
-            })
+        cursor.execute(query, params)
+        alumni = [encode(row) for row in cursor.fetchall()]
         
-        return jsonify(alumni), 200
+        return json_response(encode_array(alumni))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Alumni within radius_km of a place, nearest first (same filters as /api/alumni)
+@app.route('/api/alumni/nearby', methods=['GET'])
+@conditional_get('users', per_user=True)
+def get_nearby_alumni():
+    try:
+        fields = ALUMNI_FIELDS.resolve(request.args)
+        filters = ALUMNI_FACETS.parse(request.args)
+    except (FieldsetError, FacetError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    try:
+        try:
+            point, radius_km, limit = nearby_params(cursor, get_optional_user_id())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        box, params = box_condition('user_geo', 'id', point, radius_km)
+        conditions, facet_params = ALUMNI_FACETS.where(filters)
+        cursor.execute(f'''
+            SELECT id, latitude, longitude
+            FROM users
+            WHERE {' AND '.join(["role = 'alumni'", box] + conditions)}
+        ''', params + facet_params)
+        hits = nearest(cursor.fetchall(), point, radius_km, limit)
+        
+        selected, select, _ = ALUMNI_FIELDS.columns(fields)
+        rows = {}
+        if hits:
+            cursor.execute(f'''
+                SELECT {select}
+                FROM users
+                WHERE id IN ({','.join('?' * len(hits))})
+            ''', [alumni_id for alumni_id, _ in hits])
+            rows = {row[0]: row for row in cursor.fetchall()}
+        
+        encode = ALUMNI_FIELDS.row_encoder(selected)
+        alumni = [encode(rows[alumni_id], {'distance_km': distance}) for alumni_id, distance in hits]
+        
+        return json_response(encode_array(alumni))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Value counts for every alumni facet under the same filters as /api/alumni.
+# Each facet is counted ignoring its own filter, so selected values keep
+# showing their alternatives; `facet_limit` caps the values per facet.
+@app.route('/api/alumni/facets', methods=['GET'])
+@conditional_get('users')
+@cached_response('users')
+def get_alumni_facets():
+    try:
+        filters = ALUMNI_FACETS.parse(request.args)
+        facet_limit = request.args.get('facet_limit', type=int)
+    except FacetError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"SELECT {ALUMNI_FACETS.select()} FROM users WHERE role = 'alumni'")
+        total, facets = ALUMNI_FACETS.count(cursor, filters, facet_limit)
+        return jsonify({'total': total, 'facets': facets}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2036,15 +2983,14 @@ def get_alumni():
 def get_student_dashboard_stats():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is a student
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'student':
+        if user_role != 'student':
             return jsonify({'error': 'Only students can access dashboard stats'}), 403
         
         # Get applied projects count
@@ -2083,15 +3029,14 @@ def get_student_dashboard_stats():
 def get_alumni_dashboard_stats():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is an alumni
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'alumni':
+        if user_role != 'alumni':
             return jsonify({'error': 'Only alumni can access dashboard stats'}), 403
         
         # Get active projects count
@@ -2147,7 +3092,7 @@ def handle_mentorship_request(request_id, action):
     if action not in ['accept', 'decline']:
         return jsonify({'error': 'Invalid action'}), 400
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -2193,15 +3138,14 @@ def handle_mentorship_request(request_id, action):
 def get_alumni_project_applications():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is an alumni
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'alumni':
+        if user_role != 'alumni':
             return jsonify({'error': 'Only alumni can view project applications'}), 403
         
         # Get project applications for alumni's projects
@@ -2252,15 +3196,14 @@ def get_alumni_project_applications():
 def get_project_applications(project_id):
     user_id = get_user_id_from_jwt()
 
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
         # Check if user is an alumni and owns the project
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
 
-        if not user_role or user_role[0] != 'alumni':
+        if user_role != 'alumni':
             return jsonify({'error': 'Only alumni can view project applications'}), 403
 
         cursor.execute('SELECT created_by FROM projects WHERE id = ?', (project_id,))
@@ -2319,15 +3262,14 @@ def complete_project_application(application_id):
     
     feedback = data.get('feedback', '')
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is alumni
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'alumni':
+        if user_role != 'alumni':
             return jsonify({'error': 'Only alumni can mark projects as completed'}), 403
         
         # Get application details and verify ownership
@@ -2340,8 +3282,7 @@ def complete_project_application(application_id):
         
         application = cursor.fetchone()
         
-        print(f"DEBUG: Application {application_id} - Found: {application}")
-        print(f"DEBUG: User ID: {user_id}, Project Owner: {application[2] if application else 'N/A'}")
+        logger.debug('Completing application %s for user %s: %s', application_id, user_id, application)
         
         if not application:
             return jsonify({'error': 'Application not found'}), 404
@@ -2398,7 +3339,7 @@ def complete_project_application(application_id):
 def get_student_completed_projects():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -2443,7 +3384,7 @@ def get_student_completed_projects():
 def check_application_status(project_id):
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -2512,9 +3453,9 @@ def create_project_application():
     
     # Position ID is strongly recommended but not strictly required for backward compatibility
     if not position_id:
-        print(f"WARNING: Application submitted without position_id for project {project_id}")
+        logger.warning('Application submitted without position_id for project %s', project_id)
         # Check if project has positions - if so, require position_id
-        cursor = sqlite3.connect('launchpad.db').cursor()
+        cursor = get_db().cursor()
         cursor.execute('SELECT COUNT(*) FROM project_positions WHERE project_id = ? AND is_active = 1', (project_id,))
         active_positions = cursor.fetchone()[0]
         cursor.close()
@@ -2522,7 +3463,7 @@ def create_project_application():
         if active_positions > 0:
             return jsonify({'error': 'Position ID is required. Please select a specific position to apply for.'}), 400
 
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
@@ -2556,6 +3497,7 @@ def create_project_application():
         ''', (project_id, user_id, position_id, message, 'pending', has_team))
 
         conn.commit()
+        cache.invalidate('projects')
         return jsonify({'message': 'Application submitted successfully', 'position_id': position_id}), 201
 
     except Exception as e:
@@ -2570,7 +3512,7 @@ def create_project_application():
 def withdraw_application(project_id):
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -2584,6 +3526,7 @@ def withdraw_application(project_id):
             return jsonify({'error': 'Application not found'}), 404
         
         conn.commit()
+        cache.invalidate('projects')
         return jsonify({'message': 'Application withdrawn successfully'}), 200
         
     except Exception as e:
@@ -2601,7 +3544,7 @@ def handle_project_application(application_id, action):
     if action not in ['accept', 'decline']:
         return jsonify({'error': 'Invalid action'}), 400
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -2667,6 +3610,7 @@ def handle_project_application(application_id, action):
                 ''', (position_id,))
         
         conn.commit()
+        cache.invalidate('projects')
         return jsonify({'message': f'Project application {action}ed successfully'}), 200
         
     except Exception as e:
@@ -2681,15 +3625,14 @@ def handle_project_application(application_id, action):
 def get_alumni_projects():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is an alumni
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'alumni':
+        if user_role != 'alumni':
             return jsonify({'error': 'Only alumni can view their projects'}), 403
         
         # Get alumni's projects
@@ -2729,15 +3672,14 @@ def get_alumni_projects():
 def get_alumni_blog_posts():
     user_id = get_user_id_from_jwt()
     
-    conn = sqlite3.connect('launchpad.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Check if user is an alumni
-        cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-        user_role = cursor.fetchone()
+        user_role = get_user_role(user_id, cursor)
         
-        if not user_role or user_role[0] != 'alumni':
+        if user_role != 'alumni':
             return jsonify({'error': 'Only alumni can view their blog posts'}), 403
         
         # Get alumni's blog posts
@@ -2774,7 +3716,7 @@ def get_alumni_blog_posts():
 def get_conversations():
     try:
         user_id = get_user_id_from_jwt()
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get all conversations for the user
@@ -2864,7 +3806,7 @@ def create_conversation():
         if not other_user_id:
             return jsonify({'error': 'other_user_id is required'}), 400
         
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if conversation already exists
@@ -2898,7 +3840,7 @@ def create_conversation():
 def get_conversation(conversation_id):
     try:
         user_id = get_user_id_from_jwt()
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get conversation details
@@ -2947,7 +3889,7 @@ def get_conversation(conversation_id):
 def get_messages(conversation_id):
     try:
         user_id = get_user_id_from_jwt()
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Verify user is part of conversation
@@ -3003,7 +3945,7 @@ def send_message(conversation_id):
         if not content:
             return jsonify({'error': 'Message content is required'}), 400
         
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Verify user is part of conversation
@@ -3058,44 +4000,35 @@ def send_message(conversation_id):
 
 @app.route('/api/messages/available-users', methods=['GET'])
 @jwt_required()
+@conditional_get('users', per_user=True)
+@cached_response('users', per_user=True)
 def get_available_users():
+    try:
+        fields = USER_FIELDS.resolve(request.args)
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         user_id = get_user_id_from_jwt()
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Return all other users regardless of role
-        cursor.execute('''
-            SELECT id, name, email, role, department, graduation_year, 
-                   current_company, current_position, location, bio, 
-                   linkedin, github, website, hall, branch, avatar
+        selected, select, _ = USER_FIELDS.columns(fields)
+        query = f'''
+            SELECT {select}
             FROM users
             WHERE id != ?
             ORDER BY name
-        ''', (user_id,))
+        '''
+        encode = USER_FIELDS.row_encoder(selected)
+        if stream_format():
+            return stream_rows(query, (user_id,), encode)
         
-        users = []
-        for row in cursor.fetchall():
-            users.append({
-                'id': row[0],
-                'name': row[1],
-                'email': row[2],
-                'role': row[3],
-                'department': row[4],
-                'graduation_year': row[5],
-                'current_company': row[6],
-                'current_position': row[7],
-                'location': row[8],
-                'bio': row[9],
-                'linkedin': row[10],
-                'github': row[11],
-                'website': row[12],
-                'hall': row[13],
-                'branch': row[14],
-                'avatar': row[15]
-            })
+        cursor.execute(query, (user_id,))
+        users = [encode(row) for row in cursor.fetchall()]
         
-        return jsonify(users), 200
+        return json_response(encode_array(users))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -3108,7 +4041,7 @@ def get_available_users():
 def toggle_blog_like(post_id):
     try:
         user_id = get_user_id_from_jwt()
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if user has already liked this post
@@ -3129,6 +4062,7 @@ def toggle_blog_like(post_id):
         likes_count = cursor.fetchone()[0]
         
         conn.commit()
+        cache.invalidate('blog')
         
         return jsonify({
             'action': action,
@@ -3156,23 +4090,26 @@ def upload_profile_picture():
             return jsonify({'error': 'No file selected'}), 400
         
         if file:
-            # Generate unique filename
             filename = secure_filename(file.filename)
             file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
             
             if file_extension not in ['jpg', 'jpeg', 'png', 'gif']:
                 return jsonify({'error': 'Invalid file type. Only JPG, PNG, and GIF are allowed.'}), 400
             
-            unique_filename = f"{user_id}_{uuid.uuid4().hex}.{file_extension}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(file_path)
-            
             # Update user's avatar in database
-            conn = sqlite3.connect('launchpad.db')
+            conn = get_db()
             cursor = conn.cursor()
             
+            cursor.execute('SELECT avatar FROM users WHERE id = ?', (user_id,))
+            result = cursor.fetchone()
+            old_avatar = result[0] if result else None
+            
+            unique_filename = blob_store.put(cursor, file.stream, file_extension)
             cursor.execute('UPDATE users SET avatar = ? WHERE id = ?', (unique_filename, user_id))
+            blob_store.release(cursor, old_avatar)
+            enqueue_derivatives(cursor, blob_store.resolve(unique_filename), f'/api/profile/picture/{unique_filename}', 'avatar', 'users')
             conn.commit()
+            cache.invalidate('users')
             conn.close()
             
             return jsonify({
@@ -3184,11 +4121,43 @@ def upload_profile_picture():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Content types served by the image and the PDF upload routes
+IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/avif'}
+PDF_TYPES = {'application/pdf'}
+
+def send_upload(folder, filename, types):
+    """Serve an uploaded file: a blob (or one of its derivatives) by name, or
+    a file saved in ``folder`` before uploads went to the blob store. Only
+    files of one of ``types`` are served; anything but an image is sent as a
+    download, and browsers are told not to second-guess the type."""
+    if blob_store.resolve(filename) is None:
+        mimetype = mimetypes.guess_type(filename)[0]
+        if mimetype not in types:
+            return jsonify({'error': 'File not found'}), 404
+        response = send_from_directory(folder, filename, mimetype=mimetype,
+                                       as_attachment=not mimetype.startswith('image/'))
+    else:
+        conn = get_db()
+        try:
+            found = blob_store.lookup(conn.cursor(), filename)
+        finally:
+            conn.close()
+        if found is None or found[1] not in types:
+            return jsonify({'error': 'File not found'}), 404
+        path, mimetype = found
+        # Named by content, so a URL always returns the same bytes
+        response = send_from_directory(os.path.dirname(path), os.path.basename(path), mimetype=mimetype,
+                                       as_attachment=not mimetype.startswith('image/'), download_name=filename,
+                                       max_age=31536000)
+        response.cache_control.immutable = True
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
 # Serve profile pictures
 @app.route('/api/profile/picture/<filename>')
 def get_profile_picture(filename):
     try:
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        return send_upload(app.config['UPLOAD_FOLDER'], filename, IMAGE_TYPES)
     except Exception as e:
         return jsonify({'error': 'File not found'}), 404
 
@@ -3196,7 +4165,7 @@ def get_profile_picture(filename):
 @app.route('/api/projects/<int:project_id>/highlights/<filename>')
 def get_project_highlight_image(project_id, filename):
     try:
-        return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'highlights'), filename)
+        return send_upload(os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'highlights'), filename, IMAGE_TYPES)
     except Exception:
         return jsonify({'error': 'File not found'}), 404
 
@@ -3206,7 +4175,7 @@ def get_project_highlight_image(project_id, filename):
 def upload_blog_image(post_id):
     user_id = get_user_id_from_jwt()
     try:
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT author_id, images FROM blog_posts WHERE id = ?', (post_id,))
         row = cursor.fetchone()
@@ -3224,16 +4193,14 @@ def upload_blog_image(post_id):
         ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
         if ext not in ['jpg', 'jpeg', 'png', 'gif']:
             return jsonify({'error': 'Invalid file type. Only JPG, PNG, and GIF are allowed.'}), 400
-        unique_filename = f"img_{uuid.uuid4().hex}.{ext}"
-        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'blogs', str(post_id), 'images')
-        os.makedirs(folder, exist_ok=True)
-        filepath = os.path.join(folder, unique_filename)
-        file.save(filepath)
+        unique_filename = blob_store.put(cursor, file.stream, ext)
         images = json.loads(current_images) if current_images else []
         file_url = f"/api/blog/{post_id}/images/{unique_filename}"
         images.append(file_url)
         cursor.execute('UPDATE blog_posts SET images = ? WHERE id = ?', (json.dumps(images), post_id))
+        enqueue_derivatives(cursor, blob_store.resolve(unique_filename), file_url, 'content', 'blog_posts')
         conn.commit()
+        cache.invalidate('blog')
         conn.close()
         return jsonify({'message': 'Image uploaded', 'url': file_url, 'images': images}), 200
     except Exception as e:
@@ -3243,7 +4210,7 @@ def upload_blog_image(post_id):
 @app.route('/api/blog/<int:post_id>/images/<filename>')
 def get_blog_image(post_id, filename):
     try:
-        return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], 'blogs', str(post_id), 'images'), filename)
+        return send_upload(os.path.join(app.config['UPLOAD_FOLDER'], 'blogs', str(post_id), 'images'), filename, IMAGE_TYPES)
     except Exception:
         return jsonify({'error': 'File not found'}), 404
 
@@ -3253,7 +4220,7 @@ def get_blog_image(post_id, filename):
 def upload_blog_pdf(post_id):
     user_id = get_user_id_from_jwt()
     try:
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT author_id, pdfs FROM blog_posts WHERE id = ?', (post_id,))
         row = cursor.fetchone()
@@ -3269,16 +4236,13 @@ def upload_blog_pdf(post_id):
             return jsonify({'error': 'No file selected'}), 400
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({'error': 'Only PDF files are allowed'}), 400
-        unique_filename = f"pdf_{uuid.uuid4().hex}.pdf"
-        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'blogs', str(post_id), 'pdfs')
-        os.makedirs(folder, exist_ok=True)
-        filepath = os.path.join(folder, unique_filename)
-        file.save(filepath)
+        unique_filename = blob_store.put(cursor, file.stream, 'pdf')
         pdfs = json.loads(current_pdfs) if current_pdfs else []
         file_url = f"/api/blog/{post_id}/pdfs/{unique_filename}"
         pdfs.append(file_url)
         cursor.execute('UPDATE blog_posts SET pdfs = ? WHERE id = ?', (json.dumps(pdfs), post_id))
         conn.commit()
+        cache.invalidate('blog')
         conn.close()
         return jsonify({'message': 'PDF uploaded', 'url': file_url, 'pdfs': pdfs}), 200
     except Exception as e:
@@ -3288,7 +4252,7 @@ def upload_blog_pdf(post_id):
 @app.route('/api/blog/<int:post_id>/pdfs/<filename>')
 def get_blog_pdf(post_id, filename):
     try:
-        return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], 'blogs', str(post_id), 'pdfs'), filename)
+        return send_upload(os.path.join(app.config['UPLOAD_FOLDER'], 'blogs', str(post_id), 'pdfs'), filename, PDF_TYPES)
     except Exception:
         return jsonify({'error': 'File not found'}), 404
 # Upload CV endpoint
@@ -3310,13 +4274,8 @@ def upload_cv():
         return jsonify({'error': 'Only PDF files are allowed'}), 400
     
     try:
-        # Generate unique filename
-        filename = f"cv_{user_id}_{uuid.uuid4().hex}.pdf"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
         # Update user's CV in database
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get old CV filename to delete it
@@ -3325,12 +4284,14 @@ def upload_cv():
         old_cv = result[0] if result else None
         
         # Update with new CV
+        filename = blob_store.put(cursor, file.stream, 'pdf')
         cursor.execute('UPDATE users SET cv_pdf = ? WHERE id = ?', (filename, user_id))
+        blob_store.release(cursor, old_cv)
         conn.commit()
         conn.close()
         
-        # Delete old CV file if it exists
-        if old_cv:
+        # Delete old CV file if it was stored before the blob store
+        if old_cv and blob_store.resolve(old_cv) is None:
             old_filepath = os.path.join(app.config['UPLOAD_FOLDER'], old_cv)
             if os.path.exists(old_filepath):
                 os.remove(old_filepath)
@@ -3347,7 +4308,7 @@ def upload_cv():
 @app.route('/api/profile/cv/<filename>')
 def get_cv(filename):
     try:
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        return send_upload(app.config['UPLOAD_FOLDER'], filename, PDF_TYPES)
     except Exception as e:
         return jsonify({'error': 'File not found'}), 404
 
@@ -3358,7 +4319,7 @@ def delete_cv():
     user_id = get_user_id_from_jwt()
     
     try:
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get CV filename
@@ -3367,13 +4328,14 @@ def delete_cv():
         cv_filename = result[0] if result else None
         
         if cv_filename:
-            # Delete file
+            # Delete file (blobs are deleted by the garbage collector)
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], cv_filename)
-            if os.path.exists(filepath):
+            if blob_store.resolve(cv_filename) is None and os.path.exists(filepath):
                 os.remove(filepath)
             
             # Update database
             cursor.execute('UPDATE users SET cv_pdf = NULL WHERE id = ?', (user_id,))
+            blob_store.release(cursor, cv_filename)
             conn.commit()
         
         conn.close()
@@ -3389,7 +4351,7 @@ def upload_project_image(project_id):
     user_id = get_user_id_from_jwt()
     
     try:
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if user is project creator
@@ -3416,12 +4378,7 @@ def upload_project_image(project_id):
         if ext not in ['jpg', 'jpeg', 'png', 'gif']:
             return jsonify({'error': 'Invalid file type. Only JPG, PNG, and GIF are allowed.'}), 400
 
-        # Save to per-project images folder
-        unique_filename = f"img_{uuid.uuid4().hex}.{ext}"
-        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'images')
-        os.makedirs(folder, exist_ok=True)
-        filepath = os.path.join(folder, unique_filename)
-        file.save(filepath)
+        unique_filename = blob_store.put(cursor, file.stream, ext)
 
         # Append to images array
         cursor.execute('SELECT images FROM projects WHERE id = ?', (project_id,))
@@ -3430,7 +4387,9 @@ def upload_project_image(project_id):
         file_url = f"/api/projects/{project_id}/images/{unique_filename}"
         images.append(file_url)
         cursor.execute('UPDATE projects SET images = ? WHERE id = ?', (json.dumps(images), project_id))
+        jobs.enqueue(cursor, 'project_image.uploaded', {'project_id': project_id, 'filename': unique_filename})
         conn.commit()
+        cache.invalidate('projects')
         conn.close()
 
         return jsonify({'message': 'Image uploaded', 'url': file_url, 'images': images}), 200
@@ -3438,13 +4397,92 @@ def upload_project_image(project_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Job: the upload was only checked by extension; drop files whose contents are
+# not actually a JPG, PNG or GIF
+@jobs.task('project_image.uploaded', max_attempts=3)
+def check_project_image(payload):
+    project_id, filename = payload['project_id'], payload['filename']
+    filepath = blob_store.resolve(filename) or os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'images', filename)
+    if not os.path.exists(filepath):
+        return
+    with open(filepath, 'rb') as f:
+        kind = sniff_image_type(f.read(16))
+    file_url = f"/api/projects/{project_id}/images/{filename}"
+
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        if kind in ('jpeg', 'png', 'gif'):
+            enqueue_derivatives(cursor, filepath, file_url, 'content', 'projects')
+            conn.commit()
+            return
+        cursor.execute('SELECT images FROM projects WHERE id = ?', (project_id,))
+        row = cursor.fetchone()
+        images = json.loads(row[0]) if row and row[0] else []
+        if file_url in images:
+            images.remove(file_url)
+            cursor.execute('UPDATE projects SET images = ? WHERE id = ?', (json.dumps(images), project_id))
+            blob_store.release(cursor, filename)
+            conn.commit()
+            cache.invalidate('projects')
+    finally:
+        conn.close()
+    # A blob may be shared with other uploads; the garbage collector deletes it
+    if blob_store.resolve(filename) is None:
+        os.remove(filepath)
+    logger.warning('removed upload that is not an image', extra={'project_id': project_id, 'file': filename})
+
+# Response cache namespace of the table that references an image
+IMAGE_NAMESPACES = {'users': 'users', 'projects': 'projects', 'blog_posts': 'blog'}
+
+def enqueue_derivatives(cursor, path, url, profile, table):
+    jobs.enqueue(cursor, 'image.derivatives', {'path': path, 'url': url, 'profile': profile, 'table': table})
+
+# Job: thumbnails / WebP / AVIF copies of an uploaded image. List responses
+# then carry their srcsets (see fieldsets.srcsets_sql).
+@jobs.task('image.derivatives', priority=-1, max_attempts=3)
+def make_image_derivatives(payload):
+    if not os.path.exists(payload['path']):
+        return
+    variants = image_renderer.render(payload['path'], payload['profile'])
+    if not variants:
+        return
+    size = sum(result[2] for results in variants.values() for result in results)
+    conn = get_db()
+    try:
+        conn.execute('INSERT OR REPLACE INTO image_derivatives (original, srcsets, bytes) VALUES (?, ?, ?)',
+                     (payload['url'], json.dumps(srcsets(payload['url'], variants)), size))
+        # The srcsets are part of the referencing table's responses, so their
+        # ETags must change too
+        conn.execute('UPDATE table_versions SET version = version + 1 WHERE name = ?', (payload['table'],))
+        conn.commit()
+    finally:
+        conn.close()
+    cache.invalidate(IMAGE_NAMESPACES[payload['table']])
+
+# Job: mark and sweep unreferenced blobs and drop abandoned chunked uploads,
+# then run again in BLOB_GC_INTERVAL
+@jobs.task('blobs.gc', priority=-2, max_attempts=3)
+def collect_blobs(payload):
+    conn = get_db()
+    try:
+        jobs.enqueue_once(conn.cursor(), 'blobs.gc', delay=app.config['BLOB_GC_INTERVAL'])
+        conn.commit()
+        upload_sessions.expire(conn)
+        digests, _ = blob_store.collect_garbage(conn, BLOB_REFERENCES)
+        if digests:
+            conn.executemany('DELETE FROM image_derivatives WHERE instr(original, ?) > 0', [(digest,) for digest in digests])
+            conn.commit()
+    finally:
+        conn.close()
+
 # Upload a highlight image (returns URL; frontend will attach it to a specific highlight item)
 @app.route('/api/projects/<int:project_id>/highlights/image', methods=['POST'])
 @jwt_required()
 def upload_project_highlight_image(project_id):
     user_id = get_user_id_from_jwt()
     try:
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
 
         # Check if user is project creator
@@ -3470,14 +4508,13 @@ def upload_project_highlight_image(project_id):
         if ext not in ['jpg', 'jpeg', 'png', 'gif']:
             return jsonify({'error': 'Invalid file type. Only JPG, PNG, and GIF are allowed.'}), 400
 
-        # Save to per-project highlights folder
-        unique_filename = f"hl_{uuid.uuid4().hex}.{ext}"
-        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'highlights')
-        os.makedirs(folder, exist_ok=True)
-        filepath = os.path.join(folder, unique_filename)
-        file.save(filepath)
-
+        # The frontend saves the URL in a highlight later. Until then nothing
+        # references the blob, and the garbage collector deletes it (and the
+        # URL stops working) if it is not saved within BLOB_GC_GRACE (a day)
+        unique_filename = blob_store.put(cursor, file.stream, ext)
         file_url = f"/api/projects/{project_id}/highlights/{unique_filename}"
+        enqueue_derivatives(cursor, blob_store.resolve(unique_filename), file_url, 'content', 'projects')
+        conn.commit()
         return jsonify({'message': 'Highlight image uploaded', 'url': file_url}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -3486,7 +4523,7 @@ def upload_project_highlight_image(project_id):
 @app.route('/api/projects/<int:project_id>/images/<filename>')
 def get_project_image(project_id, filename):
     try:
-        return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'images'), filename)
+        return send_upload(os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'images'), filename, IMAGE_TYPES)
     except Exception as e:
         return jsonify({'error': 'File not found'}), 404
 
@@ -3497,7 +4534,7 @@ def upload_project_jd(project_id):
     user_id = get_user_id_from_jwt()
     
     try:
-        conn = sqlite3.connect('launchpad.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if user is project creator
@@ -3522,17 +4559,14 @@ def upload_project_jd(project_id):
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({'error': 'Only PDF files are allowed'}), 400
 
-        # Save to per-project jd folder
-        unique_filename = f"jd_{uuid.uuid4().hex}.pdf"
-        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'jd')
-        os.makedirs(folder, exist_ok=True)
-        filepath = os.path.join(folder, unique_filename)
-        file.save(filepath)
+        unique_filename = blob_store.put(cursor, file.stream, 'pdf')
 
         # Update jd_pdf URL
         jd_url = f"/api/projects/{project_id}/jd/{unique_filename}"
         cursor.execute('UPDATE projects SET jd_pdf = ? WHERE id = ?', (jd_url, project_id))
+        blob_store.release(cursor, existing_jd)
         conn.commit()
+        cache.invalidate('projects')
         conn.close()
 
         return jsonify({'message': 'JD uploaded', 'jd_pdf': jd_url}), 200
@@ -3544,10 +4578,173 @@ def upload_project_jd(project_id):
 @app.route('/api/projects/<int:project_id>/jd/<filename>')
 def get_project_jd(project_id, filename):
     try:
-        return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'jd'), filename)
+        return send_upload(os.path.join(app.config['UPLOAD_FOLDER'], 'projects', str(project_id), 'jd'), filename, PDF_TYPES)
     except Exception as e:
         return jsonify({'error': 'File not found'}), 404
 
+# Chunked, resumable PDF uploads (CV, project JD, blog PDF); see resumable.py
+def check_upload_target(cursor, kind, user_id, target_id):
+    """Error response if ``user_id`` may not attach a ``kind`` upload to
+    ``target_id`` (a project for JDs, a blog post for blog PDFs), else None."""
+    if kind == 'jd':
+        cursor.execute('SELECT created_by FROM projects WHERE id = ?', (target_id,))
+        row = cursor.fetchone()
+        if not row:
+            return jsonify({'error': 'Project not found'}), 404
+        if row[0] != user_id:
+            return jsonify({'error': 'Only project creator can upload JD'}), 403
+    elif kind == 'blog_pdf':
+        cursor.execute('SELECT author_id FROM blog_posts WHERE id = ?', (target_id,))
+        row = cursor.fetchone()
+        if not row:
+            return jsonify({'error': 'Blog post not found'}), 404
+        if row[0] != user_id:
+            return jsonify({'error': 'Only the author can upload PDFs'}), 403
+    return None
+
+def attach_upload(cursor, kind, user_id, target_id, filename):
+    """Point the CV, JD or blog post at the stored file ``filename``; returns
+    the response body of the matching multipart endpoint."""
+    if kind == 'cv':
+        cursor.execute('SELECT cv_pdf FROM users WHERE id = ?', (user_id,))
+        result = cursor.fetchone()
+        cursor.execute('UPDATE users SET cv_pdf = ? WHERE id = ?', (filename, user_id))
+        blob_store.release(cursor, result[0] if result else None)
+        return {'message': 'CV uploaded successfully', 'cv_url': f'/api/profile/cv/{filename}'}
+    if kind == 'jd':
+        cursor.execute('SELECT jd_pdf FROM projects WHERE id = ?', (target_id,))
+        existing_jd = cursor.fetchone()[0]
+        jd_url = f"/api/projects/{target_id}/jd/{filename}"
+        cursor.execute('UPDATE projects SET jd_pdf = ? WHERE id = ?', (jd_url, target_id))
+        blob_store.release(cursor, existing_jd)
+        return {'message': 'JD uploaded', 'jd_pdf': jd_url}
+    cursor.execute('SELECT pdfs FROM blog_posts WHERE id = ?', (target_id,))
+    current_pdfs = cursor.fetchone()[0]
+    pdfs = json.loads(current_pdfs) if current_pdfs else []
+    file_url = f"/api/blog/{target_id}/pdfs/{filename}"
+    pdfs.append(file_url)
+    cursor.execute('UPDATE blog_posts SET pdfs = ? WHERE id = ?', (json.dumps(pdfs), target_id))
+    return {'message': 'PDF uploaded', 'url': file_url, 'pdfs': pdfs}
+
+# Response cache namespace to invalidate once an upload of each kind is attached
+UPLOAD_NAMESPACES = {'jd': 'projects', 'blog_pdf': 'blog'}
+
+def upload_error_response(e):
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+# Start a chunked upload: {"kind": "cv" | "jd" | "blog_pdf", "target_id": project
+# or post id, "size": bytes, "filename": "..."}
+@app.route('/api/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    user_id = get_user_id_from_jwt()
+    data = request.get_json() or {}
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        kind = data.get('kind')
+        target_id = data.get('target_id')
+        error = check_upload_target(cursor, kind, user_id, target_id)
+        if error:
+            return error
+        upload_id = upload_sessions.create(cursor, user_id, kind, target_id, data.get('size'), data.get('filename'))
+        conn.commit()
+        return jsonify({'upload_id': upload_id, 'offset': 0, 'chunk_size': upload_sessions.chunk_size}), 201
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Offset to resume a chunked upload from
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    user_id = get_user_id_from_jwt()
+    conn = get_db()
+    try:
+        session = upload_sessions.get(conn.cursor(), upload_id, user_id)
+        return jsonify({'upload_id': upload_id, 'offset': session['offset'], 'size': session['size']}), 200
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Append a chunk (the raw request body) at ?offset=
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    user_id = get_user_id_from_jwt()
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'offset is required'}), 400
+    conn = get_db()
+    try:
+        new_offset = upload_sessions.write(conn, upload_id, user_id, offset, request.stream)
+        return jsonify({'upload_id': upload_id, 'offset': new_offset}), 200
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Store a fully received upload and attach it; optional {"sha256": "..."} is
+# checked against the received bytes
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(upload_id):
+    user_id = get_user_id_from_jwt()
+    data = request.get_json(silent=True) or {}
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        session, path, digest = upload_sessions.finish(cursor, upload_id, user_id, data.get('sha256'))
+        # The target may have changed hands since the upload started
+        error = check_upload_target(cursor, session['kind'], user_id, session['target_id'])
+        if error:
+            return error
+        # The partial file is kept until the attachment has committed, so a
+        # failed complete can be retried
+        filename = blob_store.adopt(cursor, path, digest, session['size'], 'pdf', keep=True)
+        body = attach_upload(cursor, session['kind'], user_id, session['target_id'], filename)
+        conn.commit()
+        upload_sessions.remove_file(upload_id)
+        if session['kind'] in UPLOAD_NAMESPACES:
+            cache.invalidate(UPLOAD_NAMESPACES[session['kind']])
+        return jsonify(body), 200
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+# Abandon a chunked upload
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def delete_upload(upload_id):
+    user_id = get_user_id_from_jwt()
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        upload_sessions.get(cursor, upload_id, user_id)
+        upload_sessions.discard(cursor, upload_id)
+        conn.commit()
+        return jsonify({'message': 'Upload cancelled'}), 200
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
 def update_alumni_dashboard():
     """
     Update AlumniDashboard.tsx to show ongoing and completed projects in Recent Activity
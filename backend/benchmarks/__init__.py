@@ -0,0 +1,4 @@
+"""Offline performance benchmarks for the AlumConnect API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_serialization``.
+"""
@@ -0,0 +1,117 @@
+"""Login throughput and read latency under a login storm.
+
+Starts gunicorn once per hashing mode and runs, for a fixed duration:
+
+- ``--logins`` clients posting to /api/auth/login in a loop
+- ``--readers`` clients reading /api/blog (cheap, cached)
+
+then reports logins/s, how many were shed with 503, and the read latency
+percentiles while the storm was running. ``inline`` hashes in the request
+thread (HASH_WORKERS=0); ``pool`` uses the bounded process pool.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login [--duration 15] [--logins 16] [--readers 4] [--modes inline,pool]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+import requests
+
+from benchmarks.dataset import build_seed_dataset
+from benchmarks.loadtest import free_port, start_server, percentile, load_workload_data, PASSWORD
+
+
+def storm(base_url, emails, logins, readers, duration):
+    stop_at = time.time() + duration
+    lock = threading.Lock()
+    results = {'ok': 0, 'shed': 0, 'failed': 0, 'login_latency': [], 'read_latency': []}
+
+    def login_client(index):
+        session = requests.Session()
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                status = session.post(f'{base_url}/api/auth/login', timeout=30,
+                                      json={'email': emails[index % len(emails)], 'password': PASSWORD}).status_code
+            except requests.RequestException:
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    results['ok'] += 1
+                    results['login_latency'].append(elapsed)
+                elif status == 503:
+                    results['shed'] += 1
+                else:
+                    results['failed'] += 1
+            if status == 503:
+                # a real client would honour Retry-After; back off briefly
+                time.sleep(0.05)
+
+    def read_client():
+        session = requests.Session()
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                session.get(f'{base_url}/api/blog?view=summary', timeout=30)
+            except requests.RequestException:
+                pass
+            with lock:
+                results['read_latency'].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=login_client, args=(i,)) for i in range(logins)]
+    threads += [threading.Thread(target=read_client) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login throughput under contention')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--logins', type=int, default=16, help='concurrent login clients')
+    parser.add_argument('--readers', type=int, default=4, help='concurrent read clients')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker (gunicorn.conf.py ships 4)')
+    parser.add_argument('--hash-workers', type=int, default=1, help='hashing processes per gunicorn worker')
+    parser.add_argument('--max-pending', type=int, default=4, help='queued hashes per gunicorn worker')
+    parser.add_argument('--modes', default='inline,pool')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='alumconnect-login-')
+    try:
+        print("🔄 Building dataset...")
+        build_seed_dataset(data_dir, scale=1)
+        data = load_workload_data(os.path.join(data_dir, 'launchpad.db'))
+        emails = data['students'] + data['alumni']
+        for mode in args.modes.split(','):
+            env = {'HASH_WORKERS': '0' if mode == 'inline' else str(args.hash_workers),
+                   'HASH_MAX_PENDING': str(args.max_pending)}
+            port = free_port()
+            server = start_server(data_dir, port, args.workers, args.threads, env)
+            try:
+                results = storm(f'http://127.0.0.1:{port}', emails, args.logins, args.readers, args.duration)
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+            logins = sorted(results['login_latency'])
+            reads = sorted(results['read_latency'])
+            print(f"\n{mode}: {results['ok'] / args.duration:.1f} logins/s "
+                  f"({results['ok']} ok, {results['shed']} shed with 503, {results['failed']} failed)")
+            if logins:
+                print(f"   login p50 {1000 * percentile(logins, 50):.0f}ms  p99 {1000 * percentile(logins, 99):.0f}ms")
+            if reads:
+                print(f"   reads {len(reads) / args.duration:.1f}/s  p50 {1000 * percentile(reads, 50):.1f}ms  "
+                      f"p99 {1000 * percentile(reads, 99):.1f}ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
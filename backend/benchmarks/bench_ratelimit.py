@@ -0,0 +1,92 @@
+"""Per-request overhead of the rate limiter.
+
+Measures, for the memory and SQLite bucket stores:
+
+- ``take``:  one ``RateLimiter.hit`` plus building the RateLimit headers, over
+  ``--clients`` distinct clients (so buckets are created, refilled and evicted)
+- ``hooks``: the app's before/after/teardown rate limit hooks around one
+  request to a limited endpoint keyed by IP (no JWT decode)
+
+and compares the mean against the 50µs budget.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ratelimit [--calls 50000] [--clients 1000]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+from ratelimit import RateLimiter, RateLimitPolicy, MemoryBucketStore, SQLiteBucketStore
+
+BUDGET_US = 50
+
+
+def bench_take(limiter, calls, clients):
+    start = time.perf_counter()
+    for i in range(calls):
+        limiter.hit('login', f'ip:10.0.{i % clients // 256}.{i % 256}').headers()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench_hooks(app_module, calls):
+    app = app_module.app
+    with app.test_request_context('/api/auth/login', method='POST', environ_base={'REMOTE_ADDR': '10.1.2.3'}):
+        # Each iteration needs a fresh response; time building one and subtract it
+        start = time.perf_counter()
+        for _ in range(calls):
+            app.response_class('{}', mimetype='application/json')
+        baseline = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            response = app.response_class('{}', mimetype='application/json')
+            app_module.enforce_rate_limits()
+            app_module.add_rate_limit_headers(response)
+            app_module.release_concurrency_slot(None)
+        return (time.perf_counter() - start - baseline) / calls * 1e6
+
+
+def report(name, micros):
+    verdict = 'ok' if micros < BUDGET_US else 'OVER BUDGET'
+    print(f"   {name:<16} {micros:7.2f}µs/request  ({verdict})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rate limiter overhead')
+    parser.add_argument('--calls', type=int, default=50000)
+    parser.add_argument('--clients', type=int, default=1000)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='alumconnect-ratelimit-')
+    cwd = os.getcwd()
+    try:
+        # Generous limit so the loop measures the allowed path, not 429s
+        policies = {'login': f'{args.calls}/second; key=ip'}
+        stores = {
+            'memory': MemoryBucketStore,
+            'sqlite': lambda: SQLiteBucketStore(os.path.join(work_dir, 'ratelimit.db')),
+        }
+        print(f"⏱️  {args.calls} calls, {args.clients} clients, budget {BUDGET_US}µs")
+        for name, make_store in stores.items():
+            print(f"\n{name}:")
+            report('take', bench_take(RateLimiter(policies, make_store()), args.calls, args.clients))
+
+            # The app reads its config at import, so import it once per store
+            os.environ.update(RATE_LIMIT_STORAGE=name, RATE_LIMIT_PATH=os.path.join(work_dir, f'app-{name}.db'),
+                              RATE_LIMIT_ENABLED='1', LOG_LEVEL='WARNING',
+                              METRICS_DIR=os.path.join(work_dir, 'metrics'))
+            os.chdir(work_dir)
+            sys.modules.pop('app', None)
+            import app as app_module
+            app_module.limiter.policies['login'] = RateLimitPolicy.parse(policies['login'])
+            report('hooks', bench_hooks(app_module, args.calls))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
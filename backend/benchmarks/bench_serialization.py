@@ -0,0 +1,101 @@
+"""Microbenchmarks for list endpoint serialization.
+
+Compares, per list endpoint, on the seed dataset scaled up (100x default):
+
+- ``stdlib dicts``: rows -> dicts with json.loads, then json.dumps (the old
+  handler + jsonify path)
+- ``fast dicts``:   rows -> dicts with serialization.loads, then dumps
+- ``row encoder``:  precompiled row encoders passing stored JSON columns
+  through as orjson fragments
+
+``vs fast`` is the row encoder against fast dicts, the baseline it has to beat;
+``vs stdlib`` against the old path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--scale 100] [--repeat 5]
+"""
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+
+from benchmarks.dataset import build_seed_dataset
+from fieldsets import PROJECT_FIELDS, BLOG_FIELDS, ALUMNI_FIELDS, USER_FIELDS, json_list, json_object
+from serialization import dumps, encode_array, orjson
+
+
+ENDPOINTS = [
+    ('/api/projects', PROJECT_FIELDS, 'FROM projects p {joins} ORDER BY p.created_at DESC'),
+    ('/api/blog', BLOG_FIELDS, 'FROM blog_posts b {joins} ORDER BY b.created_at DESC'),
+    ('/api/alumni', ALUMNI_FIELDS, "FROM users WHERE role = 'alumni' ORDER BY name"),
+    ('/api/messages/available-users', USER_FIELDS, 'FROM users ORDER BY name'),
+]
+
+
+def stdlib_mapper(fieldset, selected):
+    """The pre-serialization-layer behaviour: json.loads for every JSON column."""
+    def stdlib_decode(decode):
+        if decode is json_list:
+            return lambda v: json.loads(v) if v else []
+        if decode is json_object:
+            return lambda v: json.loads(v) if v else {}
+        return decode
+    plan = [(name, i, stdlib_decode(fieldset.fields[name].decode)) for i, name in enumerate(selected)]
+    return lambda row: {name: d(row[i]) if d else row[i] for name, i, d in plan}
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run(db_path, repeat):
+    conn = sqlite3.connect(db_path)
+    print(f"JSON backend: {'orjson' if orjson else 'stdlib json'}")
+    print(f"{'endpoint':32} {'rows':>7} {'query':>9} {'stdlib dicts':>13} {'fast dicts':>11} {'row encoder':>12} "
+          f"{'vs fast':>8} {'vs stdlib':>10}")
+    for path, fieldset, query in ENDPOINTS:
+        names = fieldset.resolve({})
+        selected, select, joins = fieldset.columns(names)
+        sql = f'SELECT {select} ' + query.format(joins=joins)
+        query_time, rows = best_of(repeat, lambda: conn.execute(sql).fetchall())
+
+        to_dict_stdlib = stdlib_mapper(fieldset, selected)
+        to_dict_fast = fieldset.row_mapper(selected)
+        encode = fieldset.row_encoder(selected)
+
+        stdlib_time, expected = best_of(repeat, lambda: json.dumps(
+            [to_dict_stdlib(r) for r in rows], sort_keys=True, separators=(',', ':')).encode())
+        fast_time, _ = best_of(repeat, lambda: dumps([to_dict_fast(r) for r in rows]))
+        encoder_time, encoded = best_of(repeat, lambda: encode_array([encode(r) for r in rows]))
+        assert json.loads(encoded) == json.loads(expected), f'{path}: encoder output differs'
+
+        print(f"{path:32} {len(rows):>7} {query_time * 1000:>7.1f}ms {stdlib_time * 1000:>11.1f}ms "
+              f"{fast_time * 1000:>9.1f}ms {encoder_time * 1000:>10.1f}ms {fast_time / encoder_time:>7.2f}x "
+              f"{stdlib_time / encoder_time:>9.1f}x")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=100, help='seed dataset multiplier')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    parser.add_argument('--db', help='use an existing database instead of building one')
+    args = parser.parse_args()
+
+    if args.db:
+        run(args.db, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Building seed dataset x{args.scale}...")
+        db_path = build_seed_dataset(directory, args.scale)
+        run(db_path, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
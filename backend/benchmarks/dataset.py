@@ -0,0 +1,61 @@
+"""Build benchmark databases from the seed data, scaled up by duplication."""
+import os
+import sqlite3
+import contextlib
+
+import seed_data
+from app import init_db
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def copy_rows(cursor, table, columns, overrides=None, times=1):
+    """Append ``times`` copies of every row in ``table``.
+
+    ``overrides`` maps a column to a SQL expression using ``{n}`` for the copy
+    number, e.g. ``{'email': "'c{n}.' || email"}`` to keep values unique.
+    """
+    overrides = overrides or {}
+    cursor.execute(f'SELECT MAX(id) FROM {table}')
+    original_max = cursor.fetchone()[0] or 0
+    column_list = ', '.join(columns)
+    for n in range(1, times + 1):
+        select_list = ', '.join(overrides.get(c, c).format(n=n) for c in columns)
+        cursor.execute(f'INSERT INTO {table} ({column_list}) SELECT {select_list} FROM {table} WHERE id <= ?',
+                       (original_max,))
+
+
+def table_columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall() if row[1] != 'id']
+
+
+def build_seed_dataset(directory, scale=100):
+    """Seed ``directory/launchpad.db`` and multiply users, projects and posts by ``scale``."""
+    os.makedirs(directory, exist_ok=True)
+    with working_directory(directory):
+        if os.path.exists('launchpad.db'):
+            os.remove('launchpad.db')
+        init_db()
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            seed_data.seed_database()
+
+        conn = sqlite3.connect('launchpad.db')
+        cursor = conn.cursor()
+        copies = scale - 1
+        if copies > 0:
+            copy_rows(cursor, 'users', table_columns(cursor, 'users'),
+                      {'email': "'c{n}.' || email"}, copies)
+            copy_rows(cursor, 'projects', table_columns(cursor, 'projects'), times=copies)
+            copy_rows(cursor, 'blog_posts', table_columns(cursor, 'blog_posts'), times=copies)
+        conn.commit()
+        conn.close()
+    return os.path.join(directory, 'launchpad.db')
@@ -0,0 +1,341 @@
+"""Mixed-workload load test against a locally started gunicorn.
+
+Builds a scaled copy of the seed dataset, starts gunicorn on it and runs
+virtual users for a fixed duration. Each virtual user logs in once (anonymous
+users don't) and then repeatedly plays its scenario:
+
+- ``student``:   browse projects, open one, recommendations, apply, messages
+- ``alumni``:    dashboard stats, own projects, application review, mentorship
+- ``anonymous``: blog list and posts, alumni directory, project list
+
+Latency percentiles and throughput are reported per route template, and the
+results are saved as JSON so runs can be compared between commits. Everything
+runs on localhost; no network access is needed.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest [--scale 20] [--duration 30] [--users 16] [--workers 4]
+    python -m benchmarks.loadtest --output results/after.json --compare results/before.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import sqlite3
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+
+import requests
+
+from benchmarks.dataset import build_seed_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'password123'
+DEFAULT_MIX = 'student=0.4,alumni=0.2,anonymous=0.4'
+
+
+class Recorder:
+    """Thread-safe latency samples keyed by route template."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.client_errors = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.samples[route].append(seconds)
+            if status is None or status >= 500:
+                self.errors[route] += 1
+            elif status >= 400:
+                self.client_errors[route] += 1
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class VirtualUser:
+
+    def __init__(self, base_url, recorder, data, rng, think_time):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.data = data
+        self.rng = rng
+        self.think_time = think_time
+        self.session = requests.Session()
+        self.user_id = None
+
+    def call(self, method, route, path=None, **kwargs):
+        start = time.perf_counter()
+        status = None
+        body = None
+        try:
+            response = self.session.request(method, self.base_url + (path or route), timeout=30, **kwargs)
+            status = response.status_code
+            body = response.content
+        except requests.RequestException:
+            pass
+        self.recorder.record(f'{method} {route}', time.perf_counter() - start, status)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        if status and status < 400 and body and body[:1] in (b'{', b'['):
+            return json.loads(body)
+        return None
+
+    def login(self, email):
+        result = self.call('POST', '/api/auth/login', json={'email': email, 'password': PASSWORD})
+        if result:
+            self.session.headers['Authorization'] = f"Bearer {result['token']}"
+            self.user_id = result['user']['id']
+
+    def student(self):
+        self.call('GET', '/api/projects', '/api/projects?view=summary')
+        project_id = self.rng.choice(self.data['projects'])
+        self.call('GET', '/api/projects/<id>', f'/api/projects/{project_id}')
+        self.call('GET', '/api/projects/recommended')
+        if self.rng.random() < 0.2:
+            self.call('POST', '/api/projects/<id>/apply', f'/api/projects/{project_id}/apply',
+                      json={'message': 'Interested in contributing.'})
+        self.call('GET', '/api/students/applied-projects')
+        conversations = self.call('GET', '/api/messages/conversations')
+        if self.rng.random() < 0.3:
+            other = self.call('POST', '/api/messages/conversations',
+                              json={'other_user_id': self.rng.choice(self.data['alumni_ids'])})
+            if other:
+                conversation_id = other['id']
+                self.call('GET', '/api/messages/conversations/<id>/messages',
+                          f'/api/messages/conversations/{conversation_id}/messages')
+                self.call('POST', '/api/messages/conversations/<id>/messages',
+                          f'/api/messages/conversations/{conversation_id}/messages',
+                          json={'content': 'Hi! Could we talk about the project?'})
+        elif conversations:
+            conversation_id = self.rng.choice(conversations)['id']
+            self.call('GET', '/api/messages/conversations/<id>/messages',
+                      f'/api/messages/conversations/{conversation_id}/messages')
+
+    def alumni(self):
+        self.call('GET', '/api/alumni/dashboard-stats')
+        projects = self.call('GET', '/api/alumni/projects')
+        self.call('GET', '/api/alumni/project-applications')
+        if projects:
+            project_id = self.rng.choice(projects)['id']
+            self.call('GET', '/api/projects/<id>/applications', f'/api/projects/{project_id}/applications')
+        self.call('GET', '/api/mentorship/requests')
+        self.call('GET', '/api/alumni/blog-posts')
+        self.call('GET', '/api/messages/conversations')
+
+    def anonymous(self):
+        self.call('GET', '/api/blog', '/api/blog?view=summary')
+        post_id = self.rng.choice(self.data['posts'])
+        self.call('GET', '/api/blog/<id>', f'/api/blog/{post_id}')
+        self.call('GET', '/api/alumni')
+        self.call('GET', '/api/projects', '/api/projects?view=summary')
+
+
+def load_workload_data(db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    data = {}
+    cursor.execute("SELECT email FROM users WHERE role = 'student'")
+    data['students'] = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT id, email FROM users WHERE role = 'alumni'")
+    rows = cursor.fetchall()
+    data['alumni_ids'] = [row[0] for row in rows]
+    data['alumni'] = [row[1] for row in rows]
+    cursor.execute('SELECT id FROM projects')
+    data['projects'] = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM blog_posts')
+    data['posts'] = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return data
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, port, workers, threads=1, extra_env=None):
+    # Rate limits are off so the harness measures the app rather than the 429s
+    env = dict(os.environ, LOG_LEVEL='WARNING', APP_ENV='production',
+               METRICS_DIR=os.path.join(data_dir, 'metrics'), PROFILE_DIR=os.path.join(data_dir, 'profiles'),
+               RATE_LIMIT_ENABLED='0')
+    env.update(extra_env or {})
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', str(threads), '-b', f'127.0.0.1:{port}',
+         '--chdir', data_dir, '--pythonpath', BACKEND_DIR, '--log-level', 'warning', 'app:app'],
+        env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/blog', timeout=1)
+            return server
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start within 30s')
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in ('student', 'alumni', 'anonymous'):
+            raise ValueError(f'Unknown scenario: {name}')
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def run_load(base_url, data, users, duration, mix, think_time, seed):
+    recorder = Recorder()
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+    stop_at = time.time() + duration
+    rng = random.Random(seed)
+
+    def run_user(index):
+        user_rng = random.Random(rng.random() + index)
+        kind = user_rng.choices(scenarios, weights)[0]
+        user = VirtualUser(base_url, recorder, data, user_rng, think_time)
+        if kind == 'student':
+            user.login(user_rng.choice(data['students']))
+        elif kind == 'alumni':
+            user.login(user_rng.choice(data['alumni']))
+        scenario = getattr(user, kind)
+        while time.time() < stop_at:
+            scenario()
+
+    threads = [threading.Thread(target=run_user, args=(i,), daemon=True) for i in range(users)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.time() - started
+
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for route, samples in sorted(recorder.samples.items()):
+        samples.sort()
+        routes[route] = {
+            'requests': len(samples),
+            'errors': recorder.errors[route],
+            'client_errors': recorder.client_errors[route],
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'mean_ms': round(1000 * sum(samples) / len(samples), 2),
+            'p50_ms': round(1000 * percentile(samples, 50), 2),
+            'p95_ms': round(1000 * percentile(samples, 95), 2),
+            'p99_ms': round(1000 * percentile(samples, 99), 2),
+        }
+    total = sum(r['requests'] for r in routes.values())
+    return routes, {'requests': total, 'errors': sum(r['errors'] for r in routes.values()),
+                    'throughput_rps': round(total / elapsed, 2), 'elapsed_s': round(elapsed, 2)}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(routes, totals):
+    print(f"\n{'route':<55} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, r in routes.items():
+        print(f"{route:<55} {r['requests']:>7} {r['errors']:>5} {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    print(f"\n{totals['requests']} requests in {totals['elapsed_s']}s "
+          f"({totals['throughput_rps']} req/s, {totals['errors']} errors); latencies in ms")
+
+
+def print_comparison(routes, previous):
+    print(f"\nCompared with {previous['meta'].get('commit')} ({previous['meta'].get('timestamp')}):")
+    print(f"{'route':<55} {'p95 before':>10} {'p95 after':>10} {'change':>8} {'rps change':>10}")
+    for route, r in routes.items():
+        old = previous['routes'].get(route)
+        if not old:
+            continue
+        p95_change = (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+        rps_change = (r['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100 if old['throughput_rps'] else 0.0
+        print(f"{route:<55} {old['p95_ms']:>10.1f} {r['p95_ms']:>10.1f} {p95_change:>+7.1f}% {rps_change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mixed-workload load test against a local gunicorn')
+    parser.add_argument('--scale', type=int, default=20, help='seed dataset multiplier')
+    parser.add_argument('--db', help='use a copy of this database instead of building one')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--users', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='threads per gunicorn worker')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='scenario weights, e.g. student=0.5,anonymous=0.5')
+    parser.add_argument('--think-time', type=float, default=0.0, help='mean pause between requests (s)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write JSON results here')
+    parser.add_argument('--compare', help='previous JSON results to compare against')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    data_dir = tempfile.mkdtemp(prefix='alumconnect-load-')
+    try:
+        if args.db:
+            shutil.copy(args.db, os.path.join(data_dir, 'launchpad.db'))
+        else:
+            print(f"🔄 Building dataset at scale {args.scale}...")
+            build_seed_dataset(data_dir, args.scale)
+        data = load_workload_data(os.path.join(data_dir, 'launchpad.db'))
+
+        port = free_port()
+        print(f"🚀 Starting gunicorn with {args.workers} workers on port {port}...")
+        server = start_server(data_dir, port, args.workers, args.threads)
+        try:
+            print(f"⏱️  Running {args.users} users for {args.duration}s ({args.mix})...")
+            recorder, elapsed = run_load(f'http://127.0.0.1:{port}', data, args.users, args.duration,
+                                         mix, args.think_time, args.seed)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    routes, totals = summarize(recorder, elapsed)
+    print_report(routes, totals)
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'args': vars(args),
+        },
+        'totals': totals,
+        'routes': routes,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(routes, json.load(f))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
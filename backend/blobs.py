@@ -0,0 +1,260 @@
+"""Content-addressed storage for uploaded files.
+
+Every upload is stored once, named by the SHA-256 of its contents, in two
+levels of sharded directories (so no directory grows past a few thousand
+entries)::
+
+    uploads/blobs/3f/a9/3fa9c1...e2          the file as uploaded
+    uploads/blobs/3f/a9/3fa9c1...e2.w400.webp  derivatives (see images.py)
+
+Uploading the same image or PDF again, by anyone, reuses the stored copy. The
+app refers to a blob by ``<sha256>.<ext>``, inside the same URLs as before,
+e.g.
+``/api/projects/7/images/3fa9...e2.jpg``.
+
+Each blob keeps the content type it was stored as; ``lookup`` only finds it
+under an extension of that type (``<sha256>.html`` for a JPEG is not found),
+so the requester never picks the Content-Type it is served with.
+
+The ``blobs`` table counts references: ``put`` adds one in the caller's
+transaction, ``release`` drops one when a handler replaces or removes a file.
+References can also disappear without a handler noticing (an image URL
+dropped from a JSON array), so ``collect_garbage`` recounts every reference
+held in the database (mark) and deletes blobs that have none and have not been
+referenced for ``grace`` seconds (sweep), along with their derivatives and any
+temporary file left by an interrupted upload. Files in the shard directories
+with no ``blobs`` row (moved into place by a transaction that then rolled
+back) are deleted once they are ``grace`` seconds old.
+"""
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+
+logger = logging.getLogger('alumconnect.blobs')
+
+CHUNK_SIZE = 1024 * 1024
+SHA256_RE = re.compile(r'[0-9a-f]{64}')
+# '<sha256>.<ext>' for a blob, '<sha256>.<s|w><width>.<format>' for a derivative
+NAME_RE = re.compile(r'^([0-9a-f]{64})\.(?:([sw]\d+\.(webp|avif))|([a-z0-9]+))$')
+# Extensions a blob can be stored (or a derivative rendered) as, and the
+# Content-Type each is served with
+MIME_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'pdf': 'application/pdf',
+}
+
+
+class BlobStore:
+
+    def __init__(self, root, grace=86400):
+        self.root = os.path.abspath(root)
+        self.grace = grace
+        self.tmp = os.path.join(root, 'tmp')
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def resolve(self, name):
+        """Path of the blob or derivative called ``name``, or None if ``name``
+        is not a blob name (i.e. a file stored before the blob store)."""
+        match = NAME_RE.match(name)
+        if not match:
+            return None
+        digest, derivative = match.group(1), match.group(2)
+        path = self.path(digest)
+        return f'{path}.{derivative}' if derivative else path
+
+    def lookup(self, cursor, name):
+        """``(path, content type)`` of the blob or derivative ``name``, or None
+        if there is no such blob or the extension in ``name`` is not of the
+        type the blob was stored as."""
+        match = NAME_RE.match(name)
+        if not match:
+            return None
+        digest, derivative, derivative_format, ext = match.groups()
+        cursor.execute('SELECT mime_type FROM blobs WHERE sha256 = ?', (digest,))
+        row = cursor.fetchone()
+        if row is None or row[0] is None:
+            return None
+        if derivative:
+            # Only images have derivatives
+            if not row[0].startswith('image/'):
+                return None
+            return f'{self.path(digest)}.{derivative}', MIME_TYPES[derivative_format]
+        if MIME_TYPES.get(ext) != row[0]:
+            return None
+        return self.path(digest), row[0]
+
+    def put(self, cursor, stream, ext):
+        """Store ``stream`` and take a reference to it. Returns the blob name.
+
+        The contents are hashed while being written to a temporary file,
+        which is then moved into place, or dropped if the blob already exists.
+        Raises ValueError for an extension not in ``MIME_TYPES``.
+        """
+        if ext not in MIME_TYPES:
+            raise ValueError(f'Unsupported file type: {ext}')
+        os.makedirs(self.tmp, exist_ok=True)
+        tmp_path = os.path.join(self.tmp, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            return self.adopt(cursor, tmp_path, digest.hexdigest(), size, ext)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def adopt(self, cursor, tmp_path, digest, size, ext, keep=False):
+        """Move an already hashed file into the store and reference it. With
+        ``keep`` the file at ``tmp_path`` is left where it is (the store gets
+        a hard link, or a copy), so a caller whose transaction fails can try
+        again from it.
+
+        The row is written first: the caller's transaction then holds the
+        write lock until it commits, so the garbage collector cannot delete
+        the file between the existence check and the commit. Raises
+        ValueError if the same contents are already stored as another type.
+        """
+        mime_type = MIME_TYPES.get(ext)
+        if mime_type is None:
+            raise ValueError(f'Unsupported file type: {ext}')
+        now = time.time()
+        cursor.execute('''
+            INSERT INTO blobs (sha256, size, mime_type, refcount, created_at, referenced_at) VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT(sha256) DO UPDATE SET refcount = refcount + 1, referenced_at = excluded.referenced_at
+            WHERE mime_type = excluded.mime_type
+        ''', (digest, size, mime_type, now, now))
+        if cursor.rowcount == 0:
+            raise ValueError('This file is already stored as another type')
+        path = self.path(digest)
+        if os.path.exists(path):
+            if not keep:
+                os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if keep:
+                # Staged under tmp/ so the store never shows a partial copy
+                os.makedirs(self.tmp, exist_ok=True)
+                staged = os.path.join(self.tmp, uuid.uuid4().hex)
+                try:
+                    os.link(tmp_path, staged)
+                except OSError:
+                    shutil.copyfile(tmp_path, staged)
+                os.replace(staged, path)
+            else:
+                os.replace(tmp_path, path)
+        return f'{digest}.{ext}'
+
+    def release(self, cursor, name):
+        """Drop a reference to the blob ``name`` (or a URL ending in it); files
+        stored before the blob store are ignored."""
+        match = NAME_RE.match((name or '').rsplit('/', 1)[-1])
+        if match:
+            cursor.execute('UPDATE blobs SET refcount = MAX(refcount - 1, 0) WHERE sha256 = ?', (match.group(1),))
+
+    def collect_garbage(self, conn, references):
+        """Mark and sweep. ``references`` is ``[(table, [columns])]`` of every
+        column that can hold blob names (plain, in URLs or in JSON).
+
+        Returns ``(digests of the deleted blobs, bytes freed)``.
+        """
+        # Mark and sweep in one write transaction: no upload can commit a new
+        # reference between the count and the deletion of the files
+        conn.execute('BEGIN IMMEDIATE')
+        freed = 0
+        try:
+            counts = {}
+            for table, columns in references:
+                for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table}"):
+                    for value in row:
+                        if value:
+                            for digest in SHA256_RE.findall(value):
+                                counts[digest] = counts.get(digest, 0) + 1
+            now = time.time()
+            conn.execute('UPDATE blobs SET refcount = 0')
+            conn.executemany('UPDATE blobs SET refcount = ?, referenced_at = ? WHERE sha256 = ?',
+                             [(count, now, digest) for digest, count in counts.items()])
+            doomed = conn.execute('SELECT sha256, size FROM blobs WHERE refcount = 0 AND referenced_at < ?',
+                                  (now - self.grace,)).fetchall()
+            conn.executemany('DELETE FROM blobs WHERE sha256 = ?', [(digest,) for digest, _ in doomed])
+            for digest, size in doomed:
+                directory = os.path.dirname(self.path(digest))
+                for name in os.listdir(directory) if os.path.isdir(directory) else []:
+                    if name.startswith(digest):
+                        os.remove(os.path.join(directory, name))
+                freed += size
+            # Holding the write lock, so every row a file was stored for has
+            # been committed (or rolled back, leaving the file unowned)
+            known = {row[0] for row in conn.execute('SELECT sha256 FROM blobs')}
+            unowned, unowned_bytes = self._sweep_unowned(known, now - self.grace)
+            freed += unowned_bytes
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        cutoff = time.time() - self.grace
+        if os.path.isdir(self.tmp):
+            for name in os.listdir(self.tmp):
+                tmp_path = os.path.join(self.tmp, name)
+                if os.path.getmtime(tmp_path) < cutoff:
+                    os.remove(tmp_path)
+        if doomed or unowned:
+            logger.info('blobs collected', extra={'blobs': len(doomed), 'unowned': len(unowned), 'bytes': freed})
+        return [digest for digest, _ in doomed] + unowned, freed
+
+    def _sweep_unowned(self, known, cutoff):
+        """Delete files older than ``cutoff`` whose digest is not in
+        ``known``. Returns ``(their digests, bytes freed)``."""
+        digests, freed = set(), 0
+        for first in os.scandir(self.root) if os.path.isdir(self.root) else []:
+            if not first.is_dir() or len(first.name) != 2:
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    digest = entry.name[:64]
+                    if digest in known or not SHA256_RE.fullmatch(digest) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    if stat.st_mtime < cutoff:
+                        os.remove(entry.path)
+                        digests.add(digest)
+                        freed += stat.st_size
+        return sorted(digests), freed
+
+
+def create_blob_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mime_type TEXT,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            referenced_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    try:
+        cursor.execute('ALTER TABLE blobs ADD COLUMN mime_type TEXT')
+    except:
+        pass
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs (referenced_at) WHERE refcount = 0')
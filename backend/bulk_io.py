@@ -0,0 +1,406 @@
+"""Bulk import/export of users, projects and applications.
+
+Formats:
+- ``ndjson``:   one JSON object per line
+- ``csv``:      header row; list/object columns hold JSON text
+- ``columnar``: a msgpack stream of a header followed by row groups, each
+  storing one array per column (a small Parquet-like layout that msgpack,
+  already a dependency, can stream)
+
+Exports stream rows from SQLite in batches, so memory stays bounded whatever
+the table size. Imports read the input in chunks. Each chunk is written in
+its own transaction with upsert semantics:
+- users are matched on email;
+- projects are matched on id when one is given;
+- applications are matched on (student, project).
+Plain-text passwords are hashed on a process pool, with the app's HASH_METHOD
+(``--hash-method``). If a chunk fails, it is rolled back and the import
+stops, and re-running the import is safe.
+
+Usage (from backend/):
+    python bulk_io.py export users --format csv --output users.csv
+    python bulk_io.py export applications --output applications.ndjson
+    python bulk_io.py import users new_alumni.csv [--workers 4] [--chunk-size 1000]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import sqlite3
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import msgpack
+
+from cache import create_cache
+from facets import parse_duration_weeks
+from geo import gazetteer
+from hashing import hash_password
+
+COLUMNAR_MAGIC = 'launchpad-columnar'
+FORMATS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv', '.cols': 'columnar'}
+
+USER_COLUMNS = ['name', 'email', 'role', 'graduation_year', 'department', 'hall', 'branch', 'bio',
+                'current_company', 'current_position', 'location', 'work_preference', 'phone', 'website',
+                'linkedin', 'github', 'avatar', 'years_of_experience', 'domain', 'tech_skills', 'program',
+                'joining_year', 'institute', 'specialization', 'past_projects', 'is_available', 'created_at']
+PROJECT_COLUMNS = ['title', 'description', 'category', 'status', 'team_members', 'tags', 'stipend', 'duration',
+                   'skills_required', 'location', 'work_type', 'created_by', 'is_recruiting', 'images',
+                   'project_links', 'jd_pdf', 'contact_details', 'team_roles', 'partners', 'funding',
+                   'highlights', 'created_at']
+APPLICATION_COLUMNS = ['student_id', 'project_id', 'position_id', 'message', 'status', 'has_team', 'feedback',
+                       'is_completed', 'completed_at', 'created_at']
+
+JSON_COLUMNS = {'tech_skills', 'past_projects', 'team_members', 'tags', 'skills_required', 'images',
+                'project_links', 'contact_details', 'team_roles', 'partners', 'highlights'}
+
+EXPORT_QUERIES = {
+    'users': f"SELECT id, {', '.join(USER_COLUMNS)} FROM users ORDER BY id",
+    'projects': f"SELECT id, {', '.join(PROJECT_COLUMNS)} FROM projects ORDER BY id",
+    'applications': '''
+        SELECT pa.id, pa.student_id, s.email AS student_email, s.name AS student_name,
+               pa.project_id, p.title AS project_title, pa.position_id, pp.title AS position_title,
+               pa.status, pa.message, pa.has_team, pa.is_completed, pa.feedback, pa.completed_at, pa.created_at
+        FROM project_applications pa
+        LEFT JOIN users s ON pa.student_id = s.id
+        LEFT JOIN projects p ON pa.project_id = p.id
+        LEFT JOIN project_positions pp ON pa.position_id = pp.id
+        ORDER BY pa.id
+    ''',
+}
+
+
+class BulkImportError(Exception):
+    pass
+
+
+def detect_format(path, explicit=None):
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f'Cannot tell the format of {path}; pass --format')
+    return FORMATS[extension]
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def iter_batches(conn, query, batch_size):
+    """Yield ``(columns, rows)`` batches for ``query`` without loading it all."""
+    cursor = conn.execute(query)
+    columns = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield columns, rows
+
+
+def decode_row(columns, row):
+    record = {}
+    for column, value in zip(columns, row):
+        if column in JSON_COLUMNS and value:
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        record[column] = value
+    return record
+
+
+def write_ndjson(f, batches):
+    count = 0
+    for columns, rows in batches:
+        f.write(''.join(json.dumps(decode_row(columns, row), ensure_ascii=False) + '\n' for row in rows))
+        count += len(rows)
+        yield count
+
+
+def write_csv(f, batches):
+    writer = csv.writer(f)
+    count = 0
+    for columns, rows in batches:
+        if count == 0:
+            writer.writerow(columns)
+        writer.writerows(rows)
+        count += len(rows)
+        yield count
+
+
+def write_columnar(f, batches, table):
+    packer = msgpack.Packer()
+    count = 0
+    for columns, rows in batches:
+        if count == 0:
+            f.write(packer.pack({'format': COLUMNAR_MAGIC, 'version': 1, 'table': table, 'columns': columns}))
+        decoded = [decode_row(columns, row) for row in rows]
+        f.write(packer.pack({'rows': len(rows), 'columns': {c: [r[c] for r in decoded] for c in columns}}))
+        count += len(rows)
+        yield count
+
+
+def export_table(conn, table, path, fmt, batch_size):
+    batches = iter_batches(conn, EXPORT_QUERIES[table], batch_size)
+    mode = 'wb' if fmt == 'columnar' else 'w'
+    with open(path, mode, **({} if fmt == 'columnar' else {'newline': '', 'encoding': 'utf-8'})) as f:
+        if fmt == 'ndjson':
+            progress = write_ndjson(f, batches)
+        elif fmt == 'csv':
+            progress = write_csv(f, batches)
+        else:
+            progress = write_columnar(f, batches, table)
+        return report_progress(progress, f'export {table}')
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def read_ndjson(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for record in csv.DictReader(f):
+            yield {key: (value if value != '' else None) for key, value in record.items()}
+
+
+def read_columnar(path):
+    with open(path, 'rb') as f:
+        unpacker = msgpack.Unpacker(f, raw=False)
+        header = next(unpacker, None)
+        if not isinstance(header, dict) or header.get('format') != COLUMNAR_MAGIC:
+            raise ValueError(f'{path} is not a columnar export')
+        columns = header['columns']
+        for group in unpacker:
+            arrays = [group['columns'][c] for c in columns]
+            for i in range(group['rows']):
+                yield {c: arrays[j][i] for j, c in enumerate(columns)}
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv, 'columnar': read_columnar}
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_value(column, value):
+    if column in JSON_COLUMNS and isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def hash_passwords(chunk, pool, method=None):
+    """Replace plain-text ``password`` fields with hashes, using ``pool``.
+
+    ``method`` is the app's HASH_METHOD (None: werkzeug's default), so
+    imported users are not rehashed on their first login. Runs before the
+    chunk's transaction opens, so slow hashing never holds the database
+    write lock.
+    """
+    pending = [record for record in chunk if record.get('password')]
+    if not pending:
+        return
+    passwords = [record.pop('password') for record in pending]
+    hashes = pool.map(functools.partial(hash_password, method=method), passwords,
+                      chunksize=max(1, len(passwords) // 32))
+    for record, password_hash in zip(pending, hashes):
+        record['password_hash'] = password_hash
+
+
+def with_coordinates(record, columns, values):
+    """Add latitude/longitude for a record's location, as the app does on write."""
+    if 'location' in columns:
+        columns += ['latitude', 'longitude']
+        values += list(gazetteer.geocode(record['location']) or (None, None))
+
+
+def with_duration_weeks(record, columns, values):
+    """Add the parsed ``duration_weeks`` behind the duration filter and facets."""
+    if 'duration' in columns:
+        columns.append('duration_weeks')
+        values.append(parse_duration_weeks(record['duration']))
+
+
+def upsert_users(cursor, chunk):
+    for record in chunk:
+        if not record.get('email') or not record.get('name') or not record.get('role'):
+            raise BulkImportError(f"user rows need name, email and role: {record.get('email')!r}")
+        columns = [c for c in USER_COLUMNS if c in record]
+        values = [encode_value(c, record[c]) for c in columns]
+        with_coordinates(record, columns, values)
+        password_hash = record.get('password_hash')
+        if password_hash:
+            columns.append('password_hash')
+            values.append(password_hash)
+        else:
+            # Existing users keep their password; new ones must come with one
+            updates = ', '.join(f'{c} = ?' for c in columns if c != 'email')
+            cursor.execute(f'UPDATE users SET {updates} WHERE email = ?',
+                           [v for c, v in zip(columns, values) if c != 'email'] + [record['email']])
+            if not cursor.rowcount:
+                raise BulkImportError(f"new user {record['email']!r} needs a password or password_hash")
+            continue
+        updates = ', '.join(f'{c} = excluded.{c}' for c in columns if c != 'email')
+        cursor.execute(f'''
+            INSERT INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT(email) DO UPDATE SET {updates}
+        ''', values)
+
+
+def upsert_projects(cursor, chunk):
+    for record in chunk:
+        if not record.get('id') and not all(record.get(c) for c in ('title', 'description', 'category', 'status')):
+            raise BulkImportError(f"new projects need title, description, category and status: {record.get('title')!r}")
+        columns = [c for c in PROJECT_COLUMNS if c in record]
+        values = [encode_value(c, record[c]) for c in columns]
+        with_coordinates(record, columns, values)
+        with_duration_weeks(record, columns, values)
+        if record.get('id'):
+            updates = ', '.join(f'{c} = excluded.{c}' for c in columns)
+            cursor.execute(f'''
+                INSERT INTO projects (id, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})
+                ON CONFLICT(id) DO UPDATE SET {updates}
+            ''', [int(record['id'])] + values)
+        else:
+            cursor.execute(f"INSERT INTO projects ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                           values)
+
+
+def upsert_applications(cursor, chunk):
+    for record in chunk:
+        student_id = record.get('student_id')
+        if not student_id and record.get('student_email'):
+            cursor.execute('SELECT id FROM users WHERE email = ?', (record['student_email'],))
+            row = cursor.fetchone()
+            student_id = row[0] if row else None
+        if not student_id or not record.get('project_id'):
+            raise BulkImportError(f'applications need a known student and a project_id: {record!r}')
+        record = dict(record, student_id=int(student_id), project_id=int(record['project_id']))
+        columns = [c for c in APPLICATION_COLUMNS if c in record and c not in ('student_id', 'project_id')]
+        values = [record[c] for c in columns]
+        if columns:
+            cursor.execute(f'''
+                UPDATE project_applications SET {', '.join(f'{c} = ?' for c in columns)}
+                WHERE student_id = ? AND project_id = ?
+            ''', values + [record['student_id'], record['project_id']])
+            if cursor.rowcount:
+                continue
+        cursor.execute('SELECT 1 FROM project_applications WHERE student_id = ? AND project_id = ?',
+                       (record['student_id'], record['project_id']))
+        if cursor.fetchone():
+            continue
+        insert_columns = ['student_id', 'project_id'] + columns
+        cursor.execute(f"INSERT INTO project_applications ({', '.join(insert_columns)}) "
+                       f"VALUES ({', '.join('?' * len(insert_columns))})",
+                       [record['student_id'], record['project_id']] + values)
+
+
+UPSERTS = {'users': upsert_users, 'projects': upsert_projects, 'applications': upsert_applications}
+CACHE_NAMESPACES = {'users': ('users', 'projects', 'blog', 'typeahead'), 'projects': ('projects', 'typeahead'),
+                    'applications': ('projects',)}
+# The database the app serves (from the working directory, like this script)
+APP_DB = 'launchpad.db'
+
+
+def import_records(conn, table, records, chunk_size, workers, hash_method=None):
+    upsert = UPSERTS[table]
+
+    def run(pool):
+        count = 0
+        for number, chunk in enumerate(chunked(records, chunk_size), 1):
+            if pool is not None:
+                hash_passwords(chunk, pool, hash_method)
+            cursor = conn.cursor()
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                upsert(cursor, chunk)
+                conn.commit()
+            except (sqlite3.Error, BulkImportError, ValueError) as e:
+                conn.rollback()
+                raise BulkImportError(f'chunk {number} (rows {count + 1}-{count + len(chunk)}) rolled back: {e}')
+            count += len(chunk)
+            yield count
+
+    if table != 'users':
+        return report_progress(run(None), f'import {table}')
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return report_progress(run(pool), f'import {table}')
+
+
+def report_progress(progress, label):
+    started = time.perf_counter()
+    count = 0
+    last_report = started
+    for count in progress:
+        now = time.perf_counter()
+        if now - last_report >= 1.0:
+            print(f"   ... {label}: {count:,} rows ({count / (now - started):,.0f} rows/s)", file=sys.stderr, flush=True)
+            last_report = now
+    elapsed = time.perf_counter() - started
+    print(f"✅ {label}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import/export for launchpad.db')
+    parser.add_argument('--db', default=APP_DB, help='database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export = subparsers.add_parser('export', help='stream a table to a file')
+    export.add_argument('table', choices=sorted(EXPORT_QUERIES))
+    export.add_argument('--output', required=True)
+    export.add_argument('--format', choices=['ndjson', 'csv', 'columnar'])
+    export.add_argument('--batch-size', type=int, default=5000)
+
+    imp = subparsers.add_parser('import', help='upsert records from a file')
+    imp.add_argument('table', choices=sorted(UPSERTS))
+    imp.add_argument('input')
+    imp.add_argument('--format', choices=['ndjson', 'csv', 'columnar'])
+    imp.add_argument('--chunk-size', type=int, default=1000, help='rows per transaction')
+    imp.add_argument('--workers', type=int, default=os.cpu_count(), help='password hashing processes')
+    imp.add_argument('--hash-method', default=os.environ.get('HASH_METHOD') or None,
+                     help="password hash method, as the app's HASH_METHOD (default: $HASH_METHOD, else werkzeug's)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=30, isolation_level=None if args.command == 'import' else '')
+    try:
+        if args.command == 'export':
+            export_table(conn, args.table, args.output, detect_format(args.output, args.format), args.batch_size)
+            return 0
+        records = READERS[detect_format(args.input, args.format)](args.input)
+        try:
+            import_records(conn, args.table, records, args.chunk_size, args.workers, args.hash_method)
+        except BulkImportError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    finally:
+        conn.close()
+
+    # Let running app workers drop cached responses for the imported data. The
+    # app serves launchpad.db from the working directory; another database
+    # has no cache to invalidate.
+    if os.path.exists(APP_DB) and os.path.samefile(args.db, APP_DB):
+        config = {key: os.environ[key] for key in ('CACHE_BACKEND', 'CACHE_URL', 'CACHE_BUS_PATH') if os.environ.get(key)}
+        create_cache(config).invalidate(*CACHE_NAMESPACES[args.table])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
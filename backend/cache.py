@@ -0,0 +1,695 @@
+"""Pluggable cache backends shared by the API workers.
+
+gunicorn runs several worker processes, so a plain per-process dict would be
+duplicated in every worker and writes in one worker would never evict stale
+entries in the others. Three interchangeable backends are provided:
+
+- ``LRUCache``: in-process, bounded LRU. Fastest, but private to one worker.
+- ``SQLiteCache``: a WAL-mode SQLite file shared by every worker on one box.
+- ``RedisCache``: speaks the Redis protocol (RESP) over a plain socket, so it
+  works against a real Redis or the bundled ``MiniRedisServer`` stand-in.
+
+Invalidations go through an ``InvalidationBus`` so a write handled by one
+worker evicts the namespace in every worker's private cache as well.
+
+The cache is never the source of truth, so a backend or bus error (an
+unreachable Redis, a locked or unreadable cache.db) is logged and treated as a
+miss (writes and invalidations are dropped) rather than failing the request;
+entries it could not evict expire with their TTL.
+
+Run a local Redis stand-in for testing with:
+    python cache.py redis-standin --port 6380
+"""
+import os
+import sys
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+import socketserver
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+logger = logging.getLogger('alumconnect.cache')
+
+
+class CacheBackend:
+    """Interface implemented by every backend. Keys are ``namespace:suffix``."""
+
+    # Shared backends are visible to every worker, so remote invalidations
+    # need no local eviction.
+    shared = False
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def invalidate(self, namespace):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+def _namespace_of(key):
+    return key.split(':', 1)[0]
+
+
+class LRUCache(CacheBackend):
+    """Bounded in-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries=1024, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            self._namespaces.setdefault(_namespace_of(key), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate(self, namespace):
+        with self._lock:
+            for key in self._namespaces.pop(namespace, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def _remove(self, key):
+        if self._entries.pop(key, None) is not None:
+            keys = self._namespaces.get(_namespace_of(key))
+            if keys is not None:
+                keys.discard(key)
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a SQLite file so all workers on one box share it."""
+
+    shared = True
+
+    def __init__(self, path='cache.db', default_ttl=60):
+        self.path = path
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_entries_namespace ON cache_entries (namespace)')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            self.delete(key)
+            return None
+        return bytes(row[0])
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, namespace, value, expires_at) VALUES (?, ?, ?, ?)',
+            (key, _namespace_of(key), sqlite3.Binary(value), time.time() + ttl)
+        )
+        # Purge expired rows every so often instead of on every write
+        self._writes += 1
+        if self._writes % 256 == 0:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (time.time(),))
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def invalidate(self, namespace):
+        self._conn().execute('DELETE FROM cache_entries WHERE namespace = ?', (namespace,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache_entries')
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisConnection:
+    """Minimal RESP client: enough for GET/SET/DEL/SADD/SMEMBERS/PUBLISH/SUBSCRIBE."""
+
+    def __init__(self, host='localhost', port=6379, db=0, timeout=2.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if db:
+            self.command('SELECT', db)
+
+    @staticmethod
+    def encode(*args):
+        out = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif isinstance(arg, (int, float)):
+                arg = str(arg).encode()
+            out.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(out)
+
+    def send(self, *commands):
+        self.sock.sendall(b''.join(self.encode(*cmd) for cmd in commands))
+
+    def read_reply(self):
+        return read_resp(self.reader)
+
+    def command(self, *args):
+        self.send(args)
+        return self.read_reply()
+
+    def pipeline(self, *commands):
+        self.send(*commands)
+        return [self.read_reply() for _ in commands]
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def read_resp(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError('Connection closed')
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b'+':
+        return payload.decode()
+    if prefix == b'-':
+        raise RedisError(payload.decode())
+    if prefix == b':':
+        return int(payload)
+    if prefix == b'$':
+        length = int(payload)
+        if length == -1:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if prefix == b'*':
+        length = int(payload)
+        if length == -1:
+            return None
+        return [read_resp(reader) for _ in range(length)]
+    raise RedisError(f'Unknown reply prefix: {prefix!r}')
+
+
+def parse_redis_url(url):
+    parsed = urlparse(url or 'redis://localhost:6379/0')
+    db = int(parsed.path.lstrip('/') or 0)
+    return parsed.hostname or 'localhost', parsed.port or 6379, db
+
+
+class RedisCache(CacheBackend):
+    """Cache stored in Redis (or anything speaking RESP)."""
+
+    shared = True
+
+    def __init__(self, url=None, default_ttl=60, prefix='alumconnect:'):
+        self.host, self.port, self.db = parse_redis_url(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self._local = threading.local()
+        # Longest TTL set so far; namespace indexes live at least this long
+        self._max_ttl = default_ttl
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = RedisConnection(self.host, self.port, self.db)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, fn):
+        """Run ``fn`` on this thread's connection; None if Redis fails."""
+        try:
+            try:
+                return fn(self._conn())
+            except (OSError, ConnectionError):
+                # Reconnect once; a dead socket is usually a restarted server
+                self._drop_conn()
+                return fn(self._conn())
+        except (OSError, ConnectionError, RedisError) as e:
+            # A half-read reply leaves the connection unusable
+            self._drop_conn()
+            logger.warning('redis cache unavailable', extra={'error': str(e)})
+            return None
+
+    def _drop_conn(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def _index_key(self, namespace):
+        return f'{self.prefix}ns:{namespace}'
+
+    def get(self, key):
+        return self._call(lambda c: c.command('GET', self.prefix + key))
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._max_ttl = max(self._max_ttl, ttl)
+        index = self._index_key(_namespace_of(key))
+        # The index outlives every entry it lists, then goes with them, so
+        # a namespace that is rarely invalidated does not collect dead names
+        self._call(lambda c: c.pipeline(
+            ('SET', self.prefix + key, value, 'PX', int(ttl * 1000)),
+            ('SADD', index, self.prefix + key),
+            ('PEXPIRE', index, int(self._max_ttl * 1000)),
+        ))
+
+    def delete(self, key):
+        self._call(lambda c: c.command('DEL', self.prefix + key))
+
+    def invalidate(self, namespace):
+        index = self._index_key(namespace)
+
+        def run(conn):
+            keys = conn.command('SMEMBERS', index) or []
+            conn.command('DEL', index, *keys)
+        self._call(run)
+
+    def clear(self):
+        self._call(lambda c: c.command('FLUSHDB'))
+
+
+class InvalidationBus:
+    """Broadcasts namespace invalidations to the other workers."""
+
+    def __init__(self):
+        self.origin = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._listeners = []
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def publish(self, namespace):
+        raise NotImplementedError
+
+    def poll(self):
+        """Deliver pending messages. Push-based buses do nothing here."""
+
+    def _dispatch(self, namespace):
+        # A failing callback must not take the others, or a listener thread,
+        # down with it
+        for callback in self._listeners:
+            try:
+                callback(namespace)
+            except Exception as e:
+                logger.error('invalidation callback failed', extra={'namespace': namespace, 'error': str(e)})
+
+
+class SQLiteInvalidationBus(InvalidationBus):
+    """Invalidation log in a SQLite file, polled lazily by each worker."""
+
+    def __init__(self, path='cache.db', poll_interval=0.5, retention=300):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_poll = 0.0
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        self._last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM cache_invalidations').fetchone()[0]
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def publish(self, namespace):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            'INSERT INTO cache_invalidations (namespace, origin, created_at) VALUES (?, ?, ?)',
+            (namespace, self.origin, now)
+        )
+        conn.execute('DELETE FROM cache_invalidations WHERE created_at < ?', (now - self.retention,))
+
+    def poll(self):
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return
+        with self._lock:
+            if now - self._last_poll < self.poll_interval:
+                return
+            self._last_poll = now
+            rows = self._conn().execute(
+                'SELECT id, namespace, origin FROM cache_invalidations WHERE id > ? ORDER BY id',
+                (self._last_id,)
+            ).fetchall()
+            for row_id, namespace, origin in rows:
+                self._last_id = row_id
+                if origin != self.origin:
+                    self._dispatch(namespace)
+
+
+class RedisInvalidationBus(InvalidationBus):
+    """Invalidations over Redis pub/sub, received on a background thread."""
+
+    def __init__(self, url=None, channel='alumconnect:invalidate'):
+        super().__init__()
+        self.host, self.port, self.db = parse_redis_url(url)
+        self.channel = channel
+        self._publisher = threading.local()
+        self._thread = None
+
+    def subscribe(self, callback):
+        super().subscribe(callback)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+            self._thread.start()
+
+    def publish(self, namespace):
+        conn = getattr(self._publisher, 'conn', None)
+        message = f'{self.origin}|{namespace}'
+        try:
+            if conn is None:
+                conn = self._publisher.conn = RedisConnection(self.host, self.port, self.db)
+            conn.command('PUBLISH', self.channel, message)
+        except (OSError, ConnectionError):
+            self._publisher.conn = RedisConnection(self.host, self.port, self.db)
+            self._publisher.conn.command('PUBLISH', self.channel, message)
+
+    def _listen(self):
+        while True:
+            try:
+                conn = RedisConnection(self.host, self.port, self.db, timeout=None)
+                conn.command('SUBSCRIBE', self.channel)
+                while True:
+                    reply = conn.read_reply()
+                    if not reply or reply[0] != b'message':
+                        continue
+                    origin, _, namespace = reply[2].decode().partition('|')
+                    if origin != self.origin:
+                        self._dispatch(namespace)
+            except (OSError, ConnectionError, RedisError):
+                time.sleep(1)
+
+
+class Cache:
+    """Namespaced facade used by the app: ``cache.get('projects', key)``."""
+
+    def __init__(self, backend, bus=None):
+        self.backend = backend
+        self.bus = bus
+        self._listeners = []
+        if bus is not None:
+            bus.subscribe(self._on_remote_invalidation)
+
+    def get(self, namespace, key):
+        # Without the other workers' invalidations a hit could be stale
+        if not self.poll():
+            return None
+        try:
+            return self.backend.get(f'{namespace}:{key}')
+        except Exception as e:
+            logger.warning('cache read failed', extra={'namespace': namespace, 'error': str(e)})
+            return None
+
+    def poll(self):
+        """Apply invalidations published by other workers (rate-limited by the
+        bus). Returns False if the bus could not be read."""
+        if self.bus is None:
+            return True
+        try:
+            self.bus.poll()
+        except Exception as e:
+            logger.warning('cache invalidation poll failed', extra={'error': str(e)})
+            return False
+        return True
+
+    def set(self, namespace, key, value, ttl=None):
+        try:
+            self.backend.set(f'{namespace}:{key}', value, ttl)
+        except Exception as e:
+            logger.warning('cache write failed', extra={'namespace': namespace, 'error': str(e)})
+
+    def delete(self, namespace, key):
+        try:
+            self.backend.delete(f'{namespace}:{key}')
+        except Exception as e:
+            logger.warning('cache write failed', extra={'namespace': namespace, 'error': str(e)})
+
+    def invalidate(self, *namespaces):
+        """Evict ``namespaces`` everywhere. Called after the write has been
+        committed, so a cache or bus failure is logged, never raised."""
+        for namespace in namespaces:
+            try:
+                self.backend.invalidate(namespace)
+                if self.bus is not None:
+                    self.bus.publish(namespace)
+            except Exception as e:
+                logger.error('cache invalidation failed', extra={'namespace': namespace, 'error': str(e)})
+            self._notify(namespace)
+
+    def on_invalidate(self, callback):
+        """Register a callback run for local and remote invalidations."""
+        self._listeners.append(callback)
+
+    def _on_remote_invalidation(self, namespace):
+        if not self.backend.shared:
+            self.backend.invalidate(namespace)
+        self._notify(namespace)
+
+    def _notify(self, namespace):
+        for callback in self._listeners:
+            try:
+                callback(namespace)
+            except Exception as e:
+                logger.error('invalidation listener failed', extra={'namespace': namespace, 'error': str(e)})
+
+
+def create_cache(config):
+    """Build the cache described by CACHE_BACKEND / CACHE_URL in ``config``."""
+    kind = config.get('CACHE_BACKEND', 'lru')
+    url = config.get('CACHE_URL')
+    ttl = config.get('CACHE_DEFAULT_TTL', 60)
+
+    if kind == 'redis':
+        return Cache(RedisCache(url, ttl), RedisInvalidationBus(url))
+    if kind == 'sqlite':
+        path = url or 'cache.db'
+        return Cache(SQLiteCache(path, ttl), SQLiteInvalidationBus(path))
+    if kind == 'lru':
+        bus = None
+        if config.get('CACHE_BROADCAST', True):
+            bus = SQLiteInvalidationBus(config.get('CACHE_BUS_PATH', 'cache.db'))
+        return Cache(LRUCache(config.get('CACHE_MAX_ENTRIES', 1024), ttl), bus)
+    raise ValueError(f'Unknown cache backend: {kind}')
+
+
+# ---------------------------------------------------------------------------
+# Local Redis stand-in
+# ---------------------------------------------------------------------------
+
+class MiniRedisServer(socketserver.ThreadingTCPServer):
+    """Tiny in-memory RESP server covering the commands used above.
+
+    Not a Redis replacement; it exists so the Redis backend and pub/sub
+    invalidation can be exercised on a machine without Redis installed.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 6380)):
+        super().__init__(address, _MiniRedisHandler)
+        self.data = {}
+        self.expires = {}
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at < time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+
+class _MiniRedisHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                args = read_resp(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                break
+            if not args:
+                continue
+            name = args[0].decode().upper()
+            if name == 'SUBSCRIBE':
+                self._subscribe(args[1:])
+                break
+            with server.lock:
+                reply = self._execute(name, args[1:])
+            try:
+                self.wfile.write(reply)
+            except OSError:
+                break
+
+    def _subscribe(self, channels):
+        server = self.server
+        with server.lock:
+            for i, channel in enumerate(channels, 1):
+                server.channels.setdefault(channel, []).append(self.wfile)
+                self.wfile.write(RedisConnection.encode(b'subscribe', channel, i))
+        # Hold the connection open until the client goes away
+        try:
+            while self.rfile.read(1):
+                pass
+        finally:
+            with server.lock:
+                for channel in channels:
+                    subscribers = server.channels.get(channel, [])
+                    if self.wfile in subscribers:
+                        subscribers.remove(self.wfile)
+
+    def _execute(self, name, args):
+        server = self.server
+        data = server.data
+        if name == 'PING':
+            return b'+PONG\r\n'
+        if name == 'SELECT' or name == 'FLUSHDB':
+            if name == 'FLUSHDB':
+                data.clear()
+                server.expires.clear()
+            return b'+OK\r\n'
+        if name == 'GET':
+            value = data.get(args[0]) if server._alive(args[0]) else None
+            if value is None or isinstance(value, set):
+                return b'$-1\r\n'
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if name == 'SET':
+            data[args[0]] = args[1]
+            server.expires.pop(args[0], None)
+            options = [a.decode().upper() for a in args[2:]]
+            if 'PX' in options:
+                server.expires[args[0]] = time.time() + int(options[options.index('PX') + 1]) / 1000
+            elif 'EX' in options:
+                server.expires[args[0]] = time.time() + int(options[options.index('EX') + 1])
+            return b'+OK\r\n'
+        if name == 'DEL':
+            removed = 0
+            for key in args:
+                if data.pop(key, None) is not None:
+                    removed += 1
+                server.expires.pop(key, None)
+            return b':%d\r\n' % removed
+        if name == 'INCR':
+            value = int(data.get(args[0], b'0')) + 1 if server._alive(args[0]) else 1
+            data[args[0]] = str(value).encode()
+            return b':%d\r\n' % value
+        if name == 'PEXPIRE':
+            if not server._alive(args[0]):
+                return b':0\r\n'
+            server.expires[args[0]] = time.time() + int(args[1]) / 1000
+            return b':1\r\n'
+        if name == 'SADD':
+            server._alive(args[0])
+            members = data.setdefault(args[0], set())
+            before = len(members)
+            members.update(args[1:])
+            return b':%d\r\n' % (len(members) - before)
+        if name == 'SMEMBERS':
+            members = (data.get(args[0]) if server._alive(args[0]) else None) or set()
+            return RedisConnection.encode(*members) if members else b'*0\r\n'
+        if name == 'PUBLISH':
+            subscribers = list(server.channels.get(args[0], []))
+            message = RedisConnection.encode(b'message', args[0], args[1])
+            delivered = 0
+            for wfile in subscribers:
+                try:
+                    wfile.write(message)
+                    delivered += 1
+                except OSError:
+                    pass
+            return b':%d\r\n' % delivered
+        return b'-ERR unknown command ' + name.encode() + b'\r\n'
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'redis-standin':
+        print('Usage: python cache.py redis-standin [--port 6380]')
+        sys.exit(1)
+    port = 6380
+    if '--port' in sys.argv:
+        port = int(sys.argv[sys.argv.index('--port') + 1])
+    server = MiniRedisServer(('127.0.0.1', port))
+    print(f"🧪 Redis stand-in listening on 127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
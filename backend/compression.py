@@ -0,0 +1,117 @@
+"""Response compression helpers: Accept-Encoding negotiation and codecs.
+
+gzip always works (stdlib). Brotli and zstd come from the ``Brotli`` and
+``zstandard`` packages pinned in requirements.txt; on an install without
+them they are simply not offered during negotiation.
+"""
+import gzip
+import time
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Server preference when the client accepts several encodings equally
+SUPPORTED_ENCODINGS = [name for name, available in [
+    ('br', brotli is not None),
+    ('zstd', zstandard is not None),
+    ('gzip', True),
+] if available]
+
+DEFAULT_LEVELS = {'br': 5, 'zstd': 3, 'gzip': 6}
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def negotiate(accept_encoding, supported=None):
+    """Pick the best encoding from an Accept-Encoding header, or None."""
+    supported = SUPPORTED_ENCODINGS if supported is None else supported
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding, level=None):
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+class CompressionStats:
+    """Per-encoding counters for compressed responses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_encoding = {}
+
+    def record(self, encoding, level, bytes_in, bytes_out, cpu_seconds, cached):
+        with self._lock:
+            stats = self.by_encoding.setdefault(encoding, {
+                'level': level,
+                'responses': 0,
+                'cache_hits': 0,
+                'bytes_in': 0,
+                'bytes_out': 0,
+                'cpu_seconds': 0.0,
+            })
+            stats['level'] = level
+            stats['responses'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['cpu_seconds'] += cpu_seconds
+            if cached:
+                stats['cache_hits'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats, bytes_saved=stats['bytes_in'] - stats['bytes_out'])
+                    for name, stats in self.by_encoding.items()}
+
+
+stats = CompressionStats()
+
+
+def timed_compress(body, encoding, level=None):
+    """Compress ``body`` and return ``(data, cpu_seconds)``."""
+    start = time.process_time()
+    data = compress(body, encoding, level)
+    return data, time.process_time() - start
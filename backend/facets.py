@@ -0,0 +1,539 @@
+"""Faceted filtering for list endpoints.
+
+A ``FacetSet`` describes the filterable columns of one list once. It turns
+query parameters into SQL conditions (so filtering runs in SQLite, against
+the facet indexes) and counts the values of every facet for the current
+filters:
+
+    GET /api/alumni?department=Computer Science and Engineering&graduation_year_min=2015
+    GET /api/alumni/facets?department=...&skills=Python&skills=SQL
+
+Several values for one facet are repeated parameters (values such as
+locations contain commas) and match any of them. Counts are disjunctive: each
+facet is counted with every *other* active filter applied, so the UI can show
+how many results each additional value of that facet would add.
+
+Projects are filtered on ``listing_*`` columns: the project's own stipend,
+duration and location, or else those of its open positions, kept up to date by
+triggers. Free-text durations ("6 months", "3-6 weeks") are parsed into whole
+weeks when they are written, so they can be indexed and compared.
+"""
+import re
+import time
+import threading
+from array import array
+from collections import Counter
+
+from serialization import loads
+
+
+class FacetError(ValueError):
+    pass
+
+
+class Facet:
+    """One filterable column.
+
+    ``kind`` is ``'value'`` (exact match on any of the given values),
+    ``'range'`` (``<name>_min`` / ``<name>_max`` bounds) or ``'tags'`` (the row
+    carries a JSON list; matches if it contains any of the values, filtered
+    through the ``tags_sql`` lookup table). ``labels`` maps parameter values to
+    stored values for enumerated facets such as availability; values without
+    a label do not filter. Range facets with ``buckets`` (ascending lower
+    bounds) are counted per bucket rather than per value.
+    """
+
+    def __init__(self, name, column, kind='value', labels=None, tags_sql=None, cast=str, buckets=None):
+        self.name = name
+        self.column = column
+        self.kind = kind
+        self.labels = labels
+        self.tags_sql = tags_sql
+        self.cast = cast
+        self.buckets = buckets
+
+    def parse(self, args):
+        """The filter requested in ``args`` for this facet, or None."""
+        if self.kind == 'range':
+            bounds = []
+            for suffix in ('min', 'max'):
+                raw = args.get(f'{self.name}_{suffix}')
+                try:
+                    bounds.append(self.cast(raw) if raw not in (None, '') else None)
+                except ValueError:
+                    raise FacetError(f'{self.name}_{suffix} must be a number')
+            return tuple(bounds) if bounds != [None, None] else None
+        values = [value.strip() for value in args.getlist(self.name) if value.strip()]
+        if self.labels is not None:
+            # Unknown values are ignored like 'all', as /api/alumni always did
+            values = [self.labels[value] for value in values if self.labels.get(value) is not None]
+        else:
+            try:
+                values = [self.cast(value) for value in values]
+            except ValueError:
+                raise FacetError(f'{self.name} values must be numbers')
+        return set(values) or None
+
+    def where(self, selected):
+        """SQL condition and parameters for the parsed filter ``selected``."""
+        if self.kind == 'range':
+            low, high = selected
+            conditions, params = [], []
+            if low is not None:
+                conditions.append(f'{self.column} >= ?')
+                params.append(low)
+            if high is not None:
+                conditions.append(f'{self.column} <= ?')
+                params.append(high)
+            return ' AND '.join(conditions), params
+        placeholders = ', '.join('?' * len(selected))
+        if self.kind == 'tags':
+            return self.tags_sql.format(placeholders=placeholders), sorted(selected)
+        return f'{self.column} IN ({placeholders})', sorted(selected)
+
+    def values_of(self, raw):
+        """The facet values a row holds, given the raw column."""
+        if self.kind == 'tags':
+            try:
+                values = loads(raw) if raw else []
+            except ValueError:
+                return []
+            return [value for value in values if isinstance(value, str)] if isinstance(values, list) else []
+        return [] if raw is None else [raw]
+
+    def bucket_of(self, value):
+        """Index of the bucket holding ``value``, or None below the first."""
+        index = None
+        for position, low in enumerate(self.buckets):
+            if value < low:
+                break
+            index = position
+        return index
+
+    def summarize(self, counts, limit=None):
+        """``[{value, count}]`` (or ``[{min, max, count}]`` for buckets) from a
+        Counter of stored values."""
+        if self.buckets:
+            totals = [0] * len(self.buckets)
+            for value, count in counts.items():
+                index = self.bucket_of(value)
+                if index is not None:
+                    totals[index] += count
+            bounds = list(zip(self.buckets, self.buckets[1:] + [None]))
+            return [{'min': low, 'max': high, 'count': count}
+                    for (low, high), count in zip(bounds, totals)]
+        if self.labels is not None:
+            names = {stored: label for label, stored in self.labels.items() if stored is not None}
+            values = [(names.get(value, value), count) for value, count in counts.items()]
+        else:
+            values = list(counts.items())
+        if self.kind == 'range':
+            values.sort(key=lambda item: item[0])
+        else:
+            values.sort(key=lambda item: (-item[1], str(item[0])))
+        return [{'value': value, 'count': count} for value, count in values[:limit]]
+
+    def matches(self, raw, selected):
+        if self.kind == 'range':
+            low, high = selected
+            return raw is not None and (low is None or raw >= low) and (high is None or raw <= high)
+        if self.kind == 'tags':
+            return any(value in selected for value in self.values_of(raw))
+        return raw in selected
+
+
+class FacetSet:
+
+    def __init__(self, facets):
+        self.facets = facets
+
+    def parse(self, args):
+        """``{facet name: filter}`` for every facet present in ``args``."""
+        selected = {}
+        for facet in self.facets:
+            value = facet.parse(args)
+            if value is not None:
+                selected[facet.name] = value
+        return selected
+
+    def where(self, selected):
+        """SQL conditions (to AND together) and their parameters."""
+        conditions, params = [], []
+        for facet in self.facets:
+            if facet.name in selected:
+                condition, facet_params = facet.where(selected[facet.name])
+                conditions.append(condition)
+                params.extend(facet_params)
+        return conditions, params
+
+    def select(self):
+        return ', '.join(facet.column for facet in self.facets)
+
+    def count(self, rows, selected, limit=None):
+        """Count facet values over ``rows`` (tuples in ``select()`` order) in
+        one pass. Returns ``(total matching every filter, {facet: [{value, count}]})``."""
+        active = [(index, facet) for index, facet in enumerate(self.facets) if facet.name in selected]
+        counts = [Counter() for _ in self.facets]
+        total = 0
+        for row in rows:
+            failed = None
+            for index, facet in active:
+                if not facet.matches(row[index], selected[facet.name]):
+                    if failed is not None:
+                        break
+                    failed = index
+            else:
+                # A row failing exactly one filter still counts toward that facet
+                if failed is None:
+                    total += 1
+                    for index, facet in enumerate(self.facets):
+                        counts[index].update(facet.values_of(row[index]))
+                else:
+                    counts[failed].update(self.facets[failed].values_of(row[failed]))
+        result = {facet.name: facet.summarize(counts[index], limit) for index, facet in enumerate(self.facets)}
+        return total, result
+
+
+def _bitmap(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+# byte -> offsets of its set bits
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def _positions(bitmap, size):
+    """Positions of the set bits of ``bitmap``, in order."""
+    positions = []
+    for offset, byte in enumerate(bitmap.to_bytes((size + 7) // 8, 'little')):
+        if byte:
+            base = offset << 3
+            positions.extend(base + bit for bit in _BYTE_BITS[byte])
+    return positions
+
+
+class FacetIndex:
+    """Per-process bitmap index for counting a ``FacetSet`` over a large table.
+
+    Counting by scanning rows costs time linear in the table for every
+    request; here each row gets a position, each common facet value a bitmap
+    (a Python int) of the positions holding it, and rare values a list of
+    positions. A filter is then an OR of value bitmaps, the filters together
+    an AND, and a count a ``bit_count()``. Value and range facets only.
+
+    The index is built on first use and rebuilt whenever the ``table_versions``
+    counter of one of ``tables`` has moved since, so it never serves counts
+    older than the rows ``/api/projects`` would return. For projects that is
+    ``project_facets``, which only moves when a facet column changes (see
+    ``create_facet_indexes``), not on every write to the table.
+    """
+
+    # Values on fewer rows than this (or 1/1024 of the table) keep positions
+    # instead of a bitmap, which caps bitmaps at ~1024 per facet
+    MIN_DENSE = 32
+
+    def __init__(self, facets, connect, source, tables):
+        self.facets = facets
+        self.connect = connect
+        self.source = source
+        self.tables = tables
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _version(self, cursor):
+        placeholders = ', '.join('?' * len(self.tables))
+        cursor.execute(f'SELECT name, version FROM table_versions WHERE name IN ({placeholders})', self.tables)
+        return sorted(cursor.fetchall())
+
+    def build(self, cursor, version):
+        cursor.execute(f'SELECT {self.facets.select()} FROM {self.source}')
+        rows = cursor.fetchall()
+        size = len(rows)
+        threshold = max(self.MIN_DENSE, size // 1024)
+        columns = []
+        for index in range(len(self.facets.facets)):
+            postings = {}
+            for position, row in enumerate(rows):
+                value = row[index]
+                if value is not None:
+                    postings.setdefault(value, []).append(position)
+            dense = {value: _bitmap(positions, size)
+                     for value, positions in postings.items() if len(positions) >= threshold}
+            sparse = {value: array('I', positions)
+                      for value, positions in postings.items() if len(positions) < threshold}
+            # position -> 1 + index into ``names`` of its rare value (0: none)
+            names = list(sparse)
+            codes = array('I', bytes(4 * size))
+            for code, value in enumerate(names, 1):
+                for position in sparse[value]:
+                    codes[position] = code
+            totals = {value: len(positions) for value, positions in postings.items()}
+            columns.append((dense, sparse, totals, names, codes))
+        return version, size, columns
+
+    def _snapshot(self):
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            version = self._version(cursor)
+            state = self._state
+            if state is None or state[0] != version:
+                with self._lock:
+                    state = self._state
+                    if state is None or state[0] != version:
+                        state = self._state = self.build(cursor, version)
+            return state
+        finally:
+            conn.close()
+
+    def _mask(self, size, column, facet, selected):
+        dense, sparse, totals = column[:3]
+        mask, positions = 0, []
+        for value in totals:
+            if facet.matches(value, selected):
+                if value in dense:
+                    mask |= dense[value]
+                else:
+                    positions.extend(sparse[value])
+        return mask | _bitmap(positions, size) if positions else mask
+
+    def count(self, selected, limit=None):
+        """Same result as ``FacetSet.count`` over every row of the table."""
+        _, size, columns = self._snapshot()
+        everything = (1 << size) - 1
+        masks = {index: self._mask(size, columns[index], facet, selected[facet.name])
+                 for index, facet in enumerate(self.facets.facets) if facet.name in selected}
+        total = size
+        if masks:
+            matching = everything
+            for mask in masks.values():
+                matching &= mask
+            total = matching.bit_count()
+
+        result = {}
+        for index, facet in enumerate(self.facets.facets):
+            dense, sparse, totals, names, codes = columns[index]
+            # Disjunctive: every filter except this facet's own
+            others = [mask for other, mask in masks.items() if other != index]
+            if not others:
+                counts = totals
+            else:
+                within = everything
+                for mask in others:
+                    within &= mask
+                counts = {value: (bitmap & within).bit_count() for value, bitmap in dense.items()}
+                if sparse:
+                    counts.update(self._count_sparse(size, within, everything, sparse, totals, names, codes))
+            result[facet.name] = facet.summarize({value: count for value, count in counts.items() if count}, limit)
+        return total, result
+
+    def _count_sparse(self, size, within, everything, sparse, totals, names, codes):
+        # Cheapest of: testing each rare value's positions against the bitmap;
+        # one lookup per row within the other filters; or, when that is most
+        # of the table, per row outside them, subtracted from the totals
+        inside = within.bit_count()
+        rare = sum(map(len, sparse.values()))
+        if rare <= min(inside, size - inside):
+            bits = within.to_bytes((size + 7) // 8, 'little')
+            return {value: sum(bits[position >> 3] >> (position & 7) & 1 for position in positions)
+                    for value, positions in sparse.items()}
+        if inside <= size // 2:
+            tally = Counter(codes[position] for position in _positions(within, size))
+            return {name: tally[code] for code, name in enumerate(names, 1)}
+        tally = Counter(codes[position] for position in _positions(everything ^ within, size))
+        return {name: totals[name] - tally[code] for code, name in enumerate(names, 1)}
+
+
+ALUMNI_FACETS = FacetSet([
+    Facet('department', 'department'),
+    Facet('graduation_year', 'graduation_year', kind='range', cast=int),
+    Facet('hall', 'hall'),
+    Facet('branch', 'branch'),
+    Facet('location', 'location'),
+    Facet('work_preference', 'work_preference'),
+    Facet('domain', 'domain'),
+    Facet('skills', 'tech_skills', kind='tags', tags_sql=(
+        'id IN (SELECT user_id FROM user_tech_skills WHERE skill IN ({placeholders}))')),
+    Facet('availability', 'is_available', labels={'available': 1, 'unavailable': 0, 'all': None}),
+])
+
+
+PROJECT_FACETS = FacetSet([
+    Facet('category', 'p.category'),
+    Facet('status', 'p.status'),
+    Facet('work_type', 'p.work_type'),
+    Facet('location', 'p.listing_location'),
+    Facet('recruiting', 'p.is_recruiting', labels={'true': 1, 'false': 0, 'all': None}),
+    Facet('stipend', 'p.listing_stipend', kind='range', cast=int, buckets=[0, 5000, 10000, 20000, 40000]),
+    Facet('duration_weeks', 'p.listing_duration_weeks', kind='range', cast=int, buckets=[0, 4, 8, 13, 26, 52]),
+])
+
+DURATION_UNITS = {'day': 1 / 7, 'week': 1, 'wk': 1, 'month': 52 / 12, 'mo': 52 / 12, 'year': 52, 'yr': 52}
+DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(?:\s*(?:-|to)\s*(\d+(?:\.\d+)?))?\s*(day|week|wk|month|mo|year|yr)s?\b',
+                         re.IGNORECASE)
+
+
+def parse_duration_weeks(text):
+    """Whole weeks in a free-text duration, or None if it names no unit.
+
+    Ranges count their upper bound and parts add up, so "3-6 months" is 26
+    and "1 year 6 months" is 78.
+    """
+    if not text:
+        return None
+    weeks = None
+    for low, high, unit in DURATION_RE.findall(str(text)):
+        weeks = (weeks or 0) + float(high or low) * DURATION_UNITS[unit.lower()]
+    return None if weeks is None else max(1, round(weeks))
+
+
+# A project's listing columns: its own value, else the highest (or first) of
+# its open positions; coordinates come from wherever the location did (see
+# geo.py). {id} is the project being refreshed.
+FIRST_POSITION_SQL = ("(SELECT {column} FROM project_positions WHERE project_id = {id} AND is_active AND location <> '' "
+                      "ORDER BY id LIMIT 1)")
+LISTING_SET = '''
+    UPDATE projects SET
+        listing_stipend = COALESCE(stipend, (SELECT MAX(stipend) FROM project_positions
+                                             WHERE project_id = {id} AND is_active)),
+        listing_duration_weeks = COALESCE(duration_weeks, (SELECT MAX(duration_weeks) FROM project_positions
+                                                           WHERE project_id = {id} AND is_active)),
+        listing_location = COALESCE(NULLIF(location, ''), {location}),
+        listing_latitude = CASE WHEN NULLIF(location, '') IS NOT NULL THEN latitude ELSE {latitude} END,
+        listing_longitude = CASE WHEN NULLIF(location, '') IS NOT NULL THEN longitude ELSE {longitude} END
+'''
+
+
+def _listing_set(project_id):
+    first = {column: FIRST_POSITION_SQL.format(column=column, id=project_id)
+             for column in ('location', 'latitude', 'longitude')}
+    return LISTING_SET.format(id=project_id, **first)
+
+
+def _refresh_listing(project_id):
+    return _listing_set(project_id) + f' WHERE id = {project_id};'
+
+
+def create_facet_indexes(cursor):
+    """Indexes behind the alumni and project facets, the skill lookup table
+    kept in step with ``users.tech_skills``, and the project listing columns,
+    all maintained by triggers."""
+    for column in ('department', 'graduation_year', 'hall', 'branch', 'location', 'work_preference', 'domain'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_alumni_{column} ON users ({column}) WHERE role = 'alumni'")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_tech_skills'")
+    exists = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_tech_skills (
+            skill TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (skill, user_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_tech_skills_user ON user_tech_skills (user_id)')
+    # Malformed JSON is indexed as no skills rather than failing the write
+    insert = '''
+        INSERT OR IGNORE INTO user_tech_skills (skill, user_id)
+        SELECT value, new.id FROM json_each(CASE WHEN json_valid(new.tech_skills) THEN new.tech_skills ELSE '[]' END)
+        WHERE type = 'text';
+    '''
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS user_tech_skills_insert AFTER INSERT ON users BEGIN {insert} END')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS user_tech_skills_update AFTER UPDATE OF tech_skills ON users
+        BEGIN DELETE FROM user_tech_skills WHERE user_id = old.id; {insert} END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS user_tech_skills_delete AFTER DELETE ON users
+        BEGIN DELETE FROM user_tech_skills WHERE user_id = old.id; END
+    ''')
+    for column in ('category', 'status', 'work_type', 'is_recruiting', 'listing_location', 'listing_stipend',
+                   'listing_duration_weeks'):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_projects_{column} ON projects ({column})')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_project_positions_project ON project_positions (project_id)')
+
+    refresh_new = _refresh_listing('new.id')
+    refresh_position = _refresh_listing('new.project_id')
+    refresh_old_position = _refresh_listing('old.project_id')
+    listing_triggers = {
+        'projects_listing_insert': f'AFTER INSERT ON projects BEGIN {refresh_new} END',
+        'projects_listing_update': (f'AFTER UPDATE OF stipend, duration_weeks, location, latitude, longitude '
+                                    f'ON projects BEGIN {refresh_new} END'),
+        'project_positions_listing_insert': f'AFTER INSERT ON project_positions BEGIN {refresh_position} END',
+        'project_positions_listing_update': (f'AFTER UPDATE OF project_id, stipend, duration_weeks, location, '
+                                             f'latitude, longitude, is_active ON project_positions '
+                                             f'BEGIN {refresh_old_position} {refresh_position} END'),
+        'project_positions_listing_delete': f'AFTER DELETE ON project_positions BEGIN {refresh_old_position} END',
+    }
+    # Replaced when their definition changes, and the listings recomputed
+    changed = _replace_triggers(cursor, listing_triggers)
+
+    # Version counter of the project facet columns alone, read by FacetIndex:
+    # the 'projects' counter also moves on image, geocode and other writes
+    columns = [facet.column.split('.')[-1] for facet in PROJECT_FACETS.facets]
+    cursor.execute('INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, ?)',
+                   ('project_facets', int(time.time())))
+    bump = "UPDATE table_versions SET version = version + 1 WHERE name = 'project_facets';"
+    moved = ' OR '.join(f'old.{column} IS NOT new.{column}' for column in columns)
+    _replace_triggers(cursor, {
+        'project_facets_version_insert': f'AFTER INSERT ON projects BEGIN {bump} END',
+        'project_facets_version_update': (f'AFTER UPDATE OF {", ".join(columns)} ON projects '
+                                          f'WHEN {moved} BEGIN {bump} END'),
+        'project_facets_version_delete': f'AFTER DELETE ON projects BEGIN {bump} END',
+    })
+
+    if not exists:
+        rebuild_skill_table(cursor)
+    if changed:
+        rebuild_listings(cursor)
+    else:
+        backfill_duration_weeks(cursor)
+
+
+def _replace_triggers(cursor, triggers):
+    """Create ``{name: definition}`` triggers, replacing any whose definition
+    differs; True if one was created or replaced."""
+    changed = False
+    for name, definition in triggers.items():
+        sql = f'CREATE TRIGGER {name} {definition}'
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+        row = cursor.fetchone()
+        if row is None or row[0] != sql:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(sql)
+            changed = True
+    return changed
+
+
+def rebuild_facet_tables(cursor):
+    """Refill everything the facet triggers maintain, e.g. after a bulk load
+    with the triggers dropped."""
+    rebuild_skill_table(cursor)
+    rebuild_listings(cursor)
+
+
+def backfill_duration_weeks(cursor):
+    """Parse durations written without ``duration_weeks`` (older rows, or
+    rows written by other tools)."""
+    for table in ('projects', 'project_positions'):
+        cursor.execute(f"SELECT id, duration FROM {table} WHERE duration_weeks IS NULL AND duration <> ''")
+        parsed = [(parse_duration_weeks(duration), row_id) for row_id, duration in cursor.fetchall()]
+        cursor.executemany(f'UPDATE {table} SET duration_weeks = ? WHERE id = ?',
+                           [(weeks, row_id) for weeks, row_id in parsed if weeks is not None])
+
+
+def rebuild_listings(cursor):
+    backfill_duration_weeks(cursor)
+    cursor.execute(_listing_set('projects.id'))
+
+
+def rebuild_skill_table(cursor):
+    cursor.execute('DELETE FROM user_tech_skills')
+    cursor.execute('''
+        INSERT OR IGNORE INTO user_tech_skills (skill, user_id)
+        SELECT skills.value, users.id
+        FROM users, json_each(CASE WHEN json_valid(users.tech_skills) THEN users.tech_skills ELSE '[]' END) AS skills
+        WHERE skills.type = 'text'
+    ''')
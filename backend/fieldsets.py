@@ -0,0 +1,252 @@
+"""Sparse fieldsets (``?fields=``) and predefined views for list endpoints.
+
+Each list endpoint describes its output fields once: the SQL expression that
+produces the field, an optional decoder for the raw column and any JOIN the
+expression needs. Handlers then SELECT (and decode) only the requested fields.
+
+    GET /api/projects?fields=id,title,tags
+    GET /api/projects?view=summary
+"""
+import re
+
+from serialization import loads, compile_row_encoder, repair_json
+
+COLUMN_RE = re.compile(r'^[\w.]+$')
+
+
+class FieldsetError(ValueError):
+    pass
+
+
+# Stored JSON columns come back from ``stored_json`` quoted as a JSON string
+# when they do not hold valid JSON, so a string decodes to the repaired value
+
+def json_list(value):
+    if not value:
+        return []
+    try:
+        value = loads(value)
+    except ValueError:
+        pass
+    return repair_json(value, b'[]') if isinstance(value, str) else value
+
+
+def json_object(value):
+    if not value:
+        return {}
+    try:
+        value = loads(value)
+    except ValueError:
+        pass
+    return repair_json(value, b'{}') if isinstance(value, str) else value
+
+
+def bool_default_true(value):
+    return bool(value) if value is not None else True
+
+
+def stored_json(column):
+    """``column`` as is when it holds valid JSON, quoted as a JSON string when
+    it holds other text (e.g. ``Python, SQL`` from older rows or imports),
+    NULL when empty. SQLite checks it, so the row encoder can copy the text
+    into the output without parsing it."""
+    return f"CASE WHEN json_valid({column}) THEN {column} WHEN {column} <> '' THEN json_quote({column}) END"
+
+
+class Field:
+    """One output field. ``sql`` is None for fields computed by the handler."""
+
+    def __init__(self, sql=None, decode=None, join=None):
+        self.sql = sql
+        self.decode = decode
+        self.join = join
+
+    def select(self):
+        # Stored JSON columns are validated; JSON built by a subquery is not
+        if self.decode in (json_list, json_object) and COLUMN_RE.match(self.sql):
+            return stored_json(self.sql)
+        return self.sql
+
+
+class Fieldset:
+
+    def __init__(self, fields, views):
+        self.fields = fields
+        self.views = views
+
+    def resolve(self, args):
+        """Return the ordered field names requested by ``fields`` / ``view``."""
+        requested = args.get('fields')
+        if requested:
+            names = [name.strip() for name in requested.split(',') if name.strip()]
+            unknown = [name for name in names if name not in self.fields]
+            if unknown:
+                raise FieldsetError(f"Unknown fields: {', '.join(unknown)}")
+        else:
+            view = args.get('view', 'full')
+            if view not in self.views:
+                raise FieldsetError(f"Unknown view: {view}")
+            names = self.views[view] or list(self.fields)
+        # id is always returned so clients can key their results
+        if 'id' not in names:
+            names = ['id'] + names
+        return [name for name in self.fields if name in names]
+
+    def columns(self, names):
+        """SELECT list and JOIN clauses for the stored fields in ``names``."""
+        selected = [name for name in names if self.fields[name].sql]
+        joins = []
+        for name in selected:
+            join = self.fields[name].join
+            if join and join not in joins:
+                joins.append(join)
+        select = ', '.join(self.fields[name].select() for name in selected)
+        return selected, select, ' '.join(joins)
+
+    def row_mapper(self, selected):
+        """Build a function turning a row of ``selected`` columns into a dict."""
+        plan = [(name, index, self.fields[name].decode) for index, name in enumerate(selected)]
+
+        def to_dict(row):
+            return {name: decode(row[index]) if decode else row[index] for name, index, decode in plan}
+        return to_dict
+
+    def row_encoder(self, selected):
+        """Build a function turning a row of ``selected`` columns into an
+        object for ``dumps``.
+
+        Stored JSON columns (validated in SQL by ``columns``) are copied into
+        the output without being decoded.
+        """
+        plan = []
+        for index, name in enumerate(selected):
+            decode = self.fields[name].decode
+            if decode is json_list:
+                plan.append((name, index, 'raw', b'[]'))
+            elif decode is json_object:
+                plan.append((name, index, 'raw', b'{}'))
+            elif decode is bool_default_true:
+                plan.append((name, index, 'bool', b'true'))
+            else:
+                plan.append((name, index, 'value', None))
+        return compile_row_encoder(plan)
+
+
+def srcsets_sql(originals):
+    """JSON object mapping each image URL produced by the ``originals``
+    subquery to its resized variants (``{mime type: srcset}``), for images the
+    job worker has already processed (see images.py)."""
+    return (f'(SELECT json_group_object(original, json(srcsets)) FROM image_derivatives '
+            f'WHERE original IN ({originals}))')
+
+
+def json_values(column):
+    """Every string anywhere in the JSON stored in ``column``."""
+    return f"SELECT value FROM json_tree(CASE WHEN json_valid({column}) THEN {column} END) WHERE type = 'text'"
+
+
+USERS_JOIN = 'LEFT JOIN users u ON p.created_by = u.id'
+AUTHORS_JOIN = 'LEFT JOIN users u ON b.author_id = u.id'
+
+PROJECT_FIELDS = Fieldset({
+    'id': Field('p.id'),
+    'title': Field('p.title'),
+    'description': Field('p.description'),
+    'category': Field('p.category'),
+    'status': Field('p.status'),
+    'team_members': Field('p.team_members', json_list),
+    'tags': Field('p.tags', json_list),
+    'skills_required': Field('p.skills_required', json_list),
+    'stipend': Field('p.stipend'),
+    'duration': Field('p.duration'),
+    'location': Field('p.location'),
+    'work_type': Field('p.work_type'),
+    'created_at': Field('p.created_at'),
+    'created_by_name': Field('u.name', join=USERS_JOIN),
+    'is_recruiting': Field('p.is_recruiting', bool_default_true),
+    'images': Field('p.images', json_list),
+    'project_links': Field('p.project_links', json_list),
+    'jd_pdf': Field('p.jd_pdf'),
+    'created_by_id': Field('p.created_by'),
+    'contact_details': Field('p.contact_details', json_object),
+    'team_roles': Field('p.team_roles', json_list),
+    'partners': Field('p.partners', json_list),
+    'funding': Field('p.funding'),
+    'highlights': Field('p.highlights', json_list),
+    # Project images and any image URL inside the highlights
+    'image_srcsets': Field(srcsets_sql(f"{json_values('p.images')} UNION ALL {json_values('p.highlights')}"),
+                           json_object),
+    'has_applied': Field(),
+}, views={
+    'full': None,
+    'summary': ['id', 'title', 'category', 'status', 'tags', 'skills_required', 'created_by_name',
+                'created_at', 'is_recruiting', 'has_applied'],
+})
+
+BLOG_FIELDS = Fieldset({
+    'id': Field('b.id'),
+    'title': Field('b.title'),
+    'content': Field('b.content'),
+    'category': Field('b.category'),
+    'created_at': Field('b.created_at'),
+    'updated_at': Field('b.updated_at'),
+    'images': Field('b.images', json_list),
+    'pdfs': Field('b.pdfs', json_list),
+    'author_name': Field('u.name', join=AUTHORS_JOIN),
+    'author_id': Field('b.author_id'),
+    'likes_count': Field('(SELECT COUNT(*) FROM blog_likes bl WHERE bl.blog_post_id = b.id)'),
+    'image_srcsets': Field(srcsets_sql(json_values('b.images')), json_object),
+    'is_liked': Field(),
+}, views={
+    'full': None,
+    'summary': ['id', 'title', 'category', 'created_at', 'author_name', 'author_id', 'likes_count'],
+})
+
+ALUMNI_FIELDS = Fieldset({
+    'id': Field('id'),
+    'name': Field('name'),
+    'email': Field('email'),
+    'graduation_year': Field('graduation_year'),
+    'department': Field('department'),
+    'hall': Field('hall'),
+    'branch': Field('branch'),
+    'bio': Field('bio'),
+    'current_company': Field('current_company'),
+    'current_position': Field('current_position'),
+    'location': Field('location'),
+    'work_preference': Field('work_preference'),
+    'linkedin': Field('linkedin'),
+    'github': Field('github'),
+    'years_of_experience': Field('years_of_experience'),
+    'domain': Field('domain'),
+    'tech_skills': Field('tech_skills', json_list),
+    'is_available': Field('is_available', bool_default_true),
+}, views={
+    'full': None,
+    'summary': ['id', 'name', 'graduation_year', 'department', 'current_company', 'current_position',
+                'domain', 'is_available'],
+})
+
+USER_FIELDS = Fieldset({
+    'id': Field('id'),
+    'name': Field('name'),
+    'email': Field('email'),
+    'role': Field('role'),
+    'department': Field('department'),
+    'graduation_year': Field('graduation_year'),
+    'current_company': Field('current_company'),
+    'current_position': Field('current_position'),
+    'location': Field('location'),
+    'bio': Field('bio'),
+    'linkedin': Field('linkedin'),
+    'github': Field('github'),
+    'website': Field('website'),
+    'hall': Field('hall'),
+    'branch': Field('branch'),
+    'avatar': Field('avatar'),
+    'avatar_srcsets': Field("(SELECT srcsets FROM image_derivatives WHERE original = '/api/profile/picture/' || avatar)",
+                            json_object),
+}, views={
+    'full': None,
+    'summary': ['id', 'name', 'role', 'department', 'avatar', 'avatar_srcsets'],
+})
@@ -0,0 +1,443 @@
+"""Generate large synthetic datasets for launchpad.db.
+
+Unlike seed_data.py, which inserts a small hand-written dataset row by row,
+this writes generated rows with batched ``executemany`` inside large
+transactions. Secondary indexes and triggers are dropped for the duration of
+the load and recreated afterwards, so each is built once instead of being
+updated on every insert.
+
+Names, companies, cities and text come from Faker; skills, departments,
+project popularity and conversation lengths follow skewed distributions
+rather than uniform ones.
+
+Usage (from backend/):
+    python generate_data.py --students 200000 --alumni 20000 --projects 50000 \\
+        --messages 5000000 --likes 1000000 [--reset] [--dir .]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import sqlite3
+import argparse
+import itertools
+from datetime import datetime, timedelta
+
+from faker import Faker
+from werkzeug.security import generate_password_hash
+
+from app import init_db
+from search import rebuild_search_index
+from facets import rebuild_facet_tables
+from geo import geocode_missing, rebuild_geo_index
+
+DEPARTMENTS = [
+    ('Computer Science and Engineering', 'CSE', 18),
+    ('Electronics and Electrical Communication Engineering', 'ECE', 12),
+    ('Electrical Engineering', 'EE', 10),
+    ('Mechanical Engineering', 'ME', 10),
+    ('Civil Engineering', 'CE', 7),
+    ('Chemical Engineering', 'CH', 6),
+    ('Mathematics', 'MA', 5),
+    ('Industrial and Systems Engineering', 'IM', 4),
+    ('Aerospace Engineering', 'AE', 4),
+    ('Metallurgical and Materials Engineering', 'MT', 4),
+    ('Mining Engineering', 'MI', 3),
+    ('Biotechnology', 'BT', 3),
+    ('Architecture', 'AR', 2),
+    ('Physics', 'PH', 2),
+    ('Geology and Geophysics', 'GG', 2),
+]
+HALLS = ['Nehru Hall', 'Patel Hall', 'Azad Hall', 'RK Hall', 'RP Hall', 'LBS Hall', 'MS Hall', 'MMM Hall',
+         'HJB Hall', 'JCB Hall', 'LLR Hall', 'VS Hall', 'SN/IG Hall', 'MT Hall', 'BRH Hall', 'Gokhale Hall']
+PROGRAMS = [('B.Tech', 60), ('Dual Degree', 15), ('M.Tech', 15), ('MSc', 5), ('PhD', 5)]
+DOMAINS = {
+    'Machine Learning': ['Python', 'TensorFlow', 'PyTorch', 'Scikit-learn', 'Pandas', 'NumPy', 'Computer Vision', 'NLP'],
+    'Web Development': ['JavaScript', 'TypeScript', 'React', 'Node.js', 'Flask', 'Django', 'PostgreSQL', 'HTML/CSS'],
+    'Mobile Development': ['Kotlin', 'Swift', 'Flutter', 'React Native', 'Firebase', 'Java'],
+    'Data Engineering': ['SQL', 'Spark', 'Airflow', 'Kafka', 'Python', 'AWS', 'Docker'],
+    'Embedded Systems': ['C', 'C++', 'Arduino', 'Raspberry Pi', 'IoT', 'MQTT', 'RTOS'],
+    'Robotics': ['ROS', 'C++', 'Python', 'OpenCV', 'MATLAB', 'SLAM'],
+    'Finance': ['Excel', 'Python', 'Financial Modeling', 'SQL', 'R', 'Tableau'],
+    'Core Engineering': ['MATLAB', 'AutoCAD', 'ANSYS', 'SolidWorks', 'STAAD Pro', 'CFD'],
+    'Product Management': ['Product Strategy', 'SQL', 'Figma', 'Analytics', 'Agile'],
+    'Cloud & DevOps': ['AWS', 'GCP', 'Kubernetes', 'Docker', 'Terraform', 'Linux', 'Go'],
+}
+DOMAIN_WEIGHTS = [20, 22, 6, 8, 7, 5, 8, 10, 6, 8]
+TOP_COMPANIES = ['Google', 'Microsoft', 'Amazon', 'Goldman Sachs', 'Flipkart', 'Uber', 'Adobe', 'Tata Motors',
+                 'Texas Instruments', 'Qualcomm', 'McKinsey & Company', 'Oracle', 'Swiggy', 'Zomato', 'ISRO']
+POSITIONS = ['Software Engineer', 'Senior Software Engineer', 'Data Scientist', 'Product Manager',
+             'Engineering Manager', 'Research Scientist', 'Consultant', 'Analyst', 'Founder & CEO',
+             'Design Engineer', 'Director of Engineering', 'Principal Engineer']
+PROJECT_CATEGORIES = ['Technology', 'Research', 'Startup', 'Healthcare AI', 'FinTech', 'Education', 'Clean Tech',
+                      'AgriTech', 'Robotics', 'Civil Tech', 'Social Impact', 'Career']
+BLOG_CATEGORIES = ['Career', 'Technology', 'Startup', 'Research', 'Campus Life', 'Higher Studies']
+DURATIONS = [('6 weeks', 5), ('2 months', 15), ('3 months', 25), ('4 months', 15), ('5 months', 10),
+             ('6 months', 25), ('1 year', 5)]
+MESSAGE_OPENERS = ['Hi! I came across your profile and', 'Hello, thanks for connecting.', 'Thank you for the reply!',
+                   'Sure, that works for me.', 'Could you share more details about', 'I have attached my CV,']
+
+
+def weighted(options):
+    """Split ``[(value..., weight)]`` into population and cumulative weights."""
+    population = [option[:-1] if len(option) > 2 else option[0] for option in options]
+    return population, list(itertools.accumulate(option[-1] for option in options))
+
+
+def zipf_cum_weights(n, s=1.1):
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def timestamp(rng, days_back):
+    start = datetime.now() - timedelta(days=days_back)
+    return (start + timedelta(seconds=rng.randrange(days_back * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Generator:
+
+    def __init__(self, seed, pool_size=2000):
+        self.rng = random.Random(seed)
+        fake = Faker('en_IN')
+        fake.seed_instance(seed)
+        # Faker is slow per call, so text comes from pre-generated pools
+        self.first_names = list({fake.first_name() for _ in range(pool_size)})
+        self.last_names = list({fake.last_name() for _ in range(pool_size)})
+        self.cities = [f'{fake.city()}, {fake.state()}' for _ in range(300)]
+        self.companies = TOP_COMPANIES + [fake.company() for _ in range(pool_size)]
+        self.sentences = [fake.sentence(nb_words=12) for _ in range(pool_size)]
+        self.paragraphs = [fake.paragraph(nb_sentences=5) for _ in range(pool_size // 4)]
+        self.catch_phrases = [fake.catch_phrase() for _ in range(pool_size)]
+        self.departments, self.department_weights = weighted(DEPARTMENTS)
+        self.programs, self.program_weights = weighted(PROGRAMS)
+        self.durations, self.duration_weights = weighted(DURATIONS)
+        self.domains = list(DOMAINS)
+        self.domain_weights = list(itertools.accumulate(DOMAIN_WEIGHTS))
+        # a few companies employ most alumni
+        self.company_weights = zipf_cum_weights(len(self.companies), 1.0)
+
+    def skills(self, domain):
+        pool = DOMAINS[domain]
+        return self.rng.sample(pool, self.rng.randint(min(3, len(pool)), min(7, len(pool))))
+
+    def users(self, role, count, password_hash, start_index):
+        rng = self.rng
+        now_year = datetime.now().year
+        for n in range(start_index, start_index + count):
+            first, last = rng.choice(self.first_names), rng.choice(self.last_names)
+            name = f'{first} {last}'
+            (department, short), = rng.choices(self.departments, cum_weights=self.department_weights)
+            program = rng.choices(self.programs, cum_weights=self.program_weights)[0]
+            domain = rng.choices(self.domains, cum_weights=self.domain_weights)[0]
+            handle = f'{first}.{last}{n}'.lower().replace(' ', '')
+            if role == 'student':
+                graduation_year = now_year + rng.randint(0, 4)
+                company = position = None
+                experience = 0
+                available = None
+            else:
+                # recent batches are larger and more active on the platform
+                graduation_year = int(rng.triangular(1985, now_year - 1, now_year - 3))
+                company = rng.choices(self.companies, cum_weights=self.company_weights)[0]
+                position = rng.choice(POSITIONS)
+                experience = max(0, now_year - graduation_year)
+                available = 1 if rng.random() < 0.7 else 0
+            joining_year = graduation_year - (5 if program == 'Dual Degree' else 2 if program == 'M.Tech' else 4)
+            yield (
+                name, f'{handle}@iitkgp.ac.in', password_hash, role, graduation_year, department,
+                rng.choice(HALLS), f'{program} {short}', rng.choice(self.sentences), company, position,
+                rng.choice(self.cities), rng.choice(['onsite', 'remote', 'hybrid']),
+                f'https://linkedin.com/in/{handle}', f'https://github.com/{handle}',
+                experience, domain, json.dumps(self.skills(domain)), program, joining_year, 'IIT Kharagpur',
+                available, timestamp(rng, 1500),
+            )
+
+    def projects(self, count, alumni_ids):
+        rng = self.rng
+        # a minority of alumni create most projects
+        creator_weights = zipf_cum_weights(len(alumni_ids), 0.8)
+        for _ in range(count):
+            domain = rng.choices(self.domains, cum_weights=self.domain_weights)[0]
+            skills = self.skills(domain)
+            title = rng.choice(self.catch_phrases)
+            yield (
+                title, rng.choice(self.paragraphs), rng.choice(PROJECT_CATEGORIES),
+                rng.choices(['active', 'completed', 'paused'], [75, 20, 5])[0],
+                json.dumps([f'{rng.choice(self.first_names)} {rng.choice(self.last_names)}'
+                            for _ in range(rng.randint(1, 4))]),
+                json.dumps([domain] + skills[:3]), rng.choice(range(5000, 40001, 1000)),
+                rng.choices(self.durations, cum_weights=self.duration_weights)[0],
+                json.dumps(skills), rng.choice(self.cities), rng.choice(['remote', 'onsite', 'hybrid']),
+                rng.choices(alumni_ids, cum_weights=creator_weights)[0], timestamp(rng, 720),
+                1 if rng.random() < 0.8 else 0, '[]', '[]',
+            )
+
+    def blog_posts(self, count, alumni_ids):
+        rng = self.rng
+        for _ in range(count):
+            created = timestamp(rng, 720)
+            yield (
+                rng.choice(self.catch_phrases), '\n\n'.join(rng.sample(self.paragraphs, 3)),
+                rng.choice(BLOG_CATEGORIES), rng.choice(alumni_ids), created, created, '[]', '[]',
+            )
+
+    def conversations(self, count, student_ids, alumni_ids):
+        """Unique user pairs; mostly student-alumni, some between students."""
+        rng = self.rng
+        seen = set()
+        attempts = 0
+        while len(seen) < count and attempts < count * 10:
+            attempts += 1
+            a = rng.choice(student_ids)
+            b = rng.choice(alumni_ids) if rng.random() < 0.7 else rng.choice(student_ids)
+            pair = (min(a, b), max(a, b))
+            if a == b or pair in seen:
+                continue
+            seen.add(pair)
+            yield pair + (timestamp(rng, 365),)
+
+    def messages(self, total, pairs):
+        """Messages spread over ``pairs`` with long-tailed conversation lengths."""
+        rng = self.rng
+        mean = max(1.0, total / max(1, len(pairs)))
+        # lognormal with sigma=1 has mean exp(mu + 0.5)
+        mu = math.log(mean) - 0.5
+        written = 0
+        for user1, user2, started in itertools.cycle(pairs):
+            length = min(total - written, max(1, int(rng.lognormvariate(mu, 1.0))))
+            moment = datetime.strptime(started, '%Y-%m-%d %H:%M:%S')
+            sender, receiver = (user1, user2) if rng.random() < 0.5 else (user2, user1)
+            for i in range(length):
+                moment += timedelta(seconds=rng.randint(30, 86400))
+                content = rng.choice(self.sentences)
+                if i == 0:
+                    content = f'{rng.choice(MESSAGE_OPENERS)} {content}'
+                yield sender, receiver, content, moment.strftime('%Y-%m-%d %H:%M:%S'), 1 if i < length - 2 else 0
+                if rng.random() < 0.7:
+                    sender, receiver = receiver, sender
+            written += length
+            if written >= total:
+                return
+
+    def likes(self, total, post_ids, user_ids):
+        """Unique (post, user) likes with Zipf-distributed post popularity."""
+        rng = self.rng
+        weights = [1 / (rank ** 1.1) for rank in range(1, len(post_ids) + 1)]
+        scale = total / sum(weights)
+        posts = list(post_ids)
+        rng.shuffle(posts)
+        for post_id, weight in zip(posts, weights):
+            count = min(len(user_ids), int(round(weight * scale)))
+            for user_id in rng.sample(user_ids, count):
+                yield post_id, user_id, timestamp(rng, 365)
+
+    def applications(self, total, student_ids, project_ids):
+        rng = self.rng
+        popularity = zipf_cum_weights(len(project_ids), 0.9)
+        seen = set()
+        attempts = 0
+        while len(seen) < total and attempts < total * 10:
+            attempts += 1
+            pair = (rng.choice(student_ids), rng.choices(project_ids, cum_weights=popularity)[0])
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield pair + (rng.choice(self.sentences),
+                          rng.choices(['pending', 'accepted', 'declined'], [60, 25, 15])[0],
+                          1 if rng.random() < 0.15 else 0, timestamp(rng, 365))
+
+
+def insert_batched(conn, table, columns, rows, batch_size, commit_every, ignore_duplicates=False):
+    """Insert ``rows`` with executemany; commit every ``commit_every`` rows.
+
+    With ``ignore_duplicates``, rows that would break a UNIQUE constraint
+    (e.g. a pair already in the database) are skipped.
+    """
+    verb = 'INSERT OR IGNORE' if ignore_duplicates else 'INSERT'
+    sql = f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    total = 0
+    since_commit = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        cursor.executemany(sql, batch)
+        total += cursor.rowcount
+        since_commit += len(batch)
+        if since_commit >= commit_every:
+            conn.commit()
+            since_commit = 0
+            elapsed = time.perf_counter() - started
+            print(f"   ... {table}: {total:,} rows ({total / elapsed:,.0f} rows/s)", flush=True)
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    print(f"✅ {table}: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+
+def ids(cursor, query, params=()):
+    cursor.execute(query, params)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def drop_deferred_objects(conn):
+    """Drop secondary indexes and triggers, returning the SQL to recreate them."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+        ORDER BY type
+    """)
+    objects = cursor.fetchall()
+    for kind, name, _ in objects:
+        cursor.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+    conn.commit()
+    return [sql for _, _, sql in objects]
+
+
+def recreate_deferred_objects(conn, statements):
+    cursor = conn.cursor()
+    for sql in statements:
+        cursor.execute(sql)
+    # Triggers were off during the load, so bump every ETag version once
+    cursor.execute('UPDATE table_versions SET version = version + 1')
+    conn.commit()
+
+
+def reset_tables(conn):
+    cursor = conn.cursor()
+    for table in ['project_applications', 'project_positions', 'conversations', 'messages', 'blog_likes',
+                  'user_skills', 'user_achievements', 'user_languages', 'mentorship_requests', 'blog_posts',
+                  'projects', 'users']:
+        cursor.execute(f'DELETE FROM {table}')
+    conn.commit()
+
+
+USER_COLUMNS = ['name', 'email', 'password_hash', 'role', 'graduation_year', 'department', 'hall', 'branch', 'bio',
+                'current_company', 'current_position', 'location', 'work_preference', 'linkedin', 'github',
+                'years_of_experience', 'domain', 'tech_skills', 'program', 'joining_year', 'institute',
+                'is_available', 'created_at']
+PROJECT_COLUMNS = ['title', 'description', 'category', 'status', 'team_members', 'tags', 'stipend', 'duration',
+                   'skills_required', 'location', 'work_type', 'created_by', 'created_at', 'is_recruiting',
+                   'images', 'project_links']
+BLOG_COLUMNS = ['title', 'content', 'category', 'author_id', 'created_at', 'updated_at', 'images', 'pdfs']
+
+
+def generate(args):
+    os.chdir(args.dir)
+    init_db()
+
+    conn = sqlite3.connect('launchpad.db')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA cache_size = -200000')
+    if args.reset:
+        reset_tables(conn)
+    started = time.perf_counter()
+    deferred = drop_deferred_objects(conn)
+    print(f"🔄 Deferred {len(deferred)} indexes/triggers until after the load")
+    try:
+        status = load(conn, args)
+    finally:
+        # Whatever happened, never leave the database without its indexes
+        # and triggers
+        conn.rollback()
+        print("🔄 Building indexes and triggers...")
+        index_started = time.perf_counter()
+        recreate_deferred_objects(conn, deferred)
+        print(f"✅ Indexes and triggers rebuilt in {time.perf_counter() - index_started:.1f}s")
+    if status:
+        conn.close()
+        return status
+
+    search_started = time.perf_counter()
+    # The full-text triggers were dropped with the rest, so reindex in one pass
+    rebuild_search_index(conn)
+    print(f"✅ Search index rebuilt in {time.perf_counter() - search_started:.1f}s")
+    # Likewise the skill lookup table behind the alumni facets, and the
+    # coordinates (needed by the project listings) behind "near me" search
+    cursor = conn.cursor()
+    geocode_missing(cursor)
+    rebuild_facet_tables(cursor)
+    rebuild_geo_index(cursor)
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+    print(f"🎉 Dataset generated in {time.perf_counter() - started:.1f}s "
+          f"(password for all generated users: {args.password})")
+    return 0
+
+
+def load(conn, args):
+    """Insert the generated rows; returns the exit status."""
+    generator = Generator(args.seed)
+    cursor = conn.cursor()
+    # Every generated account shares one password, hashed once
+    password_hash = generate_password_hash(args.password)
+    batch, commit_every = args.batch_size, args.commit_every
+
+    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM users')
+    offset = cursor.fetchone()[0]
+    insert_batched(conn, 'users', USER_COLUMNS,
+                   generator.users('alumni', args.alumni, password_hash, offset), batch, commit_every)
+    insert_batched(conn, 'users', USER_COLUMNS,
+                   generator.users('student', args.students, password_hash, offset + args.alumni), batch, commit_every)
+    alumni_ids = ids(cursor, "SELECT id FROM users WHERE role = 'alumni'")
+    student_ids = ids(cursor, "SELECT id FROM users WHERE role = 'student'")
+    if not alumni_ids or not student_ids:
+        print("❌ Need at least one alumni and one student")
+        return 1
+
+    insert_batched(conn, 'projects', PROJECT_COLUMNS,
+                   generator.projects(args.projects, alumni_ids), batch, commit_every)
+    insert_batched(conn, 'blog_posts', BLOG_COLUMNS,
+                   generator.blog_posts(args.posts, alumni_ids), batch, commit_every)
+    project_ids = ids(cursor, 'SELECT id FROM projects')
+    post_ids = ids(cursor, 'SELECT id FROM blog_posts')
+
+    if project_ids:
+        insert_batched(conn, 'project_applications',
+                       ['student_id', 'project_id', 'message', 'status', 'has_team', 'created_at'],
+                       generator.applications(args.applications, student_ids, project_ids), batch, commit_every)
+    conversation_count = args.conversations or max(1, args.messages // 25)
+    # Without --reset, generated pairs can already exist
+    insert_batched(conn, 'conversations', ['user1_id', 'user2_id', 'created_at'],
+                   generator.conversations(conversation_count, student_ids, alumni_ids), batch, commit_every,
+                   ignore_duplicates=True)
+    cursor.execute('SELECT user1_id, user2_id, created_at FROM conversations')
+    pairs = cursor.fetchall()
+    if pairs and args.messages:
+        insert_batched(conn, 'messages', ['sender_id', 'receiver_id', 'content', 'created_at', 'is_read'],
+                       generator.messages(args.messages, pairs), batch, commit_every)
+    if post_ids and args.likes:
+        insert_batched(conn, 'blog_likes', ['blog_post_id', 'user_id', 'created_at'],
+                       generator.likes(args.likes, post_ids, student_ids + alumni_ids), batch, commit_every,
+                       ignore_duplicates=True)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a large synthetic launchpad.db dataset')
+    parser.add_argument('--dir', default='.', help='directory containing launchpad.db')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--alumni', type=int, default=200)
+    parser.add_argument('--projects', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=200, help='blog posts')
+    parser.add_argument('--applications', type=int, default=5000)
+    parser.add_argument('--conversations', type=int, help='default: messages / 25')
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--likes', type=int, default=5000)
+    parser.add_argument('--password', default='password123', help='password for every generated user')
+    parser.add_argument('--reset', action='store_true', help='delete existing data first')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows per executemany call')
+    parser.add_argument('--commit-every', type=int, default=500000, help='rows per transaction')
+    return generate(parser.parse_args())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
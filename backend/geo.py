@@ -0,0 +1,193 @@
+"""Offline geocoding of free-text locations and "near me" search.
+
+Locations are typed by people ("Bangalore, Karnataka", "Pune (Onsite)",
+"Delhi, NCR"), so they are matched against a small bundled gazetteer
+(``data/gazetteer.csv``: city, state, country, latitude, longitude and
+alternative names) when they are written (projects and positions by the
+``project.geocode`` background job), and the coordinates stored next to the
+text. Nothing is looked up over the network; places missing from the
+gazetteer (or "Remote") simply have no coordinates.
+
+Coordinates are indexed in SQLite R*Tree tables kept in sync by triggers:
+
+- ``user_geo``: users, from ``users.latitude/longitude``
+- ``project_geo``: projects, from ``projects.listing_latitude/longitude``
+  (the project's own location, else its first open position's; see facets.py)
+
+A radius query is a bounding-box search on the R*Tree (``box_condition``)
+that reads only ids and coordinates; ``nearest`` then keeps the candidates
+whose great-circle distance is within the radius, so the full rows are only
+fetched for the page that is returned.
+"""
+import os
+import re
+import csv
+import math
+import heapq
+import unicodedata
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+EARTH_RADIUS_KM = 6371.0088
+# "Pune (Onsite)", "Bangalore - Hybrid": work arrangement notes, not places
+NOTE_RE = re.compile(r'\(.*?\)|\s[-–]\s.*$')
+COORDINATES_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+
+class Gazetteer:
+    """City name (and aliases) -> coordinates, loaded once from the CSV."""
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.path = path
+        self._places = None
+
+    def _load(self):
+        places = {}
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                place = (normalize(row['state']), row['country'], float(row['latitude']), float(row['longitude']))
+                names = [row['name']] + [alias for alias in row['aliases'].split('|') if alias]
+                for name in names:
+                    places.setdefault(normalize(name), []).append(place)
+        return places
+
+    def geocode(self, text):
+        """``(latitude, longitude)`` for a free-text location, or None.
+
+        The first comma-separated part is taken as the city and a later part
+        naming its state or country picks between cities of the same name;
+        failing that, any part that is itself a known place is used.
+        """
+        if not text:
+            return None
+        if self._places is None:
+            self._places = self._load()
+        parts = [normalize(part) for part in NOTE_RE.sub('', str(text)).split(',')]
+        parts = [part for part in parts if part]
+        for index, part in enumerate(parts):
+            candidates = self._places.get(part)
+            if not candidates:
+                continue
+            context = set(parts[index + 1:])
+            for state, country, latitude, longitude in candidates:
+                if state in context or normalize(country) in context:
+                    return latitude, longitude
+            return candidates[0][2:]
+        return None
+
+
+gazetteer = Gazetteer()
+
+
+def parse_point(text):
+    """``(latitude, longitude)`` from ``"lat,lon"`` or a place name, or None."""
+    match = COORDINATES_RE.match(text or '')
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+    return gazetteer.geocode(text)
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(longitude2 - longitude1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(min_lat, max_lat, min_lon, max_lon)`` containing every point within
+    ``radius_km``. Near the poles or across the antimeridian the longitude
+    range is widened to the whole circle rather than split in two."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - dlat, latitude + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(latitude))))
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+
+# R*Tree -> (source table, latitude column, longitude column)
+GEO_INDEXES = {
+    'user_geo': ('users', 'latitude', 'longitude'),
+    'project_geo': ('projects', 'listing_latitude', 'listing_longitude'),
+}
+
+
+def box_condition(index, column, point, radius_km):
+    """SQL condition (and parameters) keeping rows whose ``column`` id has an
+    entry in the ``index`` R*Tree inside the bounding box of the radius."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(point[0], point[1], radius_km)
+    sql = (f'{column} IN (SELECT id FROM {index} WHERE max_lat >= ? AND min_lat <= ? '
+           f'AND max_lon >= ? AND min_lon <= ?)')
+    return sql, [min_lat, max_lat, min_lon, max_lon]
+
+
+def nearest(rows, point, radius_km, limit):
+    """``[(id, distance_km)]`` for the ``(id, latitude, longitude)`` rows
+    within ``radius_km`` of ``point``, nearest first."""
+    latitude, longitude = point
+    hits = []
+    for row_id, row_latitude, row_longitude in rows:
+        distance = distance_km(latitude, longitude, row_latitude, row_longitude)
+        if distance <= radius_km:
+            hits.append((distance, row_id))
+    return [(row_id, round(distance, 1)) for distance, row_id in heapq.nsmallest(limit, hits)]
+
+
+def create_geo_index(cursor):
+    """Create the R*Trees and their sync triggers; geocode and index existing
+    rows the first time."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_geo'")
+    exists = cursor.fetchone() is not None
+    for index, (table, latitude, longitude) in GEO_INDEXES.items():
+        cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING rtree(id, min_lat, max_lat, min_lon, max_lon)')
+        insert = (f'INSERT OR REPLACE INTO {index} (id, min_lat, max_lat, min_lon, max_lon) '
+                  f'SELECT new.id, new.{latitude}, new.{latitude}, new.{longitude}, new.{longitude} '
+                  f'WHERE new.{latitude} IS NOT NULL AND new.{longitude} IS NOT NULL;')
+        delete = f'DELETE FROM {index} WHERE id = old.id;'
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN {insert} END')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {latitude}, {longitude} ON {table}
+            BEGIN {delete} {insert} END
+        ''')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN {delete} END')
+    if not exists:
+        geocode_missing(cursor)
+        rebuild_geo_index(cursor)
+
+
+def geocode_missing(cursor):
+    """Fill latitude/longitude for rows with a location but no coordinates
+    (older rows, or rows written by other tools)."""
+    for table in ('users', 'projects', 'project_positions'):
+        cursor.execute(f"SELECT id, location FROM {table} WHERE latitude IS NULL AND location <> ''")
+        located = []
+        for row_id, location in cursor.fetchall():
+            point = gazetteer.geocode(location)
+            if point:
+                located.append((point[0], point[1], row_id))
+        cursor.executemany(f'UPDATE {table} SET latitude = ?, longitude = ? WHERE id = ?', located)
+
+
+def rebuild_geo_index(cursor):
+    """Refill the R*Trees from the coordinate columns, e.g. after a bulk load
+    with the triggers dropped."""
+    for index, (table, latitude, longitude) in GEO_INDEXES.items():
+        cursor.execute(f'DELETE FROM {index}')
+        cursor.execute(f'''
+            INSERT INTO {index} (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT id, {latitude}, {latitude}, {longitude}, {longitude} FROM {table}
+            WHERE {latitude} IS NOT NULL AND {longitude} IS NOT NULL
+        ''')
@@ -0,0 +1,27 @@
+"""gunicorn settings, read automatically when gunicorn starts in this directory."""
+import os
+import sys
+
+import metrics
+
+# Threaded workers: a request waiting on the password hashing pool
+# (hashing.py) only holds one of a worker's threads, so the worker keeps
+# serving other requests, and the per-worker admission limits (HASH_MAX_PENDING,
+# CONCURRENCY_LIMITS) see several requests at once. With sync workers each
+# worker has a single request in flight and those limits could never trip.
+# gunicorn reads WEB_CONCURRENCY for the number of workers.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def post_worker_init(worker):
+    # Load the typeahead index off the request path as soon as the app is up
+    app = sys.modules.get('app')
+    if app is not None:
+        app.typeahead_index.start()
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters, but free its pid's metrics file for
+    # the worker that replaces it
+    metrics.mark_process_dead(worker.pid, os.environ.get('METRICS_DIR', metrics.DEFAULT_DIRECTORY))
@@ -0,0 +1,92 @@
+"""Password hashing on a bounded process pool.
+
+scrypt/pbkdf2 are deliberately slow. Run in the request thread, a burst of
+logins occupies every gunicorn worker and cheap read endpoints queue behind
+them. ``PasswordHasher`` moves the work to a small process pool (created
+lazily, so each gunicorn worker gets its own after fork) and admits at most
+``max_pending`` jobs at a time. Further requests fail fast with
+``HasherBusy`` so the app can answer 503 + Retry-After instead of queueing.
+The limit counts requests in one gunicorn worker, so it relies on the
+threaded workers configured in gunicorn.conf.py; a sync worker never has more
+than one request waiting.
+A pool whose process died, or that is stuck on a timed-out hash, is replaced
+(its processes killed); a hash interrupted that way is retried once.
+
+Hashes use werkzeug's default method unless one is configured. Stored hashes
+carry their method and parameters (``pbkdf2:sha256:600000$...``); with a
+configured method, ``needs_rehash`` compares them with it, so logins can
+upgrade old hashes. Without one, existing hashes are left alone.
+"""
+import threading
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from pools import ReplaceablePool
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full or a job timed out."""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing is overloaded, retry later')
+        self.retry_after = retry_after
+
+
+def hash_password(password, method):
+    if method is None:
+        return generate_password_hash(password)
+    return generate_password_hash(password, method=method)
+
+
+class PasswordHasher:
+
+    def __init__(self, method=None, workers=1, max_pending=8, timeout=10.0, retry_after=2):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # Pool processes only run werkzeug's hash functions
+        self._pool = ReplaceablePool(workers)
+        self._method_prefix = None
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy(self.retry_after)
+        try:
+            for attempt in range(2):
+                pool = self._pool.get()
+                try:
+                    return pool.submit(fn, *args).result(timeout=self.timeout)
+                except BrokenProcessPool:
+                    # A pool process died (e.g. OOM-killed): start a new pool
+                    self._pool.discard(pool)
+                except TimeoutError:
+                    # The hash keeps running in the pool after its slot is
+                    # released, so kill it rather than let such work pile up
+                    self._pool.discard(pool)
+                    break
+            raise HasherBusy(self.retry_after)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        if self.method is None:
+            return False
+        if self._method_prefix is None:
+            # Normalise e.g. 'scrypt' to the full 'scrypt:32768:8:1' werkzeug stores
+            self._method_prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        self._pool.shutdown()
@@ -0,0 +1,166 @@
+"""Uploaded images: type detection from contents, and resized derivatives.
+
+Originals are stored as uploaded (up to 16MB). ``DerivativeRenderer`` makes
+smaller copies for list views, next to the original:
+
+    3fa9...e2 -> 3fa9...e2.w400.webp, 3fa9...e2.w1200.webp (+ .avif)
+
+Sizes come from a profile: ``avatar`` (64 and 128px squares, ``.s64``) or
+``content`` (400px card and 1200px hero, aspect kept, ``.w400``). Derivatives
+that already exist are reused, so an image uploaded twice (one blob, see
+blobs.py) is only rendered once. Images are never enlarged; EXIF is
+dropped after applying its orientation, the ICC profile is kept. AVIF is
+produced when the installed Pillow can write it, WebP always.
+
+Each size is rendered by its own task on a process pool, so one image uses
+several cores and a crash or decompression bomb cannot take down the worker
+that called ``render``. A crash breaks the whole pool, though, and a hung
+task keeps its process busy: either way the pool is thrown away (its
+processes killed), a fresh one is started for the next image, and the error
+is raised so the job is retried. JPEGs are decoded at a reduced scale (``Image.draft``) when the
+target is much smaller, which is most of the cost for phone photos.
+
+Rendering needs the optional ``Pillow`` package; without it ``render``
+returns None and clients keep using the originals.
+"""
+import os
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from pools import ReplaceablePool
+
+try:
+    from PIL import Image, ImageOps
+    Image.init()
+except ImportError:
+    Image = None
+
+# Leading bytes of each format; WebP is a RIFF container tagged 'WEBP'
+SIGNATURES = [
+    ('jpeg', b'\xff\xd8\xff'),
+    ('png', b'\x89PNG\r\n\x1a\n'),
+    ('gif', b'GIF87a'),
+    ('gif', b'GIF89a'),
+]
+
+PROFILES = {
+    'avatar': {'widths': [64, 128], 'square': True},
+    'content': {'widths': [400, 1200], 'square': False},
+}
+
+# Preferred first: browsers take the first <source> type they support
+FORMATS = [fmt for fmt in ('avif', 'webp') if Image is not None and fmt.upper() in Image.SAVE]
+QUALITY = {'avif': 60, 'webp': 80}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def sniff_image_type(head):
+    """``'jpeg'``, ``'png'``, ``'gif'`` or ``'webp'`` from the first 16 bytes
+    of a file, or None if they match none of them."""
+    for kind, signature in SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def derivative_path(source, width, fmt, square):
+    stem = source[:-len(os.path.splitext(source)[1]) or None]
+    return f"{stem}.{'s' if square else 'w'}{width}.{fmt}"
+
+
+def render_variant(source, dest, width, fmt, square):
+    """Write one derivative of ``source``; runs in a pool process.
+
+    Returns ``(width, path, bytes)``.
+    """
+    with Image.open(source) as img:
+        # Both sides stay >= width, whatever the EXIF orientation
+        img.draft('RGB', (width, width))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            has_alpha = img.mode in ('LA', 'PA') or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+        if square:
+            img = ImageOps.fit(img, (width, width), Image.LANCZOS)
+        else:
+            img.thumbnail((width, img.height), Image.LANCZOS)
+        tmp = f'{dest}.tmp'
+        img.save(tmp, format=fmt.upper(), quality=QUALITY[fmt], icc_profile=img.info.get('icc_profile'))
+        os.replace(tmp, dest)
+        return img.width, dest, os.path.getsize(dest)
+
+
+class DerivativeRenderer:
+
+    def __init__(self, workers=2, timeout=120.0):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = ReplaceablePool(workers)
+
+    def render(self, source, profile):
+        """Render every size and format of ``profile`` for ``source``.
+
+        Returns ``{format: [(width, path, bytes), ...]}`` (smallest first), or
+        None when Pillow is not installed.
+        """
+        if Image is None or not FORMATS:
+            return None
+        spec = PROFILES[profile]
+        with Image.open(source) as img:
+            width, height = img.size
+            if img.getexif().get(0x0112) in (5, 6, 7, 8):
+                width, height = height, width
+        largest = min(width, height) if spec['square'] else width
+        widths = sorted({min(w, largest) for w in spec['widths']})
+
+        variants = {fmt: [] for fmt in FORMATS}
+        tasks = []
+        for fmt in FORMATS:
+            for w in widths:
+                dest = derivative_path(source, w, fmt, spec['square'])
+                if os.path.exists(dest):
+                    variants[fmt].append((w, dest, os.path.getsize(dest)))
+                else:
+                    tasks.append((fmt, (source, dest, w, fmt, spec['square'])))
+        if self.workers <= 0:
+            results = [(fmt, render_variant(*args)) for fmt, args in tasks]
+        else:
+            pool = self._pool.get()
+            try:
+                futures = [(fmt, pool.submit(render_variant, *args)) for fmt, args in tasks]
+                results = [(fmt, future.result(timeout=self.timeout)) for fmt, future in futures]
+            except (BrokenProcessPool, TimeoutError):
+                self._pool.discard(pool)
+                raise
+        for fmt, result in results:
+            variants[fmt].append(result)
+        for results in variants.values():
+            results.sort()
+        return variants
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+def srcsets(original_url, variants):
+    """``{mime type: srcset}`` for the variants of the image at ``original_url``
+    (derivatives are served from the same directory as the original)."""
+    base = original_url.rsplit('/', 1)[0]
+    return {
+        MIME_TYPES[fmt]: ', '.join(f'{base}/{os.path.basename(path)} {width}w' for width, path, _ in results)
+        for fmt, results in variants.items()
+    }
+
+
+def create_image_tables(cursor):
+    # One row per original image URL: {mime type: srcset} of its derivatives
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS image_derivatives (
+            original TEXT PRIMARY KEY,
+            srcsets TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
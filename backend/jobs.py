@@ -0,0 +1,234 @@
+"""Durable background jobs in a SQLite table, run by ``worker.py``.
+
+Handlers call ``jobs.enqueue(cursor, name, payload)`` with their own cursor,
+so the job is committed (or rolled back) together with the write that asked
+for it and is never lost or run for a write that did not happen. The request
+then returns without waiting for the follow-up work.
+
+Workers lease one job at a time with a single atomic ``UPDATE ... RETURNING``:
+the highest priority job whose ``run_at`` has passed, oldest first. A lease
+expires after ``lease_seconds``, so a job held by a worker that died is picked
+up again by another; that counts as a failed attempt, so a job that keeps
+killing its worker ends up ``dead`` too. Reclaiming and leasing happen in one
+``BEGIN IMMEDIATE`` transaction, and a worker only records the outcome of a
+job it still holds (same worker and attempt), so a job never runs twice at
+once. A job that raises is retried with exponential backoff
+(``backoff * 2 ** (attempts - 1)`` seconds, with jitter, capped at
+``max_backoff``) until ``max_attempts``, and then kept as ``dead`` with its
+last error for inspection. Finished jobs are deleted after ``retention``.
+
+Tasks are registered on the queue with a decorator::
+
+    @jobs.task('project.geocode', max_attempts=3)
+    def geocode_project(payload):
+        ...
+"""
+import os
+import json
+import time
+import random
+import socket
+import logging
+import traceback
+
+logger = logging.getLogger('alumconnect.jobs')
+
+
+class UnknownTask(Exception):
+    pass
+
+
+class Task:
+
+    def __init__(self, name, func, priority=0, max_attempts=5):
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+
+class JobQueue:
+
+    LEASE_SQL = '''
+        UPDATE jobs
+        SET status = 'running', attempts = attempts + 1, leased_until = :now + :lease,
+            worker = :worker, updated_at = :now
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE status = 'queued' AND run_at <= :now
+            ORDER BY priority DESC, run_at, id
+            LIMIT 1
+        )
+        RETURNING id, name, payload, attempts, max_attempts
+    '''
+
+    def __init__(self, connect, lease_seconds=300, backoff=5, max_backoff=3600, retention=86400):
+        self.connect = connect
+        self.lease_seconds = lease_seconds
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self.tasks = {}
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+    def task(self, name, priority=0, max_attempts=5):
+        """Register the decorated function as the handler of ``name`` jobs."""
+        def register(func):
+            self.tasks[name] = Task(name, func, priority, max_attempts)
+            return func
+        return register
+
+    def enqueue(self, cursor, name, payload=None, priority=None, delay=0):
+        """Add a job in the caller's transaction; it runs once that commits."""
+        task = self.tasks.get(name)
+        if task is None:
+            raise UnknownTask(name)
+        now = time.time()
+        cursor.execute('''
+            INSERT INTO jobs (name, payload, priority, max_attempts, run_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (name, json.dumps(payload or {}), task.priority if priority is None else priority,
+              task.max_attempts, now + delay, now, now))
+        return cursor.lastrowid
+
+    def enqueue_once(self, cursor, name, payload=None, delay=0):
+        """Like ``enqueue``, unless a ``name`` job is already queued (for jobs
+        that re-enqueue themselves, e.g. periodic clean-ups)."""
+        cursor.execute("SELECT 1 FROM jobs WHERE name = ? AND status = 'queued' LIMIT 1", (name,))
+        if cursor.fetchone():
+            return None
+        return self.enqueue(cursor, name, payload, delay=delay)
+
+    def lease(self, conn):
+        """Take the next due job, first failing the attempts whose lease expired."""
+        # One write transaction, so two workers never both reclaim (or lease)
+        # the same job
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            expired = conn.execute('''
+                SELECT id, name, attempts, max_attempts, worker FROM jobs
+                WHERE status = 'running' AND leased_until < ?
+            ''', (now,)).fetchall()
+            for job_id, name, attempts, max_attempts, worker in expired:
+                self._fail(conn, job_id, name, attempts, max_attempts, f'Lease expired on worker {worker}',
+                           worker, expired_before=now)
+            row = conn.execute(self.LEASE_SQL, {
+                'now': now, 'lease': self.lease_seconds, 'worker': self.worker_id,
+            }).fetchone()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return row
+
+    def run_next(self, conn):
+        """Lease and run one job. Returns False when nothing is due."""
+        job = self.lease(conn)
+        if job is None:
+            return False
+        job_id, name, payload, attempts, max_attempts = job
+        started = time.perf_counter()
+        try:
+            task = self.tasks.get(name)
+            if task is None:
+                raise UnknownTask(name)
+            task.func(json.loads(payload))
+        except Exception as e:
+            error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+            self._fail(conn, job_id, name, attempts, max_attempts, error, self.worker_id)
+        else:
+            cursor = conn.execute('''
+                UPDATE jobs SET status = 'done', leased_until = NULL, last_error = NULL, updated_at = ?
+                WHERE id = ? AND status = 'running' AND worker = ? AND attempts = ?
+            ''', (time.time(), job_id, self.worker_id, attempts))
+            if cursor.rowcount == 0:
+                logger.warning('job finished after its lease was lost', extra={'job_id': job_id, 'job': name})
+            else:
+                logger.info('job done', extra={'job_id': job_id, 'job': name, 'attempts': attempts,
+                                               'duration_ms': round((time.perf_counter() - started) * 1000, 2)})
+        conn.commit()
+        return True
+
+    def _fail(self, conn, job_id, name, attempts, max_attempts, error, worker, expired_before=None):
+        """Retry the job after a backoff, or mark it dead after ``max_attempts``.
+
+        Only while ``worker`` still holds this attempt (and, with
+        ``expired_before``, its lease ran out before then).
+        """
+        guard = "id = ? AND status = 'running' AND worker = ? AND attempts = ?"
+        params = [job_id, worker, attempts]
+        if expired_before is not None:
+            guard += ' AND leased_until < ?'
+            params.append(expired_before)
+        if attempts >= max_attempts:
+            cursor = conn.execute(f'''
+                UPDATE jobs SET status = 'dead', last_error = ?, leased_until = NULL, updated_at = ?
+                WHERE {guard}
+            ''', [error, time.time()] + params)
+            if cursor.rowcount == 0:
+                return
+            logger.error('job failed permanently', extra={'job_id': job_id, 'job': name, 'attempts': attempts, 'error': error})
+        else:
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+            cursor = conn.execute(f'''
+                UPDATE jobs SET status = 'queued', run_at = ?, last_error = ?, leased_until = NULL,
+                    worker = NULL, updated_at = ?
+                WHERE {guard}
+            ''', [time.time() + delay, error, time.time()] + params)
+            if cursor.rowcount == 0:
+                return
+            logger.warning('job failed, retrying', extra={'job_id': job_id, 'job': name, 'attempts': attempts,
+                                                         'retry_in_s': round(delay, 1), 'error': error})
+
+    def prune(self, conn):
+        conn.execute("DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (time.time() - self.retention,))
+        conn.commit()
+
+    def work(self, poll_interval=1.0, burst=False, should_stop=lambda: False):
+        """Run jobs until ``should_stop()``; with ``burst``, stop once the queue is empty."""
+        conn = self.connect()
+        last_prune = 0.0
+        try:
+            while not should_stop():
+                if time.monotonic() - last_prune > 600:
+                    self.prune(conn)
+                    last_prune = time.monotonic()
+                if self.run_next(conn):
+                    continue
+                if burst:
+                    break
+                time.sleep(poll_interval)
+        finally:
+            conn.close()
+
+    def stats(self, cursor):
+        """Number of jobs per status."""
+        cursor.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+        return dict(cursor.fetchall())
+
+
+def create_jobs_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'dead')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 5,
+            run_at REAL NOT NULL,
+            leased_until REAL,
+            worker TEXT,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    # Only queued jobs are searched when leasing, so index just those
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (priority DESC, run_at, id)
+        WHERE status = 'queued'
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs (leased_until) WHERE status = 'running'")
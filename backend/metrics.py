@@ -0,0 +1,279 @@
+"""Prometheus-compatible metrics with multiprocess aggregation.
+
+Each gunicorn worker keeps its metrics in memory and periodically writes a
+snapshot to ``<directory>/<pid>.json`` (atomically, via rename). A scrape of
+``/metrics`` can land on any worker, so rendering merges the snapshots of all
+workers:
+
+- counters and histograms are summed over every file, including those of
+  workers that have exited, so totals never go backwards on a restart;
+- gauges are summed over live workers only (``livesum``), reported per
+  worker with a ``worker`` label (``liveall``), or the highest value of a
+  live worker (``livemax``, for settings every worker shares).
+
+When a worker exits, gunicorn's ``child_exit`` hook (gunicorn.conf.py) calls
+``mark_process_dead``: its counters and histograms are folded into
+``dead.json`` and its own file is removed, so a new worker that reuses the pid
+starts from a fresh file instead of overwriting the old counts.
+
+Delete the directory before starting the server to reset everything.
+"""
+import os
+import json
+import bisect
+import tempfile
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), 'alumconnect-metrics')
+# Totals of the workers that have exited (see mark_process_dead)
+DEAD_FILENAME = 'dead.json'
+
+
+def label_key(labels):
+    return json.dumps(sorted(labels.items())) if labels else '[]'
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, mode=None):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.mode = mode
+        self.samples = {}
+
+    def describe(self):
+        return {'type': self.kind, 'help': self.help, 'mode': self.mode}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = label_key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, registry, name, help, mode='livesum'):
+        super().__init__(registry, name, help, mode)
+
+    def set(self, value, **labels):
+        with self.registry.lock:
+            self.samples[label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = label_key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help)
+        self.buckets = list(buckets)
+
+    def describe(self):
+        return dict(super().describe(), buckets=self.buckets)
+
+    def observe(self, value, **labels):
+        key = label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                # per-bucket (non-cumulative) counts, then +Inf, sum and count
+                sample = self.samples[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            sample[index] += 1
+            sample[-2] += value
+            sample[-1] += 1
+
+
+class Registry:
+
+    def __init__(self, directory, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.derived = []
+        self._flushed_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def counter(self, name, help):
+        return self._register(Counter(self, name, help))
+
+    def gauge(self, name, help, mode='livesum'):
+        return self._register(Gauge(self, name, help, mode))
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, help, buckets))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collect):
+        """Add a callable returning extra ``{name: metric_dict}`` at flush time.
+
+        Used for stats kept elsewhere in the process (e.g. compression).
+        """
+        self.collectors.append(collect)
+
+    def derive(self, name, help, compute):
+        """Add a gauge computed at render time from the merged metrics.
+
+        ``compute(merged)`` returns ``{label_key: value}``; used for values
+        such as ratios that can't be summed across workers.
+        """
+        self.derived.append((name, help, compute))
+
+    def snapshot(self):
+        with self.lock:
+            data = {name: dict(metric.describe(), samples={key: list(value) if isinstance(value, list) else value
+                                                            for key, value in metric.samples.items()})
+                    for name, metric in self.metrics.items()}
+        for collect in self.collectors:
+            data.update(collect())
+        return data
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory."""
+        payload = json.dumps({'pid': os.getpid(), 'metrics': self.snapshot()})
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, os.path.join(self.directory, f'{os.getpid()}.json'))
+        self._flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def collect(self):
+        """Merge the snapshots of all workers into ``{name: metric_dict}``."""
+        merged = {}
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            snapshot = _read_snapshot(os.path.join(self.directory, filename))
+            if snapshot is None:
+                continue
+            pid = snapshot['pid']
+            alive = pid is not None and (pid == os.getpid() or _pid_alive(pid))
+            _merge(merged, snapshot['metrics'], pid, alive)
+        return merged
+
+    def render(self):
+        """Flush, merge all workers and return the text exposition format."""
+        self.flush()
+        merged = self.collect()
+        for name, help, compute in self.derived:
+            merged[name] = {'type': 'gauge', 'help': help, 'samples': compute(merged)}
+        lines = []
+        for name, metric in sorted(merged.items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key, value in sorted(metric['samples'].items()):
+                labels = [tuple(pair) for pair in json.loads(key)]
+                if metric['type'] == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(metric['buckets'] + [float('inf')], value[:-2]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', _format_value(float(bound)))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def mark_process_dead(pid, directory=DEFAULT_DIRECTORY):
+    """Fold the snapshot of exited worker ``pid`` into the dead workers' totals.
+
+    Called from the gunicorn master only, one worker at a time.
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return
+    dead_path = os.path.join(directory, DEAD_FILENAME)
+    dead = _read_snapshot(dead_path) or {'pid': None, 'metrics': {}}
+    totals = {}
+    _merge(totals, dead['metrics'], None, False)
+    _merge(totals, snapshot['metrics'], None, False)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'pid': None, 'metrics': totals}, f)
+    os.replace(tmp_path, dead_path)
+    os.remove(path)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(merged, metrics, pid, alive):
+    """Add one snapshot's ``metrics`` into ``merged``; gauges only if ``alive``."""
+    for name, metric in metrics.items():
+        target = merged.setdefault(name, dict(metric, samples={}))
+        if metric['type'] == 'gauge':
+            if not alive:
+                continue
+            for key, value in metric['samples'].items():
+                if metric['mode'] == 'liveall':
+                    labels = json.loads(key) + [['worker', str(pid)]]
+                    target['samples'][json.dumps(sorted(labels))] = value
+                elif metric['mode'] == 'livemax':
+                    target['samples'][key] = max(target['samples'].get(key, value), value)
+                else:
+                    target['samples'][key] = target['samples'].get(key, 0) + value
+        elif metric['type'] == 'histogram':
+            for key, value in metric['samples'].items():
+                current = target['samples'].get(key)
+                target['samples'][key] = value if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            for key, value in metric['samples'].items():
+                target['samples'][key] = target['samples'].get(key, 0) + value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,109 @@
+"""Move files uploaded before the blob store into it (see blobs.py).
+
+    python migrate_uploads.py            # copy into the store, rewrite references
+    python migrate_uploads.py --delete   # ...and delete the old files it copied
+
+Every avatar, CV, project image / highlight / JD and blog image / PDF that
+still names an old file is stored as a blob and its reference rewritten in
+place (same URL shape, new file name). Duplicates collapse into one blob.
+Image derivatives are rendered again for the new names by the job worker.
+Safe to run more than once.
+"""
+import os
+import re
+import glob
+import argparse
+
+from app import app, get_db, init_db, blob_store, BLOB_REFERENCES, enqueue_derivatives
+
+UPLOAD_FOLDER = app.config['UPLOAD_FOLDER']
+# /api/projects/7/images/img_ab12.jpg -> uploads/projects/7/images/img_ab12.jpg
+URL_RE = re.compile(r'/api/(projects|blog)/(\d+)/(images|highlights|jd|pdfs)/([A-Za-z0-9_.-]+)')
+URL_FOLDERS = {'projects': 'projects', 'blog': 'blogs'}
+# Columns holding a bare file name served from UPLOAD_FOLDER
+BARE_COLUMNS = {('users', 'avatar'): '/api/profile/picture/', ('users', 'cv_pdf'): None}
+
+
+def migrate_uploads(delete=False):
+    init_db()
+    conn = get_db()
+    cursor = conn.cursor()
+    stored = {}  # old path -> blob name
+    missing = 0
+
+    def to_blob(path):
+        nonlocal missing
+        if path in stored:
+            cursor.execute('UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?', (stored[path][:64],))
+            return stored[path]
+        if not os.path.isfile(path):
+            missing += 1
+            return None
+        with open(path, 'rb') as f:
+            try:
+                stored[path] = blob_store.put(cursor, f, path.rsplit('.', 1)[-1].lower())
+            except ValueError as e:
+                print(f"ℹ️  Skipped {path}: {e}")
+                return None
+        return stored[path]
+
+    try:
+        for table, columns in BLOB_REFERENCES:
+            for column in columns:
+                cursor.execute(f'SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL AND {column} <> ?', ('',))
+                for row_id, value in cursor.fetchall():
+                    if (table, column) in BARE_COLUMNS:
+                        if blob_store.resolve(value) is not None:
+                            continue
+                        name = to_blob(os.path.join(UPLOAD_FOLDER, value))
+                        if name is None:
+                            continue
+                        new_value = name
+                        prefix = BARE_COLUMNS[(table, column)]
+                        if prefix:
+                            cursor.execute('DELETE FROM image_derivatives WHERE original = ?', (prefix + value,))
+                            enqueue_derivatives(cursor, blob_store.resolve(name), prefix + name, 'avatar', table)
+                    else:
+                        def rewrite(match):
+                            kind, owner, folder, filename = match.groups()
+                            if blob_store.resolve(filename) is not None:
+                                return match.group(0)
+                            name = to_blob(os.path.join(UPLOAD_FOLDER, URL_FOLDERS[kind], owner, folder, filename))
+                            if name is None:
+                                return match.group(0)
+                            url = f'/api/{kind}/{owner}/{folder}/{name}'
+                            if folder in ('images', 'highlights'):
+                                cursor.execute('DELETE FROM image_derivatives WHERE original = ?', (match.group(0),))
+                                enqueue_derivatives(cursor, blob_store.resolve(name), url, 'content', table)
+                            return url
+                        new_value = URL_RE.sub(rewrite, value)
+                    if new_value != value:
+                        cursor.execute(f'UPDATE {table} SET {column} = ? WHERE id = ?', (new_value, row_id))
+        conn.commit()
+        print(f"✓ Stored {len(stored)} files as {len(set(stored.values()))} blobs")
+        if missing:
+            print(f"ℹ️  {missing} references point to files that no longer exist; left unchanged")
+
+        if delete:
+            # Only the files copied into the store above, and the derivatives
+            # rendered next to them; nothing else under UPLOAD_FOLDER (the blob
+            # store, chunked uploads in progress, unrecognised files) is touched
+            removed = 0
+            for path in stored:
+                stem = os.path.splitext(path)[0]
+                for old in [path] + glob.glob(glob.escape(stem) + '.[sw]*.webp') + glob.glob(glob.escape(stem) + '.[sw]*.avif'):
+                    os.remove(old)
+                    removed += 1
+            print(f"✓ Deleted {removed} old files")
+        print("\n✅ Uploads migrated to the blob store!")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--delete', action='store_true', help='delete the old files once they are in the store')
+    migrate_uploads(parser.parse_args().delete)
@@ -0,0 +1,47 @@
+"""A process pool that is created lazily and replaced when it goes bad.
+
+Used by hashing.py and images.py. The pool is started on first use, i.e.
+after gunicorn has forked the worker, so each worker gets its own. When a
+pool process dies (``BrokenProcessPool``) or a task overruns its timeout,
+the caller hands the pool to ``discard``: the next ``get`` starts a fresh
+one, and the old pool's processes are killed so a stuck task does not keep
+a core busy.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+class ReplaceablePool:
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers)
+            return self.executor
+
+    def discard(self, executor):
+        """Replace a broken or stuck pool; other threads may have already."""
+        with self._lock:
+            if self.executor is executor:
+                self.executor = None
+        # shutdown() does not stop a task that is still running, and the
+        # executor has no public way to reach its processes. CPython keeps
+        # them in the private ``_processes`` ({pid: Process}, None once the
+        # pool has shut down) from 3.9, which cancel_futures needs anyway,
+        # through 3.13. Copy it before shutdown() can clear it.
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+
+    def shutdown(self):
+        with self._lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
@@ -0,0 +1,212 @@
+"""Opt-in stack-sampling profiler for individual requests.
+
+While a request is being profiled, a background thread snapshots the
+handling thread's stack every few milliseconds. When the request finishes,
+the samples are written in collapsed-stack format (one ``frame;frame;... N``
+line per distinct stack), which flamegraph.pl, speedscope and similar tools
+read directly:
+
+    <directory>/<endpoint>/<timestamp>-<pid>-<n>.folded
+
+Aggregate the files by endpoint (and optionally render SVG flamegraphs) with:
+
+    python profiling.py aggregate --dir /tmp/alumconnect-profiles --svg
+"""
+import os
+import sys
+import time
+import html
+import zlib
+import argparse
+import tempfile
+import threading
+import itertools
+from collections import Counter
+
+
+def frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+
+
+def collapse(frame):
+    """Return the stack of ``frame`` as ``root;...;leaf``."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class ProfileSession:
+
+    def __init__(self, thread_id, endpoint):
+        self.thread_id = thread_id
+        self.endpoint = endpoint
+        self.stacks = Counter()
+        self.started = time.time()
+
+
+class StackSampler:
+    """One sampling thread per process, shared by all profiled requests."""
+
+    def __init__(self, directory, interval=0.005):
+        self.directory = directory
+        self.interval = interval
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+        self._sequence = itertools.count()
+
+    def start(self, endpoint, thread_id=None):
+        session = ProfileSession(thread_id or threading.get_ident(), endpoint)
+        with self._lock:
+            self.sessions[session.thread_id] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+            self._active.set()
+        return session
+
+    def stop(self, session):
+        """Stop sampling ``session`` and write it out; returns the file path."""
+        with self._lock:
+            self.sessions.pop(session.thread_id, None)
+            if not self.sessions:
+                self._active.clear()
+        if not session.stacks:
+            return None
+        return self.write(session)
+
+    def write(self, session):
+        directory = os.path.join(self.directory, session.endpoint or 'unknown')
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(session.started))
+        path = os.path.join(directory, f'{stamp}-{os.getpid()}-{next(self._sequence)}.folded')
+        with open(path, 'w') as f:
+            for stack, count in session.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        return path
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, session in self.sessions.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != me:
+                        session.stacks[collapse(frame)] += 1
+            del frames
+
+
+# ---------------------------------------------------------------------------
+# Aggregation CLI
+# ---------------------------------------------------------------------------
+
+def read_folded(path, into):
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack and count.isdigit():
+                into[stack] += int(count)
+
+
+def aggregate(directory, endpoints=None):
+    """Merge the ``.folded`` files under ``directory`` into ``{endpoint: (files, stacks)}``."""
+    merged = {}
+    for endpoint in sorted(os.listdir(directory)):
+        path = os.path.join(directory, endpoint)
+        if not os.path.isdir(path) or (endpoints and endpoint not in endpoints):
+            continue
+        stacks = Counter()
+        files = [name for name in os.listdir(path) if name.endswith('.folded')]
+        for name in files:
+            read_folded(os.path.join(path, name), stacks)
+        if stacks:
+            merged[endpoint] = (len(files), stacks)
+    return merged
+
+
+def self_time(stacks):
+    leaves = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(';', 1)[-1]] += count
+    return leaves
+
+
+def render_svg(stacks, title, width=1200, row_height=16):
+    """Render a minimal flamegraph (root at the bottom) as SVG text."""
+    tree = {}
+    for stack, count in stacks.items():
+        node = tree
+        for frame in stack.split(';'):
+            entry = node.setdefault(frame, [0, {}])
+            entry[0] += count
+            node = entry[1]
+    total = sum(stacks.values())
+    depth = max(stack.count(';') + 1 for stack in stacks)
+    height = (depth + 2) * row_height
+    rects = []
+
+    def place(node, x, level):
+        for frame, (count, children) in sorted(node.items()):
+            w = width * count / total
+            if w >= 0.5:
+                y = height - (level + 1) * row_height
+                hue = 20 + zlib.crc32(frame.encode()) % 40
+                label = html.escape(frame)
+                rects.append(
+                    f'<g><title>{label} ({count} samples, {100 * count / total:.1f}%)</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" fill="hsl({hue},90%,60%)"/>'
+                    + (f'<text x="{x + 2:.1f}" y="{y + row_height - 4}" font-size="11">'
+                       f'{html.escape(frame[:int(w / 7)])}</text>' if w > 30 else '')
+                    + '</g>')
+                place(children, x, level + 1)
+            x += w
+
+    place(tree, 0.0, 0)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace">'
+            f'<text x="4" y="14" font-size="13">{html.escape(title)}</text>' + ''.join(rects) + '</svg>\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate request profiles by endpoint')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    agg = subparsers.add_parser('aggregate', help='merge .folded files per endpoint')
+    agg.add_argument('--dir', default=os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'alumconnect-profiles')), help='profile directory')
+    agg.add_argument('--endpoint', action='append', help='only these endpoints (repeatable)')
+    agg.add_argument('--output', help='write merged <endpoint>.folded files here (default: --dir)')
+    agg.add_argument('--svg', action='store_true', help='also render <endpoint>.svg flamegraphs')
+    agg.add_argument('--top', type=int, default=10, help='hottest frames to print per endpoint')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"❌ No profiles found in {args.dir}")
+        return 1
+    output = args.output or args.dir
+    os.makedirs(output, exist_ok=True)
+    merged = aggregate(args.dir, args.endpoint)
+    if not merged:
+        print(f"❌ No profiles found in {args.dir}")
+        return 1
+
+    for endpoint, (files, stacks) in merged.items():
+        total = sum(stacks.values())
+        with open(os.path.join(output, f'{endpoint}.folded'), 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        if args.svg:
+            with open(os.path.join(output, f'{endpoint}.svg'), 'w') as f:
+                f.write(render_svg(stacks, f'{endpoint}: {files} requests, {total} samples'))
+        print(f"📊 {endpoint}: {files} requests, {total} samples")
+        for frame, count in self_time(stacks).most_common(args.top):
+            print(f"   {100 * count / total:5.1f}%  {frame}")
+    print(f"✅ Merged profiles written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Per-request SQLite statement counting and timing.
+
+Connections opened with ``factory=InstrumentedConnection`` record every
+statement they execute into the ``QueryStats`` of the current request (a
+context variable set by the app in ``before_request``). Connections used
+outside a request, e.g. in scripts or streamed response generators, record
+nothing.
+
+    conn = sqlite3.connect('launchpad.db', factory=InstrumentedConnection)
+"""
+import time
+import sqlite3
+import contextvars
+
+current_stats = contextvars.ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """Statement count and time for one request, aggregated by SQL text."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}
+
+    def record(self, sql, seconds, executed=True):
+        self.seconds += seconds
+        entry = self.statements.get(sql)
+        if entry is None:
+            entry = self.statements[sql] = [0, 0.0]
+        if executed:
+            self.count += 1
+            entry[0] += 1
+        entry[1] += seconds
+
+    def top(self, limit=10):
+        """The ``limit`` most expensive statements, for slow-request logs."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [{'sql': ' '.join(sql.split()), 'count': count, 'ms': round(seconds * 1000, 2)}
+                for sql, (count, seconds) in ranked[:limit]]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+
+    def execute(self, sql, parameters=()):
+        stats = current_stats.get()
+        if stats is None:
+            return super().execute(sql, parameters)
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            stats.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        stats = current_stats.get()
+        if stats is None:
+            return super().executemany(sql, seq_of_parameters)
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            stats.record(sql, time.perf_counter() - start)
+
+    # SQLite does most of the work of a SELECT while stepping through rows,
+    # so bulk fetches are timed too and charged to the statement.
+    def fetchall(self):
+        stats = current_stats.get()
+        if stats is None or not hasattr(self, '_sql'):
+            return super().fetchall()
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            stats.record(self._sql, time.perf_counter() - start, executed=False)
+
+    def fetchmany(self, size=None):
+        stats = current_stats.get()
+        size = self.arraysize if size is None else size
+        if stats is None or not hasattr(self, '_sql'):
+            return super().fetchmany(size)
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(size)
+        finally:
+            stats.record(self._sql, time.perf_counter() - start, executed=False)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
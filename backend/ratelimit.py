@@ -0,0 +1,251 @@
+"""Token-bucket rate limits and concurrency caps for expensive endpoints.
+
+A policy such as ``'5/minute; burst=10; key=ip'`` gives every client (user id
+or IP) a bucket holding up to ``burst`` tokens that refills at 5 per minute;
+each request takes one token and is refused with 429 when the bucket is empty.
+
+Buckets live in one of two stores:
+
+- ``MemoryBucketStore``: a dict in this process. Cheapest, but each gunicorn
+  worker enforces the limit on its own, so N workers allow N times the rate.
+- ``SQLiteBucketStore``: one row per bucket in a WAL-mode SQLite file, updated
+  with a single atomic UPSERT, so the limit holds across every worker on a box.
+  If the file cannot be written (locked past the busy timeout, disk errors)
+  requests are let through rather than failed.
+
+``ConcurrencyLimiter`` caps in-flight requests per endpoint in this process;
+it is meant for CPU-heavy routes where the worker, not the client, is the
+scarce resource. A cap only bites with more threads per worker than the cap
+(gunicorn.conf.py runs 4); a sync worker has one request in flight.
+
+Benchmark the per-request overhead with:
+    python -m benchmarks.bench_ratelimit
+"""
+import time
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger('alumconnect.ratelimit')
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class RateLimitPolicy:
+    """``limit`` requests per ``period`` seconds, bursting up to ``burst``."""
+
+    def __init__(self, limit, period, burst=None, key='user'):
+        if key not in ('user', 'ip'):
+            raise ValueError(f'Unknown rate limit key: {key}')
+        self.limit = limit
+        self.period = period
+        self.burst = burst or limit
+        self.key = key
+        self.rate = limit / period
+        # RateLimit-Policy header value, e.g. "5;w=60;burst=10"
+        self.header = f'{limit};w={period}' + (f';burst={self.burst}' if self.burst != limit else '')
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse ``'<limit>/<period>[; burst=N][; key=user|ip]'``."""
+        rate, *options = [part.strip() for part in spec.split(';')]
+        limit, _, period = rate.partition('/')
+        period = period.strip()
+        seconds = PERIODS.get(period.rstrip('s'))
+        if seconds is None:
+            seconds = int(period)
+        kwargs = {}
+        for option in options:
+            name, _, value = option.partition('=')
+            name, value = name.strip(), value.strip()
+            if name == 'burst':
+                kwargs['burst'] = int(value)
+            elif name == 'key':
+                kwargs['key'] = value
+            else:
+                raise ValueError(f'Unknown rate limit option: {name}')
+        return cls(int(limit), seconds, **kwargs)
+
+
+class RateLimitResult:
+    """Outcome of taking a token; ``headers()`` gives the RateLimit-* fields."""
+
+    __slots__ = ('allowed', 'policy', 'remaining', 'reset')
+
+    def __init__(self, allowed, policy, remaining, reset):
+        self.allowed = allowed
+        self.policy = policy
+        self.remaining = remaining
+        self.reset = reset
+
+    def headers(self):
+        headers = {
+            'RateLimit-Limit': str(self.policy.burst),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+            'RateLimit-Policy': self.policy.header,
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.reset)
+        return headers
+
+
+def _result(policy, allowed, tokens):
+    # Seconds until one token (if refused) or a full bucket (if allowed) is back
+    missing = (1 - tokens) if not allowed else (policy.burst - tokens)
+    reset = max(0, int(-(-missing // policy.rate))) if missing > 0 else 0
+    return RateLimitResult(allowed, policy, max(0, int(tokens)), reset)
+
+
+class MemoryBucketStore:
+    """Buckets in a per-process dict: ``key -> [tokens, updated_at]``."""
+
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, policy, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._evict(now)
+                bucket = self._buckets[key] = [float(policy.burst), now]
+            tokens = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            bucket[0] = tokens
+            bucket[1] = now
+        return _result(policy, allowed, tokens)
+
+    def _evict(self, now):
+        # Buckets idle for an hour are full again under any sane policy; if that
+        # frees nothing, start over rather than grow without bound
+        stale = [key for key, (_, updated_at) in self._buckets.items() if now - updated_at > 3600]
+        for key in stale:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_buckets:
+            self._buckets.clear()
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Buckets shared by every worker through a SQLite file."""
+
+    # All SET expressions see the old row, so refill, take and the allowed
+    # flag are computed from the same state in one atomic statement
+    TAKE_SQL = '''
+        INSERT INTO rate_limit_buckets (key, tokens, updated_at, allowed)
+        VALUES (:key, :burst - :cost, :now, 1)
+        ON CONFLICT(key) DO UPDATE SET
+            tokens = MIN(:burst, tokens + (:now - updated_at) * :rate)
+                     - CASE WHEN MIN(:burst, tokens + (:now - updated_at) * :rate) >= :cost THEN :cost ELSE 0 END,
+            allowed = MIN(:burst, tokens + (:now - updated_at) * :rate) >= :cost,
+            updated_at = :now
+        RETURNING tokens, allowed
+    '''
+
+    def __init__(self, path='ratelimit.db', retention=3600, prune_interval=60):
+        self.path = path
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._last_prune = time.monotonic()
+        self._conn().execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                allowed INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, policy, cost=1):
+        """Like ``MemoryBucketStore.take``, but None (let the request through)
+        when the store fails."""
+        now = time.time()
+        try:
+            conn = self._conn()
+            tokens, allowed = conn.execute(self.TAKE_SQL, {
+                'key': key, 'burst': policy.burst, 'cost': cost, 'now': now, 'rate': policy.rate,
+            }).fetchone()
+            if time.monotonic() - self._last_prune > self.prune_interval:
+                self._last_prune = time.monotonic()
+                conn.execute('DELETE FROM rate_limit_buckets WHERE updated_at < ?', (now - self.retention,))
+        except sqlite3.Error as e:
+            logger.warning('rate limit store unavailable', extra={'key': key, 'error': str(e)})
+            # Reconnect on the next request in case the connection is broken
+            conn = getattr(self._local, 'conn', None)
+            self._local.conn = None
+            if conn is not None:
+                conn.close()
+            return None
+        return _result(policy, bool(allowed), tokens)
+
+    def clear(self):
+        self._conn().execute('DELETE FROM rate_limit_buckets')
+
+
+class ConcurrencyLimiter:
+    """At most ``limits[endpoint]`` requests to an endpoint in flight per process."""
+
+    def __init__(self, limits):
+        self._slots = {endpoint: threading.BoundedSemaphore(limit) for endpoint, limit in limits.items()}
+
+    def is_limited(self, endpoint):
+        return endpoint in self._slots
+
+    def acquire(self, endpoint):
+        """Take a slot without waiting; False if the endpoint is at capacity."""
+        return self._slots[endpoint].acquire(blocking=False)
+
+    def release(self, endpoint):
+        self._slots[endpoint].release()
+
+
+class RateLimiter:
+    """Per-endpoint policies over a bucket store."""
+
+    def __init__(self, policies, store):
+        self.policies = {endpoint: RateLimitPolicy.parse(spec) if isinstance(spec, str) else spec
+                         for endpoint, spec in policies.items()}
+        self.store = store
+
+    def policy_for(self, endpoint):
+        return self.policies.get(endpoint)
+
+    def hit(self, endpoint, client):
+        """Take a token for ``client`` (``'user:7'`` / ``'ip:1.2.3.4'``) on
+        ``endpoint``. None if the endpoint is not limited or the store failed."""
+        policy = self.policies.get(endpoint)
+        if policy is None:
+            return None
+        return self.store.take(f'{endpoint}|{client}', policy)
+
+
+def create_limiter(config):
+    """Build the limiter described by RATE_LIMIT_* in ``config``."""
+    kind = config.get('RATE_LIMIT_STORAGE', 'memory')
+    if kind == 'memory':
+        store = MemoryBucketStore()
+    elif kind == 'sqlite':
+        store = SQLiteBucketStore(config.get('RATE_LIMIT_PATH', 'ratelimit.db'))
+    else:
+        raise ValueError(f'Unknown rate limit storage: {kind}')
+    return RateLimiter(config.get('RATE_LIMITS', {}), store)
@@ -0,0 +1,254 @@
+"""Chunked, resumable uploads for PDFs (CVs, project JDs, blog PDFs).
+
+A multipart upload through ``request.files`` is spooled whole by Werkzeug
+before the handler runs and is capped by ``MAX_CONTENT_LENGTH``. Here the
+client sends the file in pieces instead::
+
+    POST   /api/uploads                {"kind": "cv", "size": 48213337, "filename": "cv.pdf"}
+                                       -> {"upload_id": ..., "offset": 0, "chunk_size": 8388608}
+    PUT    /api/uploads/<id>?offset=N  raw bytes (application/octet-stream) -> {"offset": ...}
+    GET    /api/uploads/<id>           -> {"offset": ..., "size": ...}
+    POST   /api/uploads/<id>/complete  -> same body as the multipart endpoint
+    DELETE /api/uploads/<id>
+
+Each chunk is read from the request stream in small pieces and appended to a
+partial file while being hashed, so memory use does not grow with the file.
+The bytes written are recorded even when the client disconnects mid-chunk;
+it then asks for the offset and carries on from there. The declared size is
+checked up front and the first bytes against the file type's signature, so a
+file that is too large or not a PDF is rejected after a few bytes, not after
+the whole upload.
+
+The SHA-256 state is kept in memory by the process that received the last
+chunk; a chunk landing on another process (or after a restart) rehashes the
+partial file once. Completed files go into the blob store (blobs.py).
+Sessions idle for ``ttl`` seconds are deleted by ``expire``. A user may hold
+at most ``max_sessions`` unfinished sessions declaring ``max_reserved`` bytes
+in total, so open sessions cannot fill the disk.
+"""
+import os
+import time
+import uuid
+import hashlib
+import threading
+
+READ_SIZE = 64 * 1024
+# File type of each kind of upload, and the bytes its files start with
+KINDS = {'cv': 'pdf', 'jd': 'pdf', 'blog_pdf': 'pdf'}
+SIGNATURES = {'pdf': b'%PDF-'}
+
+
+class UploadError(Exception):
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class UploadSessions:
+
+    def __init__(self, root, max_size=64 * 1024 * 1024, chunk_size=8 * 1024 * 1024, ttl=86400, lease_seconds=300,
+                 max_sessions=3, max_reserved=128 * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        self.max_size = max_size
+        self.max_sessions = max_sessions
+        self.max_reserved = max_reserved
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self.lease_seconds = lease_seconds
+        # upload id -> (bytes hashed, hash object)
+        self._hashers = {}
+        self._lock = threading.Lock()
+
+    def path(self, upload_id):
+        return os.path.join(self.root, upload_id)
+
+    def create(self, cursor, user_id, kind, target_id, size, filename):
+        """Start a session; returns its id."""
+        if kind not in KINDS:
+            raise UploadError(f"kind must be one of {', '.join(KINDS)}")
+        file_type = KINDS[kind]
+        if not isinstance(size, int) or isinstance(size, bool) or size < len(SIGNATURES[file_type]):
+            raise UploadError('size must be the file size in bytes')
+        if size > self.max_size:
+            raise UploadError(f'File too large (max {self.max_size // (1024 * 1024)}MB)', 413)
+        if not str(filename or '').lower().endswith(f'.{file_type}'):
+            raise UploadError(f'Only {file_type.upper()} files are allowed')
+        upload_id = uuid.uuid4().hex
+        now = time.time()
+        # Checked in the INSERT itself, so concurrent requests cannot both
+        # squeeze under the caps
+        cursor.execute('''
+            INSERT INTO upload_sessions (id, user_id, kind, target_id, filename, size, created_at, updated_at)
+            SELECT ?, ?, ?, ?, ?, ?, ?, ?
+            FROM (SELECT COUNT(*) AS open, COALESCE(SUM(size), 0) AS reserved
+                  FROM upload_sessions WHERE user_id = ?)
+            WHERE open < ? AND reserved + ? <= ?
+        ''', (upload_id, user_id, kind, target_id, filename, size, now, now,
+              user_id, self.max_sessions, size, self.max_reserved))
+        if cursor.rowcount == 0:
+            raise UploadError(f'Too many unfinished uploads (at most {self.max_sessions}, '
+                              f'{self.max_reserved // (1024 * 1024)}MB in total); finish or cancel one first', 429)
+        return upload_id
+
+    def get(self, cursor, upload_id, user_id):
+        """``{kind, target_id, filename, size, offset}`` of a session of ``user_id``."""
+        cursor.execute('''
+            SELECT kind, target_id, filename, size, received FROM upload_sessions WHERE id = ? AND user_id = ?
+        ''', (upload_id, user_id))
+        row = cursor.fetchone()
+        if row is None:
+            raise UploadError('Upload not found', 404)
+        return dict(zip(('kind', 'target_id', 'filename', 'size', 'offset'), row))
+
+    def write(self, conn, upload_id, user_id, offset, stream):
+        """Append the chunk in ``stream`` at ``offset``; returns the new offset.
+
+        The session is leased for the duration, so two requests never write
+        the same file. Commits on ``conn``.
+        """
+        now = time.time()
+        row = conn.execute('''
+            UPDATE upload_sessions SET locked_until = ?
+            WHERE id = ? AND user_id = ? AND (locked_until IS NULL OR locked_until < ?)
+            RETURNING kind, size, received
+        ''', (now + self.lease_seconds, upload_id, user_id, now)).fetchone()
+        conn.commit()
+        if row is None:
+            self.get(conn.cursor(), upload_id, user_id)
+            raise UploadError('Another chunk of this upload is being received', 409)
+        kind, size, received = row
+        if offset != received:
+            self._unlock(conn, upload_id, received)
+            raise UploadError(f'Expected offset {received}', 409, offset=received)
+
+        path = self.path(upload_id)
+        signature = SIGNATURES[KINDS[kind]]
+        try:
+            hasher = self._hasher(upload_id, path, received)
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                # Drop anything past the recorded offset (a chunk cut off
+                # before it could be recorded)
+                f.seek(received)
+                f.truncate()
+                while True:
+                    data = stream.read(READ_SIZE)
+                    if not data:
+                        break
+                    if received < len(signature) and not data.startswith(signature[received:received + len(data)]):
+                        raise UploadError(f'Not a {KINDS[kind].upper()} file', 415)
+                    if received + len(data) > size:
+                        raise UploadError(f'More data than the declared size of {size} bytes', 413)
+                    f.write(data)
+                    hasher.update(data)
+                    received += len(data)
+        except UploadError as e:
+            if e.status in (410, 413, 415):
+                self.discard(conn, upload_id)
+                conn.commit()
+                raise
+            self._unlock(conn, upload_id, received)
+            raise
+        except BaseException:
+            self._unlock(conn, upload_id, received)
+            raise
+        with self._lock:
+            self._hashers[upload_id] = (received, hasher)
+        self._unlock(conn, upload_id, received)
+        return received
+
+    def finish(self, cursor, upload_id, user_id, sha256=None):
+        """End a fully received session in the caller's transaction.
+
+        Returns ``(session, path, sha256 hex digest)``; the caller stores the
+        file at ``path`` (keeping it) and calls ``remove_file`` once it has
+        committed. If the transaction rolls back, the session and its file
+        are still there and ``finish`` can be called again.
+        """
+        session = self.get(cursor, upload_id, user_id)
+        if session['offset'] != session['size']:
+            raise UploadError(f"Upload incomplete: {session['offset']} of {session['size']} bytes received", 409,
+                              offset=session['offset'])
+        cursor.execute('''
+            DELETE FROM upload_sessions WHERE id = ? AND (locked_until IS NULL OR locked_until < ?)
+        ''', (upload_id, time.time()))
+        if cursor.rowcount == 0:
+            raise UploadError('Another chunk of this upload is being received', 409)
+        path = self.path(upload_id)
+        hasher = self._hasher(upload_id, path, session['size'])
+        with self._lock:
+            # Kept for a retry until remove_file
+            self._hashers[upload_id] = (session['size'], hasher)
+        digest = hasher.hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise UploadError('Checksum mismatch, upload the file again', 422)
+        return session, path, digest
+
+    def discard(self, cursor, upload_id):
+        cursor.execute('DELETE FROM upload_sessions WHERE id = ?', (upload_id,))
+        self.remove_file(upload_id)
+
+    def remove_file(self, upload_id):
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        if os.path.exists(self.path(upload_id)):
+            os.remove(self.path(upload_id))
+
+    def expire(self, conn):
+        """Delete sessions idle for ``ttl`` seconds and partial files without
+        a session. Returns the number of sessions deleted."""
+        cutoff = time.time() - self.ttl
+        expired = [row[0] for row in conn.execute('SELECT id FROM upload_sessions WHERE updated_at < ?', (cutoff,))]
+        for upload_id in expired:
+            self.discard(conn, upload_id)
+        conn.commit()
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+        return len(expired)
+
+    def _unlock(self, conn, upload_id, received):
+        conn.execute('UPDATE upload_sessions SET received = ?, locked_until = NULL, updated_at = ? WHERE id = ?',
+                     (received, time.time(), upload_id))
+        conn.commit()
+
+    def _hasher(self, upload_id, path, received):
+        """Hash state of the first ``received`` bytes: the one kept from the
+        previous chunk, or rebuilt from the partial file."""
+        with self._lock:
+            cached = self._hashers.pop(upload_id, None)
+        if cached is not None and cached[0] == received:
+            return cached[1]
+        hasher = hashlib.sha256()
+        if received:
+            with open(path, 'rb') as f:
+                remaining = received
+                while remaining:
+                    data = f.read(min(READ_SIZE * 16, remaining))
+                    if not data:
+                        raise UploadError('Partial upload lost, start again', 410)
+                    hasher.update(data)
+                    remaining -= len(data)
+        return hasher
+
+
+def create_upload_sessions_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            target_id INTEGER,
+            filename TEXT,
+            size INTEGER NOT NULL,
+            received INTEGER NOT NULL DEFAULT 0,
+            locked_until REAL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_user ON upload_sessions (user_id)')
@@ -0,0 +1,158 @@
+"""Full-text search over projects, blog posts and alumni profiles (SQLite FTS5).
+
+Each searchable type has an external-content FTS5 table: the index stores only
+tokens, and reads the text back from its content table for snippets. Triggers on
+the base tables keep the index in step with every insert, update and delete,
+so handlers never touch it directly. Alumni are indexed through the
+``alumni_profiles`` view (``users`` rows with ``role = 'alumni'``), and their
+triggers skip every other user.
+
+``match_query`` turns free text typed by a user into a safe FTS5 query, and
+``search`` runs it across the requested types, ranked by bm25.
+"""
+import re
+
+# type -> FTS table, base table, the table or view the index reads text back
+# from, indexed columns (with bm25 weights), the columns returned for each hit,
+# and the role a users row must have
+SEARCH_TYPES = {
+    'project': {
+        'fts': 'projects_fts',
+        'table': 'projects',
+        'content': 'projects',
+        'columns': [('title', 10.0), ('description', 3.0), ('category', 4.0), ('tags', 5.0), ('skills_required', 5.0)],
+        'select': ['title', 'category', 'status', 'created_at'],
+        'role': None,
+    },
+    'blog': {
+        'fts': 'blog_posts_fts',
+        'table': 'blog_posts',
+        'content': 'blog_posts',
+        'columns': [('title', 10.0), ('content', 2.0), ('category', 4.0)],
+        'select': ['title', 'category', 'author_id', 'created_at'],
+        'role': None,
+    },
+    'alumni': {
+        'fts': 'alumni_fts',
+        'table': 'users',
+        'content': 'alumni_profiles',
+        'columns': [('name', 10.0), ('bio', 2.0), ('current_company', 5.0), ('current_position', 5.0),
+                    ('domain', 4.0), ('tech_skills', 4.0)],
+        'select': ['name', 'current_company', 'current_position', 'avatar'],
+        'role': 'alumni',
+    },
+}
+
+TOKENIZER = 'porter unicode61 remove_diacritics 2'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _only_role(spec, alias):
+    return f" WHERE {alias}.role = '{spec['role']}'" if spec['role'] else ''
+
+
+def create_search_index(cursor):
+    """Create the FTS tables and sync triggers; index existing rows for new tables."""
+    for spec in SEARCH_TYPES.values():
+        fts, table = spec['fts'], spec['table']
+        names = [name for name, _ in spec['columns']]
+        columns = ', '.join(names)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,))
+        exists = cursor.fetchone() is not None
+        if spec['content'] != table:
+            cursor.execute(f'''
+                CREATE VIEW IF NOT EXISTS {spec['content']} AS
+                SELECT id, {columns} FROM {table} WHERE role = '{spec['role']}'
+            ''')
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {columns},
+                content='{spec['content']}', content_rowid='id', tokenize='{TOKENIZER}'
+            )
+        ''')
+
+        new_values = ', '.join(f'new.{name}' for name in names)
+        old_values = ', '.join(f'old.{name}' for name in names)
+        insert = f"INSERT INTO {fts} (rowid, {columns}) SELECT new.id, {new_values}{_only_role(spec, 'new')};"
+        delete = (f"INSERT INTO {fts} ({fts}, rowid, {columns}) "
+                  f"SELECT 'delete', old.id, {old_values}{_only_role(spec, 'old')};")
+        watched = ', '.join(names + (['role'] if spec['role'] else []))
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END')
+        # One trigger, so the old tokens are always removed before the new ones
+        # are added; for alumni either half is skipped if the role changed
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {watched} ON {table} BEGIN {delete} {insert} END')
+        if not exists:
+            rebuild_type(cursor, spec)
+
+
+def rebuild_type(cursor, spec):
+    cursor.execute(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('rebuild')")
+
+
+def rebuild_search_index(conn):
+    """Reindex everything, e.g. after a bulk load with the triggers dropped."""
+    cursor = conn.cursor()
+    for spec in SEARCH_TYPES.values():
+        rebuild_type(cursor, spec)
+        cursor.execute(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('optimize')")
+    conn.commit()
+
+
+def match_query(text):
+    """Quote every word of ``text`` (so FTS5 operators can't be injected) and
+    treat the last one as a prefix, since users search while typing. A single
+    letter is not expanded: its prefix matches nearly every document."""
+    tokens = TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if len(tokens[-1]) > 1:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _type_query(kind, spec):
+    fts, table = spec['fts'], spec['table']
+    weights = ', '.join(str(weight) for _, weight in spec['columns'])
+    columns = ', '.join(f't.{name}' for name in spec['select'])
+    return f'''
+        SELECT '{kind}', t.id, bm25({fts}, {weights}) AS score,
+               snippet({fts}, -1, '<mark>', '</mark>', '…', 16), {columns}
+        FROM {fts} JOIN {table} t ON t.id = {fts}.rowid
+        WHERE {fts} MATCH :query
+    '''
+
+
+def search(cursor, text, types=None, limit=20, offset=0):
+    """Rank hits of ``text`` across ``types`` (default: all) by bm25.
+
+    Returns ``(hits, counts)``: one page of hits, best first, and the total
+    number of matches per type.
+    """
+    query = match_query(text)
+    types = [kind for kind in (types or SEARCH_TYPES) if kind in SEARCH_TYPES]
+    if query is None or not types:
+        return [], {kind: 0 for kind in types}
+
+    counts = {}
+    for kind in types:
+        fts = SEARCH_TYPES[kind]['fts']
+        cursor.execute(f'SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH :query', {'query': query})
+        counts[kind] = cursor.fetchone()[0]
+
+    # The best offset+limit hits of each type, merged, give the same page as
+    # ranking all types together; each type keeps its own result columns
+    hits = []
+    for kind in types:
+        if not counts[kind]:
+            continue
+        spec = SEARCH_TYPES[kind]
+        cursor.execute(f'{_type_query(kind, spec)} ORDER BY score LIMIT :limit',
+                       {'query': query, 'limit': limit + offset})
+        for row in cursor.fetchall():
+            hit = {'type': row[0], 'id': row[1], 'score': round(-row[2], 4), 'snippet': row[3]}
+            hit.update(zip(spec['select'], row[4:]))
+            hits.append(hit)
+    hits.sort(key=lambda hit: hit['score'], reverse=True)
+    return hits[offset:offset + limit], counts
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import json
 import random
 from app import init_db
+from geo import geocode_missing
 
 def seed_database():
     # Initialize database tables first
@@ -1383,6 +1384,9 @@ The journey is hard, but incredibly rewarding. Would I do it again? Absolutely.
                 VALUES (?, ?)
             ''', (post_id, user_ids[student_email]))
 
+    # Coordinates for "near me" search, which the app sets on every write
+    geocode_missing(cursor)
+
     conn.commit()
     conn.close()
     print("✅ Database seeded successfully with comprehensive data!")
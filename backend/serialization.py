@@ -0,0 +1,107 @@
+"""Fast JSON encoding/decoding for API responses.
+
+Uses orjson (pinned in requirements.txt) and falls back to the stdlib
+``json`` module when it is not installed; both paths produce compact UTF-8
+bytes.
+
+List endpoints go one step further with precompiled row encoders (see
+``Fieldset.row_encoder``): JSON text columns stored by the app are passed to
+orjson as ``orjson.Fragment`` and copied into the output as they are, skipping
+the decode and re-encode. SQLite validates them in the SELECT (see
+``fieldsets.stored_json``) and quotes plain text such as ``Python, SQL`` from
+older rows and bulk imports as a JSON string; only those are parsed and
+re-encoded (see ``repair_json``), so a bad row never makes the whole response
+invalid JSON. Without orjson the columns are decoded instead.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def dumps(obj):
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+    # Valid JSON text, written into the output without being parsed
+    raw = orjson.Fragment
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj):
+        return _encoder.encode(obj).encode('utf-8')
+
+    loads = json.loads
+    raw = json.loads
+
+
+def repair_json(value, default):
+    """Python value for stored text that is not valid JSON: comma-separated
+    items for a list column (``default`` ``b'[]'``), else the empty value."""
+    if default == b'[]':
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return loads(default)
+
+
+def encode_array(items):
+    """Encode the objects built by a row encoder as one JSON array."""
+    return dumps(items)
+
+
+def compile_row_encoder(plan):
+    """Compile ``plan`` into a function ``(row, extra=None) -> dict`` that
+    ``dumps`` encodes.
+
+    ``plan`` is a list of ``(key, index, kind, default)`` where ``kind`` is
+    ``'raw'`` (valid JSON text copied as-is, ``default`` bytes when empty; a
+    JSON string stands for text to repair),
+    ``'bool'`` (``default`` used for NULL) or ``'value'`` (encoded normally).
+    ``extra`` maps computed keys to Python values added to the object.
+    """
+    values = [(key, index) for key, index, kind, _ in plan if kind == 'value']
+    bools = [(key, index, default == b'true') for key, index, kind, default in plan if kind == 'bool']
+    raws = [(key, index, default, raw(default)) for key, index, kind, default in plan if kind == 'raw']
+
+    def encode(row, extra=None):
+        obj = {key: row[index] for key, index in values}
+        for key, index, default in bools:
+            value = row[index]
+            obj[key] = bool(value) if value is not None else default
+        for key, index, default, empty in raws:
+            value = row[index]
+            if not value:
+                obj[key] = empty
+            elif value[0] == '"':
+                obj[key] = repair_json(loads(value), default)
+            else:
+                obj[key] = raw(value)
+        if extra:
+            obj.update(extra)
+        return obj
+    return encode
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by ``dumps``/``loads`` above."""
+
+    def dumps(self, obj, **kwargs):
+        try:
+            return dumps(obj).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = dumps(obj)
+        except TypeError:
+            body = super().dumps(obj).encode('utf-8')
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,101 @@
+"""Structured, non-blocking request logging.
+
+Log records are formatted as one JSON object per line. Handlers never block
+the request thread: records go onto an in-memory queue (``QueueHandler``)
+and a background ``QueueListener`` thread does the formatting and I/O.
+
+Request logs are sampled per endpoint, secrets are redacted, and request
+bodies are only logged at DEBUG level, for small textual payloads.
+"""
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+
+REDACTED = '[REDACTED]'
+SENSITIVE_HEADERS = {'authorization', 'cookie', 'set-cookie', 'x-api-key', 'proxy-authorization'}
+SENSITIVE_KEYS = ('password', 'token', 'secret', 'authorization')
+LOGGABLE_BODY_TYPES = {'application/json', 'application/x-www-form-urlencoded', 'text/plain'}
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(name, level=logging.INFO, stream=None):
+    """Attach a queue-based JSON handler to logger ``name`` and return it."""
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
+        return logger
+
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter())
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    return logger
+
+
+def redact_headers(headers):
+    return {key: REDACTED if key.lower() in SENSITIVE_HEADERS else value for key, value in headers.items()}
+
+
+def redact(value):
+    """Recursively mask values whose key looks like a secret."""
+    if isinstance(value, dict):
+        return {key: REDACTED if any(s in str(key).lower() for s in SENSITIVE_KEYS) else redact(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def loggable_body(request, max_bytes):
+    """Return a redacted, size-capped body for logging, or None.
+
+    Multipart uploads and large or binary bodies are skipped without reading
+    them, so logging never buffers an upload into memory.
+    """
+    if request.mimetype not in LOGGABLE_BODY_TYPES:
+        return None
+    length = request.content_length
+    if length is None or length > max_bytes:
+        return None
+    # cache=True keeps the body available to the view's get_json()
+    raw = request.get_data(cache=True)
+    if request.mimetype == 'application/json':
+        try:
+            return redact(json.loads(raw))
+        except ValueError:
+            return None
+    if request.mimetype == 'application/x-www-form-urlencoded':
+        return redact(request.form.to_dict())
+    return raw.decode('utf-8', errors='replace')
+
+
+def should_sample(endpoint, rates, default_rate):
+    rate = rates.get(endpoint, default_rate)
+    return rate >= 1.0 or random.random() < rate
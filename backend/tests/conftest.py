@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Read by app.py when it is first imported
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='alumconnect-test-metrics-'))
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module, serving a fresh launchpad.db in ``tmp_path``."""
+    monkeypatch.chdir(tmp_path)
+    import app
+    # Entries cached by an earlier test could match this database's versions
+    app.cache.backend.clear()
+    app.principal_cache.clear()
+    app.init_db()
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,87 @@
+import io
+import os
+import sqlite3
+import time
+
+import pytest
+
+from blobs import BlobStore, create_blob_table
+
+JPEG = b'\xff\xd8\xff\xe0 not really a jpeg'
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    create_blob_table(conn.cursor())
+    conn.execute('CREATE TABLE posts (id INTEGER PRIMARY KEY, image TEXT)')
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / 'blobs'), grace=60)
+
+
+def refcount(conn, name):
+    return conn.execute('SELECT refcount FROM blobs WHERE sha256 = ?', (name[:64],)).fetchone()[0]
+
+
+def test_same_contents_stored_once(conn, store):
+    first = store.put(conn.cursor(), io.BytesIO(JPEG), 'jpg')
+    second = store.put(conn.cursor(), io.BytesIO(JPEG), 'jpg')
+    assert first == second
+    assert refcount(conn, first) == 2
+    with open(store.resolve(first), 'rb') as f:
+        assert f.read() == JPEG
+    store.release(conn.cursor(), f'/api/blog/1/images/{first}')
+    assert refcount(conn, first) == 1
+
+
+def test_served_only_as_the_stored_type(conn, store):
+    name = store.put(conn.cursor(), io.BytesIO(JPEG), 'jpg')
+    digest = name[:64]
+    assert store.lookup(conn.cursor(), name) == (store.path(digest), 'image/jpeg')
+    assert store.lookup(conn.cursor(), f'{digest}.html') is None
+    assert store.lookup(conn.cursor(), f'{digest}.pdf') is None
+    with pytest.raises(ValueError):
+        store.put(conn.cursor(), io.BytesIO(JPEG), 'pdf')
+    with pytest.raises(ValueError):
+        store.put(conn.cursor(), io.BytesIO(b'<html>'), 'html')
+
+
+def test_garbage_collection(conn, store):
+    kept = store.put(conn.cursor(), io.BytesIO(JPEG), 'jpg')
+    orphan = store.put(conn.cursor(), io.BytesIO(b'\x89PNG orphan'), 'png')
+    recent = store.put(conn.cursor(), io.BytesIO(b'\x89PNG recent'), 'png')
+    conn.execute('INSERT INTO posts (image) VALUES (?)', (f'/api/blog/1/images/{kept}',))
+    # Past the grace period for all but ``recent``
+    conn.execute('UPDATE blobs SET referenced_at = ? WHERE sha256 <> ?', (time.time() - 3600, recent[:64]))
+    conn.execute('UPDATE blobs SET refcount = 0')
+    conn.commit()
+    derivative = store.resolve(orphan[:64] + '.w400.webp')
+    open(derivative, 'wb').close()
+
+    deleted, freed = store.collect_garbage(conn, [('posts', ['image'])])
+
+    assert deleted == [orphan[:64]]
+    assert freed == len(b'\x89PNG orphan')
+    assert not os.path.exists(store.resolve(orphan)) and not os.path.exists(derivative)
+    assert os.path.exists(store.resolve(kept)) and os.path.exists(store.resolve(recent))
+    assert refcount(conn, kept) == 1
+
+
+def test_files_without_a_row_are_collected(conn, store):
+    # Moved into place by a transaction that then rolled back
+    name = store.put(conn.cursor(), io.BytesIO(JPEG), 'jpg')
+    conn.rollback()
+    path = store.resolve(name)
+    assert os.path.exists(path)
+
+    assert store.collect_garbage(conn, [('posts', ['image'])]) == ([], 0)
+    assert os.path.exists(path)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    assert store.collect_garbage(conn, [('posts', ['image'])]) == ([name[:64]], len(JPEG))
+    assert not os.path.exists(path)
@@ -0,0 +1,26 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk_io import hash_passwords, upsert_projects
+from hashing import PasswordHasher
+
+
+def test_passwords_hashed_with_the_configured_method():
+    chunk = [{'email': 'a@x.in', 'password': 'secret'}, {'email': 'b@x.in'}]
+    with ThreadPoolExecutor(1) as pool:
+        hash_passwords(chunk, pool, 'scrypt')
+    assert 'password' not in chunk[0] and 'password_hash' not in chunk[1]
+    hasher = PasswordHasher(method='scrypt', workers=0)
+    assert hasher.verify(chunk[0]['password_hash'], 'secret')
+    assert not hasher.needs_rehash(chunk[0]['password_hash'])
+
+
+def test_imported_projects_get_duration_weeks(app_module):
+    conn = sqlite3.connect('launchpad.db')
+    upsert_projects(conn.cursor(), [
+        {'title': 'P', 'description': 'D', 'category': 'Web', 'status': 'active', 'duration': '3 months'},
+    ])
+    conn.commit()
+    row = conn.execute('SELECT duration_weeks, listing_duration_weeks FROM projects').fetchone()
+    conn.close()
+    assert row == (13, 13)
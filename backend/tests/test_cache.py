@@ -0,0 +1,176 @@
+import time
+import sqlite3
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from cache import (Cache, InvalidationBus, LRUCache, MiniRedisServer, RedisCache, RedisInvalidationBus, SQLiteCache,
+                   SQLiteInvalidationBus)
+
+
+def test_lru_invalidate_drops_only_its_namespace():
+    backend = LRUCache()
+    backend.set('projects:a', b'1')
+    backend.set('blog:a', b'2')
+    backend.invalidate('projects')
+    assert backend.get('projects:a') is None
+    assert backend.get('blog:a') == b'2'
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    # Two workers, each with a private cache, sharing one bus
+    first = Cache(LRUCache(), SQLiteInvalidationBus(path, poll_interval=0))
+    second = Cache(LRUCache(), SQLiteInvalidationBus(path, poll_interval=0))
+    second.set('projects', 'list', b'stale')
+    first.invalidate('projects')
+    assert second.get('projects', 'list') is None
+
+
+@pytest.fixture
+def redis_server():
+    server = MiniRedisServer(('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def redis_url(server):
+    return f'redis://127.0.0.1:{server.server_address[1]}/0'
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_redis_cache_against_the_stand_in(redis_server):
+    cache = Cache(RedisCache(redis_url(redis_server)))
+    cache.set('projects', 'list', b'projects')
+    cache.set('projects', 'detail:1', b'project 1')
+    cache.set('blog', 'list', b'posts')
+    assert cache.get('projects', 'list') == b'projects'
+    cache.invalidate('projects')
+    assert cache.get('projects', 'list') is None
+    assert cache.get('projects', 'detail:1') is None
+    assert cache.get('blog', 'list') == b'posts'
+
+
+def test_redis_pubsub_invalidation_reaches_other_workers(redis_server):
+    url = redis_url(redis_server)
+    # Two workers, each with a private cache, sharing the Redis channel
+    first = Cache(LRUCache(), RedisInvalidationBus(url))
+    second = Cache(LRUCache(), RedisInvalidationBus(url))
+    wait_for(lambda: sum(len(subscribers) for subscribers in redis_server.channels.values()) == 2)
+    first.set('projects', 'list', b'mine')
+    second.set('projects', 'list', b'stale')
+    first.invalidate('projects')
+    wait_for(lambda: second.get('projects', 'list') is None)
+    assert first.get('projects', 'list') is None
+
+
+def test_redis_namespace_index_expires_with_its_entries(redis_server):
+    backend = RedisCache(redis_url(redis_server), default_ttl=0.05)
+    backend.set('blog:a', b'1')
+    backend.set('blog:b', b'2', ttl=0.1)
+    index = backend._index_key('blog').encode()
+    assert redis_server._alive(index)
+    time.sleep(0.15)
+    assert backend.get('blog:b') is None
+    assert not redis_server._alive(index)
+
+
+def test_failing_listener_does_not_stop_redis_invalidations(redis_server):
+    url = redis_url(redis_server)
+    first = Cache(LRUCache(), RedisInvalidationBus(url))
+    second = Cache(LRUCache(), RedisInvalidationBus(url))
+    seen = []
+
+    def broken(namespace):
+        raise RuntimeError('listener bug')
+
+    second.on_invalidate(broken)
+    second.on_invalidate(seen.append)
+    wait_for(lambda: sum(len(subscribers) for subscribers in redis_server.channels.values()) == 2)
+    first.invalidate('projects')
+    first.invalidate('blog')
+    wait_for(lambda: seen == ['projects', 'blog'])
+
+
+def test_unreachable_redis_is_a_miss():
+    cache = Cache(RedisCache('redis://127.0.0.1:1/0'))
+    assert cache.get('projects', 'list') is None
+    cache.set('projects', 'list', b'body')
+    cache.invalidate('projects')
+
+
+def test_invalidate_does_not_raise_when_the_bus_fails():
+    class BrokenBus(InvalidationBus):
+        def publish(self, namespace):
+            raise OSError('bus down')
+
+    seen = []
+    cache = Cache(LRUCache(), BrokenBus())
+    cache.on_invalidate(seen.append)
+    cache.set('blog', 'list', b'body')
+    cache.invalidate('blog')
+    assert cache.get('blog', 'list') is None
+    assert seen == ['blog']
+
+
+@pytest.fixture
+def auth(app_module):
+    conn = sqlite3.connect('launchpad.db')
+    cursor = conn.execute("INSERT INTO users (name, email, password_hash, role) VALUES ('A', 'a@x.in', 'x', 'alumni')")
+    conn.commit()
+    conn.close()
+    with app_module.app.app_context():
+        token = create_access_token(identity=f'user_{cursor.lastrowid}')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def titles(response):
+    return [post['title'] for post in response.get_json()]
+
+
+def test_write_changes_etag_and_body(client, auth):
+    first = client.get('/api/blog')
+    assert first.status_code == 200 and titles(first) == []
+    assert client.get('/api/blog', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    assert client.post('/api/blog', json={'title': 'Hello', 'content': 'World'}, headers=auth).status_code == 201
+    second = client.get('/api/blog', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert titles(second) == ['Hello']
+
+
+def test_cached_body_never_served_under_a_newer_etag(client, auth):
+    assert titles(client.get('/api/blog')) == []
+    # A write this worker never heard about (another worker, or a script):
+    # the triggers bump the table version but nothing invalidates the cache
+    conn = sqlite3.connect('launchpad.db')
+    conn.execute("INSERT INTO blog_posts (title, content, author_id, images, pdfs) VALUES ('Elsewhere', 'x', 1, '[]', '[]')")
+    conn.commit()
+    conn.close()
+    assert titles(client.get('/api/blog')) == ['Elsewhere']
+
+
+def test_unreadable_sqlite_cache_is_a_miss(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = Cache(SQLiteCache(path), SQLiteInvalidationBus(path, poll_interval=0))
+    cache.set('projects', 'list', b'body')
+    for conn in (cache.backend._conn(), cache.bus._conn()):
+        conn.execute('DROP TABLE IF EXISTS cache_entries')
+        conn.execute('DROP TABLE IF EXISTS cache_invalidations')
+    assert cache.get('projects', 'list') is None
+    cache.bus = None
+    assert cache.get('projects', 'list') is None
+    cache.set('projects', 'list', b'body')
+    cache.delete('projects', 'list')
+    cache.invalidate('projects')
@@ -0,0 +1,29 @@
+import metrics
+
+
+def test_compression_level_is_exported_per_encoding(app_module):
+    app_module.compression.stats.record('gzip', 6, 4096, 512, 0.001, cached=False)
+    collected = app_module.compression_metrics()
+    level = collected['compression_level']
+    assert level['type'] == 'gauge'
+    assert level['samples'][metrics.label_key({'encoding': 'gzip'})] == 6
+
+
+def test_bytes_saved_is_exported(app_module):
+    key = metrics.label_key({'encoding': 'br'})
+    before = app_module.compression_metrics().get('compression_bytes_saved_total', {'samples': {}})['samples'].get(key, 0)
+    app_module.compression.stats.record('br', 5, 4096, 512, 0.001, cached=False)
+    saved = app_module.compression_metrics()['compression_bytes_saved_total']
+    assert saved['type'] == 'counter'
+    assert saved['samples'][key] - before == 3584
+
+
+def test_livemax_gauge_takes_the_highest_live_worker():
+    key = metrics.label_key({'encoding': 'br'})
+    snapshot = lambda value: {'compression_level': {'type': 'gauge', 'help': '', 'mode': 'livemax',
+                                                    'samples': {key: value}}}
+    merged = {}
+    metrics._merge(merged, snapshot(4), 1, True)
+    metrics._merge(merged, snapshot(5), 2, True)
+    metrics._merge(merged, snapshot(11), 3, False)
+    assert merged['compression_level']['samples'][key] == 5
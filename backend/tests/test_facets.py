@@ -0,0 +1,10 @@
+from werkzeug.datastructures import MultiDict
+
+from facets import ALUMNI_FACETS
+
+
+def test_unknown_availability_is_ignored():
+    availability = next(facet for facet in ALUMNI_FACETS.facets if facet.name == 'availability')
+    assert availability.parse(MultiDict([('availability', 'available')])) == {1}
+    assert availability.parse(MultiDict([('availability', 'all')])) is None
+    assert availability.parse(MultiDict([('availability', 'not_available')])) is None
@@ -0,0 +1,16 @@
+import sqlite3
+
+from bulk_io import upsert_users
+
+
+def test_bulk_import_geocodes_locations(client):
+    conn = sqlite3.connect('launchpad.db')
+    upsert_users(conn.cursor(), [
+        {'name': 'A', 'email': 'a@x.in', 'role': 'alumni', 'location': 'Pune, Maharashtra', 'password_hash': 'x'},
+        {'name': 'B', 'email': 'b@x.in', 'role': 'alumni', 'location': 'Nowhere Special', 'password_hash': 'x'},
+    ])
+    conn.commit()
+    conn.close()
+    response = client.get('/api/alumni/nearby?near=Pune')
+    assert response.status_code == 200
+    assert [alumnus['name'] for alumnus in response.get_json()] == ['A']
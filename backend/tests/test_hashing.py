@@ -0,0 +1,37 @@
+import os
+import signal
+
+import pytest
+
+from hashing import HasherBusy, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, timeout=5)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify(hasher):
+    password_hash = hasher.hash('secret')
+    assert password_hash.startswith('pbkdf2:sha256:1000$')
+    assert hasher.verify(password_hash, 'secret')
+    assert not hasher.verify(password_hash, 'wrong')
+    assert not hasher.needs_rehash(password_hash)
+    assert PasswordHasher(workers=0).needs_rehash(password_hash) is False
+
+
+def test_recovers_from_a_killed_pool_process(hasher):
+    hasher.hash('warm up')
+    for pid in list(hasher._pool.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    assert hasher.verify(hasher.hash('secret'), 'secret')
+
+
+def test_timeout_replaces_the_pool(hasher):
+    hasher.timeout = 0.2
+    with pytest.raises(HasherBusy):
+        hasher._run(pow, 10 ** 10, 10 ** 10)
+    hasher.timeout = 5
+    assert hasher.verify(hasher.hash('secret'), 'secret')
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from jobs import JobQueue, UnknownTask, create_jobs_table
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    create_jobs_table(conn.cursor())
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def queue(conn):
+    # No backoff, so a retried job is due again straight away
+    return JobQueue(lambda: conn, backoff=0)
+
+
+def job(conn):
+    return conn.execute('SELECT status, attempts, last_error FROM jobs').fetchone()
+
+
+def test_enqueue_unknown_task(conn, queue):
+    with pytest.raises(UnknownTask):
+        queue.enqueue(conn.cursor(), 'nope')
+
+
+def test_job_runs_once(conn, queue):
+    calls = []
+    queue.task('ping')(calls.append)
+    queue.enqueue(conn.cursor(), 'ping', {'n': 1})
+    conn.commit()
+    assert queue.run_next(conn)
+    assert not queue.run_next(conn)
+    assert calls == [{'n': 1}]
+    assert job(conn) == ('done', 1, None)
+
+
+def test_failing_job_is_retried_then_dead(conn, queue):
+    @queue.task('boom', max_attempts=3)
+    def boom(payload):
+        raise RuntimeError('no luck')
+
+    queue.enqueue(conn.cursor(), 'boom')
+    conn.commit()
+    assert queue.run_next(conn)
+    assert job(conn) == ('queued', 1, 'RuntimeError: no luck')
+    while queue.run_next(conn):
+        pass
+    assert job(conn) == ('dead', 3, 'RuntimeError: no luck')
+
+
+def test_retry_waits_for_backoff(conn):
+    queue = JobQueue(lambda: conn, backoff=60)
+    queue.task('boom')(lambda payload: 1 / 0)
+    queue.enqueue(conn.cursor(), 'boom')
+    conn.commit()
+    assert queue.run_next(conn)
+    assert not queue.run_next(conn)
+    assert job(conn)[:2] == ('queued', 1)
+
+
+def test_expired_lease_counts_as_an_attempt(conn, queue):
+    queue.task('crash', max_attempts=2)(lambda payload: None)
+    queue.enqueue(conn.cursor(), 'crash')
+    conn.commit()
+    # The worker holding the job dies twice without finishing it
+    assert queue.lease(conn) is not None
+    conn.execute('UPDATE jobs SET leased_until = 0')
+    conn.commit()
+    # Reclaimed as a failed attempt, and leased again once its backoff is over
+    assert queue.lease(conn) is None
+    assert job(conn)[:2] == ('queued', 1)
+    assert queue.lease(conn) is not None
+    conn.execute('UPDATE jobs SET leased_until = 0')
+    conn.commit()
+    assert queue.lease(conn) is None
+    status, attempts, error = job(conn)
+    assert (status, attempts) == ('dead', 2)
+    assert error.startswith('Lease expired')
+
+
+def test_worker_that_lost_its_lease_leaves_the_job_alone(conn, queue):
+    other = JobQueue(lambda: conn, backoff=0)
+    other.worker_id = 'other:1'
+
+    @queue.task('slow')
+    def slow(payload):
+        # Meanwhile this lease expires and another worker takes the job
+        conn.execute('UPDATE jobs SET leased_until = 0')
+        conn.commit()
+        other.lease(conn)
+        assert other.lease(conn)[0] == 1
+
+    other.tasks = queue.tasks
+    queue.enqueue(conn.cursor(), 'slow')
+    conn.commit()
+    assert queue.run_next(conn)
+    assert conn.execute('SELECT status, worker, attempts FROM jobs').fetchone() == ('running', 'other:1', 2)
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import importlib.util
+
+from ratelimit import ConcurrencyLimiter, RateLimiter, SQLiteBucketStore
+
+
+def test_sqlite_store_shares_buckets(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    first = RateLimiter({'login': '2/minute'}, SQLiteBucketStore(path))
+    second = RateLimiter({'login': '2/minute'}, SQLiteBucketStore(path))
+    assert first.hit('login', 'ip:1').allowed
+    assert second.hit('login', 'ip:1').allowed
+    assert not first.hit('login', 'ip:1').allowed
+    assert second.hit('login', 'ip:2').allowed
+
+
+def test_store_errors_let_requests_through(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / 'ratelimit.db'))
+    limiter = RateLimiter({'login': '1/minute'}, store)
+    assert limiter.hit('login', 'ip:1').allowed
+
+    def locked():
+        raise sqlite3.OperationalError('database is locked')
+
+    real_conn, store._conn = store._conn, locked
+    assert limiter.hit('login', 'ip:1') is None
+    # Limiting resumes once the store is back
+    store._conn = real_conn
+    assert not limiter.hit('login', 'ip:1').allowed
+
+
+def test_concurrency_cap_sheds_requests_beyond_it():
+    limiter = ConcurrencyLimiter({'get_recommended_projects': 2})
+    assert not limiter.is_limited('get_projects')
+    assert limiter.acquire('get_recommended_projects')
+    assert limiter.acquire('get_recommended_projects')
+    assert not limiter.acquire('get_recommended_projects')
+    limiter.release('get_recommended_projects')
+    assert limiter.acquire('get_recommended_projects')
+
+
+def test_shipped_workers_have_more_threads_than_any_cap():
+    spec = importlib.util.spec_from_file_location(
+        'gunicorn_conf', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py'))
+    gunicorn_conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gunicorn_conf)
+    import app
+    assert gunicorn_conf.worker_class == 'gthread'
+    assert all(limit < gunicorn_conf.threads for limit in app.app.config['CONCURRENCY_LIMITS'].values())
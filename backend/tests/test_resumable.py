@@ -0,0 +1,142 @@
+import io
+import os
+import hashlib
+import sqlite3
+
+import pytest
+
+from blobs import BlobStore, create_blob_table
+from resumable import UploadError, UploadSessions, create_upload_sessions_table
+
+PDF = b'%PDF-1.7\n' + b'x' * 1000
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'uploads.db'))
+    create_upload_sessions_table(conn.cursor())
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    return UploadSessions(str(tmp_path / 'partial'), max_size=4096)
+
+
+def start(conn, sessions, size=len(PDF)):
+    upload_id = sessions.create(conn.cursor(), 1, 'cv', None, size, 'cv.pdf')
+    conn.commit()
+    return upload_id
+
+
+def test_upload_in_chunks(conn, sessions):
+    upload_id = start(conn, sessions)
+    assert sessions.write(conn, upload_id, 1, 0, io.BytesIO(PDF[:300])) == 300
+    assert sessions.write(conn, upload_id, 1, 300, io.BytesIO(PDF[300:])) == len(PDF)
+    session, path, digest = sessions.finish(conn.cursor(), upload_id, 1, hashlib.sha256(PDF).hexdigest())
+    assert digest == hashlib.sha256(PDF).hexdigest()
+    with open(path, 'rb') as f:
+        assert f.read() == PDF
+
+
+def test_resume_after_restart(conn, sessions, tmp_path):
+    upload_id = start(conn, sessions)
+    sessions.write(conn, upload_id, 1, 0, io.BytesIO(PDF[:500]))
+    # Another process, without the hash state kept in memory
+    other = UploadSessions(str(tmp_path / 'partial'), max_size=4096)
+    assert other.get(conn.cursor(), upload_id, 1)['offset'] == 500
+    other.write(conn, upload_id, 1, 500, io.BytesIO(PDF[500:]))
+    assert other.finish(conn.cursor(), upload_id, 1)[2] == hashlib.sha256(PDF).hexdigest()
+
+
+def test_wrong_offset(conn, sessions):
+    upload_id = start(conn, sessions)
+    sessions.write(conn, upload_id, 1, 0, io.BytesIO(PDF[:100]))
+    with pytest.raises(UploadError) as e:
+        sessions.write(conn, upload_id, 1, 50, io.BytesIO(PDF[50:]))
+    assert (e.value.status, e.value.offset) == (409, 100)
+    # The session is still usable from the offset it reported
+    assert sessions.write(conn, upload_id, 1, 100, io.BytesIO(PDF[100:])) == len(PDF)
+
+
+def test_other_users_upload_not_found(conn, sessions):
+    upload_id = start(conn, sessions)
+    with pytest.raises(UploadError) as e:
+        sessions.write(conn, upload_id, 2, 0, io.BytesIO(PDF))
+    assert e.value.status == 404
+
+
+def test_declared_size_checked_up_front(conn, sessions):
+    with pytest.raises(UploadError) as e:
+        start(conn, sessions, size=8192)
+    assert e.value.status == 413
+    with pytest.raises(UploadError):
+        sessions.create(conn.cursor(), 1, 'cv', None, len(PDF), 'cv.exe')
+
+
+def test_more_data_than_declared(conn, sessions):
+    upload_id = start(conn, sessions)
+    with pytest.raises(UploadError) as e:
+        sessions.write(conn, upload_id, 1, 0, io.BytesIO(PDF + b'extra'))
+    assert e.value.status == 413
+    with pytest.raises(UploadError) as e:
+        sessions.get(conn.cursor(), upload_id, 1)
+    assert e.value.status == 404
+
+
+def test_signature_checked_on_first_bytes(conn, sessions):
+    upload_id = start(conn, sessions)
+    with pytest.raises(UploadError) as e:
+        sessions.write(conn, upload_id, 1, 0, io.BytesIO(b'MZ' + PDF[2:]))
+    assert e.value.status == 415
+    with pytest.raises(UploadError) as e:
+        sessions.get(conn.cursor(), upload_id, 1)
+    assert e.value.status == 404
+
+
+def test_checksum_mismatch_and_incomplete(conn, sessions):
+    upload_id = start(conn, sessions)
+    sessions.write(conn, upload_id, 1, 0, io.BytesIO(PDF[:10]))
+    with pytest.raises(UploadError) as e:
+        sessions.finish(conn.cursor(), upload_id, 1)
+    assert (e.value.status, e.value.offset) == (409, 10)
+    sessions.write(conn, upload_id, 1, 10, io.BytesIO(PDF[10:]))
+    with pytest.raises(UploadError) as e:
+        sessions.finish(conn.cursor(), upload_id, 1, '0' * 64)
+    assert e.value.status == 422
+
+
+def test_open_sessions_and_reserved_bytes_are_capped(conn, tmp_path):
+    sessions = UploadSessions(str(tmp_path / 'partial'), max_size=4096, max_sessions=2, max_reserved=5000)
+    first = start(conn, sessions, 3000)
+    with pytest.raises(UploadError) as e:
+        start(conn, sessions, 3000)
+    assert e.value.status == 429
+    start(conn, sessions, 2000)
+    with pytest.raises(UploadError):
+        start(conn, sessions, 10)
+    # Other users have their own allowance
+    sessions.create(conn.cursor(), 2, 'cv', None, 3000, 'cv.pdf')
+    # Cancelling a session frees its share
+    sessions.discard(conn.cursor(), first)
+    start(conn, sessions, 3000)
+
+
+def test_complete_can_be_retried_after_a_rollback(conn, sessions, tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    create_blob_table(conn.cursor())
+    upload_id = start(conn, sessions)
+    sessions.write(conn, upload_id, 1, 0, io.BytesIO(PDF))
+    session, path, digest = sessions.finish(conn.cursor(), upload_id, 1)
+    store.adopt(conn.cursor(), path, digest, session['size'], 'pdf', keep=True)
+    # e.g. attaching the file failed, or the commit hit a locked database
+    conn.rollback()
+
+    session, path, digest = sessions.finish(conn.cursor(), upload_id, 1)
+    name = store.adopt(conn.cursor(), path, digest, session['size'], 'pdf', keep=True)
+    conn.commit()
+    sessions.remove_file(upload_id)
+    assert not os.path.exists(path)
+    with open(store.resolve(name), 'rb') as f:
+        assert f.read() == PDF
@@ -0,0 +1,45 @@
+import sqlite3
+
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def test_init_db_on_empty_database(app_module):
+    conn = sqlite3.connect('launchpad.db')
+    try:
+        assert {'latitude', 'longitude', 'listing_latitude', 'listing_longitude'} <= columns(conn, 'projects')
+        assert {'feedback', 'is_completed'} <= columns(conn, 'project_applications')
+        assert {'jobs', 'blobs', 'upload_sessions', 'table_versions'} <= {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+def test_init_db_is_idempotent(app_module):
+    app_module.init_db()
+    conn = sqlite3.connect('launchpad.db')
+    try:
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    finally:
+        conn.close()
+
+
+def test_project_facet_version_moves_only_with_facet_columns(app_module):
+    conn = sqlite3.connect('launchpad.db')
+    version = lambda: conn.execute("SELECT version FROM table_versions WHERE name = 'project_facets'").fetchone()[0]
+    try:
+        project_id = conn.execute("INSERT INTO projects (title, description, category, status) "
+                                  "VALUES ('P', 'D', 'Research', 'active')").lastrowid
+        conn.execute("INSERT INTO project_positions (project_id, title, stipend) VALUES (?, 'Intern', 5000)",
+                     (project_id,))
+        before = version()
+        conn.execute("UPDATE projects SET images = '[\"a.webp\"]', latitude = 1.0 WHERE id = ?", (project_id,))
+        conn.execute('UPDATE project_positions SET filled_count = 1 WHERE project_id = ?', (project_id,))
+        assert version() == before
+        conn.execute('UPDATE project_positions SET stipend = 8000 WHERE project_id = ?', (project_id,))
+        assert version() == before + 1
+        conn.execute("UPDATE projects SET status = 'paused' WHERE id = ?", (project_id,))
+        assert version() == before + 2
+    finally:
+        conn.close()
@@ -0,0 +1,50 @@
+import json
+import sqlite3
+
+from fieldsets import PROJECT_FIELDS
+from serialization import compile_row_encoder, dumps
+
+PLAN = [('id', 0, 'value', None), ('tags', 1, 'raw', b'[]'), ('contact', 2, 'raw', b'{}'), ('open', 3, 'bool', b'true')]
+
+
+def test_row_encoder_copies_stored_json():
+    encode = compile_row_encoder(PLAN)
+    assert json.loads(dumps(encode((1, '["a", "b"]', '{"x": 1}', 0), {'score': 2}))) == {
+        'id': 1, 'tags': ['a', 'b'], 'contact': {'x': 1}, 'open': False, 'score': 2}
+    assert json.loads(dumps(encode((2, None, '', None)))) == {'id': 2, 'tags': [], 'contact': {}, 'open': True}
+
+
+def test_row_encoder_repairs_text_quoted_by_sqlite():
+    encode = compile_row_encoder(PLAN)
+    # As returned by fieldsets.stored_json for text that is not valid JSON
+    assert json.loads(dumps(encode((1, '"Python, SQL"', '"{oops"', 1)))) == {
+        'id': 1, 'tags': ['Python', 'SQL'], 'contact': {}, 'open': True}
+
+
+def test_project_list_with_comma_separated_tags(client):
+    conn = sqlite3.connect('launchpad.db')
+    conn.execute("INSERT INTO users (name, email, password_hash, role) VALUES ('A', 'a@x.in', 'x', 'alumni')")
+    conn.execute("INSERT INTO projects (title, description, category, status, created_by, tags) "
+                 "VALUES ('P', 'D', 'Web', 'active', 1, 'Python, SQL')")
+    conn.commit()
+    conn.close()
+    response = client.get('/api/projects?fields=id,tags')
+    assert response.status_code == 200
+    assert response.get_json() == [{'id': 1, 'tags': ['Python', 'SQL']}]
+
+
+def test_stored_json_is_validated_in_sql():
+    selected, select, _ = PROJECT_FIELDS.columns(['id', 'tags', 'contact_details'])
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE projects (id INTEGER, tags TEXT, contact_details TEXT)')
+    conn.executemany('INSERT INTO projects VALUES (?, ?, ?)',
+                     [(1, '["a"]', '{"x": 1}'), (2, 'Python, SQL', '{oops'), (3, None, '')])
+    rows = conn.execute(f'SELECT {select} FROM projects p ORDER BY p.id').fetchall()
+    encode, to_dict = PROJECT_FIELDS.row_encoder(selected), PROJECT_FIELDS.row_mapper(selected)
+    expected = [
+        {'id': 1, 'tags': ['a'], 'contact_details': {'x': 1}},
+        {'id': 2, 'tags': ['Python', 'SQL'], 'contact_details': {}},
+        {'id': 3, 'tags': [], 'contact_details': {}},
+    ]
+    assert [json.loads(dumps(encode(row))) for row in rows] == expected
+    assert [to_dict(row) for row in rows] == expected
@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+
+from typeahead import TypeaheadIndex
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, role TEXT, current_company TEXT, tech_skills TEXT)')
+    conn.execute('CREATE TABLE projects (id INTEGER PRIMARY KEY, title TEXT, category TEXT, status TEXT, skills_required TEXT)')
+    conn.execute("INSERT INTO users VALUES (1, 'José Kumar', 'alumni', 'Acme', '[\"python\"]')")
+    conn.execute("INSERT INTO projects VALUES (1, 'Robotics Lab', 'Research', 'active', '[\"ros\"]')")
+    conn.commit()
+    conn.close()
+
+
+def labels(results):
+    return [result['label'] for result in results]
+
+
+def test_queries_do_not_wait_for_the_build(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    make_db(path)
+    release = threading.Event()
+
+    def slow_connect():
+        release.wait(5)
+        return sqlite3.connect(path)
+
+    index = TypeaheadIndex(slow_connect)
+    assert index.query('jo') == ([], False)
+    release.set()
+    assert index.wait_ready(5)
+    results, complete = index.query('jo')
+    assert complete and labels(results) == ['José Kumar']
+
+
+def test_full_invalidation_keeps_serving_the_previous_index(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    make_db(path)
+    index = TypeaheadIndex(lambda: sqlite3.connect(path))
+    index.build()
+    assert labels(index.query('rob')[0]) == ['Robotics Lab']
+
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE projects SET title = 'Rocketry Club' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    index.on_invalidate('typeahead')
+    # Answered from the old index while the new one loads
+    assert labels(index.query('rob')[0]) in (['Robotics Lab'], [])
+    index.wait_ready(5)
+    assert labels(index.query('roc')[0]) == ['Rocketry Club']
+    assert index.query('rob')[0] == []
+
+
+def test_document_updates_apply_before_the_next_query(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    make_db(path)
+    index = TypeaheadIndex(lambda: sqlite3.connect(path))
+    index.build()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users VALUES (2, 'Joanna Roy', 'student', NULL, NULL)")
+    conn.commit()
+    conn.close()
+    index.on_invalidate('typeahead:user:2')
+    assert sorted(labels(index.query('jo', kinds=('user',))[0])) == ['Joanna Roy', 'José Kumar']
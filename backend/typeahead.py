@@ -0,0 +1,431 @@
+"""In-memory prefix index for typeahead over people, projects, companies and skills.
+
+Every searchable word of a document is stored as a ``(term, kind, id)`` tuple
+in a ``SortedList``, so all terms starting with a prefix form one contiguous
+range found by bisection. Documents are:
+
+- ``user``: one per user, matched on every word of the name
+- ``project``: one per project, matched on every word of the title
+- ``company`` / ``skill``: one per distinct value across users and projects,
+  weighted by how many users/projects carry it
+
+The index is built from the database on a background thread (started when a
+gunicorn worker boots, or by the first query) and then kept up to date one
+document at a time: writers publish ``typeahead:<kind>:<id>`` through the cache
+invalidation bus, and every worker reloads just that document before its next
+query. Publishing plain ``typeahead`` (bulk imports) rebuilds the index in the
+background while queries keep using the previous one; until the first build
+is done, queries answer with no results and ``complete=False``.
+
+Print a memory-per-entry and latency report for a database with:
+    python typeahead.py report [--db launchpad.db] [--queries 2000]
+"""
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+import logging
+import unicodedata
+from collections import Counter
+
+from sortedcontainers import SortedList
+
+logger = logging.getLogger('alumconnect.typeahead')
+
+KINDS = ('user', 'project', 'company', 'skill')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Upper bound for prefix ranges: sorts after any character a term can hold
+MAX_CHAR = '\U0010ffff'
+
+
+def normalize(text):
+    """Casefold and strip accents, so 'José' is found by 'jose'."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def terms_for(label):
+    """The full label plus each of its words, normalized. Interned, since the
+    same first names and words recur across thousands of documents."""
+    normalized = normalize(label).strip()
+    if not normalized:
+        return set()
+    terms = set(WORD_RE.findall(normalized))
+    terms.add(normalized)
+    return {sys.intern(term) for term in terms}
+
+
+def parse_list(value):
+    """Skill columns hold JSON arrays; tolerate plain comma-separated text."""
+    if not value:
+        return []
+    try:
+        items = json.loads(value)
+    except ValueError:
+        items = value.split(',')
+    if not isinstance(items, list):
+        return []
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+# Extra fields returned with each kind of suggestion, after type/id/label
+FIELDS = {
+    'user': ('role', 'current_company'),
+    'project': ('category', 'status'),
+    'company': (),
+    'skill': (),
+}
+
+USER_SQL = 'SELECT id, name, role, current_company, tech_skills FROM users'
+PROJECT_SQL = 'SELECT id, title, category, status, skills_required FROM projects'
+
+
+def load_users(cursor, ids=None):
+    where = f" WHERE id IN ({','.join('?' * len(ids))})" if ids else ''
+    cursor.execute(USER_SQL + where, list(ids or ()))
+    for user_id, name, role, company, tech_skills in cursor.fetchall():
+        tags = [('skill', skill) for skill in parse_list(tech_skills)]
+        if company:
+            tags.append(('company', company))
+        yield user_id, name or '', (role, company), tags
+
+
+def load_projects(cursor, ids=None):
+    where = f" WHERE id IN ({','.join('?' * len(ids))})" if ids else ''
+    cursor.execute(PROJECT_SQL + where, list(ids or ()))
+    for project_id, title, category, status, skills in cursor.fetchall():
+        yield project_id, title or '', (category, status), [('skill', skill) for skill in parse_list(skills)]
+
+
+LOADERS = {'user': load_users, 'project': load_projects}
+
+
+class TypeaheadIndex:
+    """Prefix index; ``connect`` opens the app database when (re)loading."""
+
+    # Prefixes this short match a large share of all terms, so they are
+    # answered in full on first use and memoised instead of under the budget
+    SHORT_PREFIX = 2
+    MEMO_SIZE = 4096
+    # Candidates kept per memoised prefix; enough for any limit plus exclusions
+    MEMO_DEPTH = 32
+
+    def __init__(self, connect, budget_ms=1.0):
+        self.connect = connect
+        self.budget = budget_ms / 1000
+        self._terms = SortedList()
+        # (kind, key) -> (label, normalized label, extra field values)
+        self._docs = {}
+        # (kind, key) -> the (tag kind, tag key) pairs a user/project contributed
+        self._tags_of = {}
+        self._tag_counts = Counter()
+        self._tag_pairs = {}
+        # prefix -> {kinds: best candidates}; a change evicts the prefixes of
+        # every term it touched
+        self._memo = {}
+        self._lock = threading.RLock()
+        # Bumped by every full invalidation; the loaded index is current while
+        # _built_generation matches it (None: nothing loaded yet)
+        self._generation = 0
+        self._built_generation = None
+        self._builder = None
+        self._pending = set()
+        # Documents changed while a build runs; it may have read them before
+        # the change, so they are reloaded once it is swapped in
+        self._replay = set()
+
+    # -- building and incremental updates ---------------------------------
+
+    def build(self):
+        """Load every document into a fresh index and swap it in. Queries keep
+        using the current index (if any) while it loads."""
+        with self._lock:
+            generation = self._generation
+            self._replay = set()
+        fresh = TypeaheadIndex(self.connect)
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            for kind, loader in LOADERS.items():
+                for doc_id, label, extra, tags in loader(cursor):
+                    fresh._add(kind, doc_id, label, extra, tags)
+        finally:
+            conn.close()
+        with self._lock:
+            self._terms = fresh._terms
+            self._docs = fresh._docs
+            self._tags_of = fresh._tags_of
+            self._tag_counts = fresh._tag_counts
+            self._tag_pairs = fresh._tag_pairs
+            self._memo = {}
+            self._built_generation = generation
+            self._pending |= self._replay
+            self._replay = set()
+
+    def start(self):
+        """Build the index on a background thread unless it is current or
+        already being built. Called from gunicorn's post_worker_init, and by
+        queries that find the index missing or stale."""
+        with self._lock:
+            if self._built_generation == self._generation:
+                return
+            if self._builder is not None and self._builder.is_alive():
+                return
+            self._builder = threading.Thread(target=self._run_builds, name='typeahead-build', daemon=True)
+            self._builder.start()
+
+    def _run_builds(self):
+        # Go again if a full invalidation arrived while building
+        try:
+            while True:
+                self.build()
+                with self._lock:
+                    if self._built_generation == self._generation:
+                        return
+        except Exception as e:
+            # The next query starts another attempt
+            logger.error('typeahead build failed', extra={'error': str(e)})
+
+    def wait_ready(self, timeout=None):
+        """Block until a build started by ``start`` has finished."""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+        return self._built_generation is not None
+
+    def _evict(self, terms):
+        if not self._memo:
+            return
+        for term in terms:
+            for length in range(1, len(term) + 1):
+                self._memo.pop(term[:length], None)
+
+    def _add(self, kind, doc_id, label, extra, tags):
+        terms = terms_for(label)
+        self._docs[(kind, doc_id)] = (label, normalize(label).strip(), extra)
+        self._terms.update((term, kind, doc_id) for term in terms)
+        self._evict(terms)
+        contributed = []
+        for tag_kind, value in tags:
+            key = sys.intern(normalize(value).strip())
+            # One shared (kind, key) tuple per tag instead of one per mention
+            pair = self._tag_pairs.setdefault((tag_kind, key), (tag_kind, key))
+            contributed.append(pair)
+            self._tag_counts[pair] += 1
+            if pair not in self._docs:
+                self._docs[pair] = (value, key, ())
+                self._terms.update((term, tag_kind, key) for term in terms_for(value))
+            # A new tag, or a more popular one: either way its ranking changed
+            self._evict(terms_for(value))
+        if contributed:
+            self._tags_of[(kind, doc_id)] = tuple(contributed)
+
+    def _remove(self, kind, doc_id):
+        doc = self._docs.pop((kind, doc_id), None)
+        if doc is None:
+            return
+        terms = terms_for(doc[0])
+        for term in terms:
+            self._terms.discard((term, kind, doc_id))
+        self._evict(terms)
+        for tag_kind, key in self._tags_of.pop((kind, doc_id), ()):
+            tag_terms = terms_for(self._docs[(tag_kind, key)][0])
+            self._tag_counts[(tag_kind, key)] -= 1
+            if self._tag_counts[(tag_kind, key)] <= 0:
+                del self._tag_counts[(tag_kind, key)]
+                del self._tag_pairs[(tag_kind, key)]
+                del self._docs[(tag_kind, key)]
+                for term in tag_terms:
+                    self._terms.discard((term, tag_kind, key))
+            self._evict(tag_terms)
+
+    def refresh(self, kind, doc_ids):
+        """Reload some users/projects from the database (missing ones are dropped)."""
+        conn = self.connect()
+        try:
+            loaded = {row[0]: row[1:] for row in LOADERS[kind](conn.cursor(), list(doc_ids))}
+        finally:
+            conn.close()
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(kind, doc_id)
+                if doc_id in loaded:
+                    self._add(kind, doc_id, *loaded[doc_id])
+
+    def on_invalidate(self, namespace):
+        """Cache bus listener: ``typeahead`` or ``typeahead:<kind>:<id>``."""
+        if namespace == 'typeahead':
+            with self._lock:
+                self._generation += 1
+            return
+        prefix, _, rest = namespace.partition(':')
+        kind, _, doc_id = rest.partition(':')
+        if prefix == 'typeahead' and kind in LOADERS and doc_id.isdigit():
+            with self._lock:
+                self._pending.add((kind, int(doc_id)))
+                if self._builder is not None and self._builder.is_alive():
+                    self._replay.add((kind, int(doc_id)))
+
+    def _sync(self):
+        """Apply queued document changes; False while no index is loaded yet."""
+        with self._lock:
+            if self._built_generation != self._generation:
+                self.start()
+            if self._built_generation is None:
+                return False
+            pending, self._pending = self._pending, set()
+        by_kind = {}
+        for kind, doc_id in pending:
+            by_kind.setdefault(kind, []).append(doc_id)
+        for kind, doc_ids in by_kind.items():
+            self.refresh(kind, doc_ids)
+        return True
+
+    # -- queries -----------------------------------------------------------
+
+    def _scan(self, prefix, kinds, depth, deadline):
+        """Best ``depth`` candidates as ``(rank, kind, key)``, and whether the
+        whole range was scanned before ``deadline`` (None: no deadline)."""
+        seen = set()
+        ranked = []
+        docs = self._docs
+        tag_counts = self._tag_counts
+        for scanned, (term, kind, key) in enumerate(self._terms.irange((prefix,), (prefix + MAX_CHAR,))):
+            if deadline is not None and scanned & 63 == 63 and time.perf_counter() > deadline:
+                ranked.sort(reverse=True)
+                return ranked[:depth], False
+            if kind not in kinds or (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            label, normalized, _ = docs[(kind, key)]
+            # Labels that start with the query beat matches on a later word,
+            # then more popular companies/skills, then shorter labels
+            weight = tag_counts.get((kind, key), 1) if kind in ('company', 'skill') else 1
+            ranked.append(((normalized.startswith(prefix), weight, -len(label)), kind, key))
+        ranked.sort(reverse=True)
+        return ranked[:depth], True
+
+    def query(self, text, kinds=KINDS, limit=10, exclude=()):
+        """Best ``limit`` documents with a term starting with ``text``.
+
+        Scans the matching range until it ends or the time budget runs out;
+        returns ``(results, complete)`` where ``complete`` is False if the
+        budget cut the scan short or the index is still being built.
+        """
+        if not self._sync():
+            return [], False
+        prefix = normalize(text).strip()
+        if not prefix:
+            return [], True
+        kinds = tuple(kind for kind in KINDS if kind in kinds)
+        with self._lock:
+            ranked = self._memo.get(prefix, {}).get(kinds)
+            complete = True
+            if ranked is None or len(ranked) < limit + len(exclude) and len(ranked) == self.MEMO_DEPTH:
+                depth = max(self.MEMO_DEPTH, limit + len(exclude))
+                deadline = None if len(prefix) <= self.SHORT_PREFIX else time.perf_counter() + self.budget
+                ranked, complete = self._scan(prefix, kinds, depth, deadline)
+                if complete and depth == self.MEMO_DEPTH:
+                    if len(self._memo) >= self.MEMO_SIZE:
+                        self._memo.clear()
+                    self._memo.setdefault(prefix, {})[kinds] = ranked
+            results = []
+            for rank, kind, key in ranked:
+                if (kind, key) in exclude:
+                    continue
+                label, _, extra = self._docs[(kind, key)]
+                result = {'type': kind, 'id': key, 'label': label}
+                result.update(zip(FIELDS[kind], extra))
+                if kind in ('company', 'skill'):
+                    result['count'] = rank[1]
+                results.append(result)
+                if len(results) == limit:
+                    break
+        return results, complete
+
+    # -- reporting -----------------------------------------------------------
+
+    def memory_report(self):
+        """Approximate bytes held by the index, in total and per term entry.
+        Shared objects (interned terms, tag keys) are counted once."""
+        self._sync()
+        seen = set()
+
+        def size(obj):
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            total = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                total += sum(size(key) + size(value) for key, value in obj.items())
+            elif isinstance(obj, (tuple, list, set)):
+                total += sum(size(item) for item in obj)
+            return total
+
+        with self._lock:
+            term_bytes = sys.getsizeof(self._terms) + sum(size(entry) for entry in self._terms)
+            doc_bytes = size(self._docs)
+            tag_bytes = size(self._tags_of) + size(self._tag_counts) + size(self._tag_pairs)
+            memo_bytes = size(self._memo)
+            entries = len(self._terms)
+            total = term_bytes + doc_bytes + tag_bytes + memo_bytes
+            return {
+                'entries': entries,
+                'documents': dict(Counter(kind for kind, _ in self._docs)),
+                'term_bytes': term_bytes,
+                'document_bytes': doc_bytes,
+                'tag_bytes': tag_bytes,
+                'memo_bytes': memo_bytes,
+                'total_bytes': total,
+                'bytes_per_entry': round(total / entries, 1) if entries else 0,
+            }
+
+
+def report(args):
+    index = TypeaheadIndex(lambda: sqlite3.connect(args.db), args.budget_ms)
+    started = time.perf_counter()
+    index.build()
+    print(f"✅ Built in {(time.perf_counter() - started) * 1000:.0f}ms")
+    stats = index.memory_report()
+    print(f"📊 {stats['entries']:,} term entries over {stats['documents']}")
+    print(f"   terms {stats['term_bytes'] / 1e6:.1f}MB, documents {stats['document_bytes'] / 1e6:.1f}MB, "
+          f"tags {stats['tag_bytes'] / 1e6:.1f}MB, memo {stats['memo_bytes'] / 1e6:.1f}MB, "
+          f"total {stats['total_bytes'] / 1e6:.1f}MB "
+          f"= {stats['bytes_per_entry']} bytes/entry")
+
+    # Prefixes of 1-4 characters taken from real terms, as typed by a user
+    terms = [entry[0] for entry in index._terms]
+    rng = random.Random(1)
+    timings, cut_short = [], 0
+    for _ in range(args.queries):
+        term = rng.choice(terms)
+        prefix = term[:rng.randint(1, min(4, len(term)))]
+        started = time.perf_counter()
+        _, complete = index.query(prefix, limit=args.limit)
+        timings.append(time.perf_counter() - started)
+        cut_short += not complete
+    timings.sort()
+    pick = lambda q: timings[min(len(timings) - 1, int(q / 100 * len(timings)))] * 1000
+    print(f"⏱️  {args.queries} queries: p50 {pick(50):.3f}ms  p99 {pick(99):.3f}ms  max {timings[-1] * 1000:.3f}ms "
+          f"({cut_short} stopped at the {args.budget_ms}ms budget)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Typeahead index tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rep = sub.add_parser('report', help='build the index and report memory per entry and query latency')
+    rep.add_argument('--db', default='launchpad.db')
+    rep.add_argument('--queries', type=int, default=2000)
+    rep.add_argument('--limit', type=int, default=10)
+    rep.add_argument('--budget-ms', type=float, default=1.0)
+    args = parser.parse_args()
+    if args.command == 'report':
+        report(args)
+
+
+if __name__ == '__main__':
+    main()
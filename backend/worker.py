@@ -0,0 +1,51 @@
+"""Run background jobs enqueued by the API (see jobs.py).
+
+    python worker.py            # run until SIGTERM / Ctrl+C
+    python worker.py --burst    # run what is due, then exit
+    python worker.py --stats    # print job counts per status
+
+Start it next to gunicorn (render.yaml does); several workers may share one
+database, each job is leased to one of them at a time.
+"""
+import signal
+import argparse
+
+from app import app, jobs, get_db, image_renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--burst', action='store_true', help='exit once no job is due')
+    parser.add_argument('--stats', action='store_true', help='print job counts per status and exit')
+    parser.add_argument('--poll-interval', type=float, default=app.config['JOBS_POLL_INTERVAL'],
+                        help='seconds to wait when the queue is empty')
+    args = parser.parse_args()
+
+    if args.stats:
+        conn = get_db()
+        try:
+            for status, count in sorted(jobs.stats(conn.cursor()).items()):
+                print(f"{status:>8}: {count}")
+        finally:
+            conn.close()
+        return 0
+
+    stopping = []
+
+    def stop(signum, frame):
+        # Finish the job in hand, then exit
+        stopping.append(signum)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"🚀 Job worker {jobs.worker_id} started ({', '.join(sorted(jobs.tasks))})")
+    try:
+        jobs.work(poll_interval=args.poll_interval, burst=args.burst, should_stop=lambda: bool(stopping))
+    finally:
+        image_renderer.shutdown()
+    print("👋 Job worker stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())